@@ -1,33 +1,44 @@
 import datetime
 import logging
-import openai
 import instructor
 
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from pydantic import ValidationError
 
 from atomic_agents.agents.base_agent import BaseAgent, BaseAgentConfig
+from atomic_agents.lib.base.base_tool import BaseTool
 from atomic_agents.lib.components.system_prompt_generator import SystemPromptGenerator
 
-from atlas.agents.orchestrator_agent import ReasoningInputSchema, AgentDecisionSchema
+from atlas.agents.context_budget import ContextBudgeter
+from atlas.agents.decision_cache import CachedAgent, ReplayAgent, get_decision_cache, load_session, save_session
+from atlas.agents.orchestrator_agent import ReasoningInputSchema, AgentDecisionSchema, ToolCallSchema, \
+    TOOL_INPUT_SCHEMAS, as_tool_input, load_decision
 from atlas.agents.relational_db_tool import RelationalDBToolOutputSchema, RelationalDBTool, RelationalDBToolInputSchema, \
     RelationalDBToolConfig
 from atlas.agents.graph_db_tool import GraphDBTool, GraphDBToolConfig, GraphDBToolInputSchema, GraphDBToolOutputSchema
 from atlas.agents.vector_db_tool import VectorDBTool, VectorDBToolInputSchema, VectorDBToolOutputSchema, \
     VectorDBToolConfig
-from atlas.config import QDRANT_COLLECTION, EMBED_MODEL
+from atlas.clients import get_openai_client, get_qdrant_client
+from atlas.config import QDRANT_COLLECTION, EMBED_MODEL, OPENAI_QUERY_RETRIES, AGENT_CACHE_ENABLED
+from atlas.tracing import Tracer, activate, is_tracing, trace_span
 
 MAX_ITERATIONS = 5
+MAX_PARALLEL_TOOL_CALLS = 4
 logger = logging.getLogger(__name__)
 
 
-def get_initial_context(query: str, vdb_tool: VectorDBTool) -> str:
+def get_initial_context(query: str, vdb_tool: VectorDBTool, budgeter: Optional[ContextBudgeter] = None) -> str:
     logger.info(f"Fetching initial context for: '{query}'")
+    budgeter = budgeter or ContextBudgeter()
     try:
         # Use the VectorDBTool directly for simplicity here, or a raw client call
         params = VectorDBToolInputSchema(query=query, top_k=5)  # Get top 5 snippets initially
         results: VectorDBToolOutputSchema = vdb_tool.run(params)
         # Format results into a string for the LLM
-        context_str = "\n---\n".join([str(payload) for payload in results.results])
+        context_str = budgeter.fit([budgeter.format_chunks(results.results)]) if results.results else ""
         return context_str if context_str else "No initial context found."
     except Exception as e:
         logger.info(f"Error fetching initial context: {e}", exc_info=True)
@@ -35,17 +46,19 @@ def get_initial_context(query: str, vdb_tool: VectorDBTool) -> str:
 
 
 # --- Helper: Format Tool Output for LLM ---
-def format_tool_output_for_llm(output: Union[VectorDBToolOutputSchema, RelationalDBToolOutputSchema]) -> str:
+def format_tool_output_for_llm(output: Union[VectorDBToolOutputSchema, RelationalDBToolOutputSchema],
+                               budgeter: Optional[ContextBudgeter] = None) -> str:
+    budgeter = budgeter or ContextBudgeter()
     if isinstance(output, RelationalDBToolOutputSchema):
         if output.error:
             return f"Relational DB Tool Execution Failed: {output.error}"
         else:
-            return "Relational DB Tool Output:\n" + "\n".join(str(row) for row in output.rows)
+            return "Relational DB Tool Output:\n" + budgeter.format_rows(output.rows)
     elif isinstance(output, VectorDBToolOutputSchema):
         if output.error:
             return f"Vector DB Tool Execution Failed: {output.error}"
         else:
-            return "Vector DB Tool Output:\n" + "\n".join(str(res) for res in output.results)
+            return "Vector DB Tool Output:\n" + budgeter.format_chunks(output.results)
     elif isinstance(output, GraphDBToolOutputSchema):
         if output.error:
             return f"Graph DB Tool Execution Failed: {output.error}"
@@ -55,8 +68,76 @@ def format_tool_output_for_llm(output: Union[VectorDBToolOutputSchema, Relationa
         return "Error: Unknown tool output type."
 
 
+def run_tool_call(action: str, tool_parameters, tools: Dict[str, BaseTool]):
+    """Runs the tool of a 'call_*' action, returns its output or a message on invalid parameters."""
+    if tool_parameters is None:
+        logger.warning(f"Agent chose action '{action}' but provided no tool parameters.")
+        return f"Agent action was '{action}' but tool parameters were missing. Please reassess the situation based on previous context and the original query."
+    try:
+        tool_parameters = as_tool_input(action, tool_parameters)
+    except ValidationError as e:
+        logger.warning(f"Agent requested '{action}' with invalid parameters: {e}")
+        return f"Agent provided invalid parameters for '{action}', expected {TOOL_INPUT_SCHEMAS[action].__name__}: {e}. Please reassess."
+
+    logger.info(f"Agent requests tool call: {action.removeprefix('call_')}")
+    logger.debug(f"Tool parameters: {tool_parameters}")
+    with trace_span(f"tool.{action.removeprefix('call_')}", query_chars=len(tool_parameters.query)) as span:
+        output = tools[action].run(tool_parameters)
+        span.set(**_output_size(output))
+    return output
+
+
+def _output_size(output) -> Dict[str, int]:
+    """Size of a tool output, recorded in traces."""
+    if isinstance(output, RelationalDBToolOutputSchema):
+        size = {"rows": len(output.rows)}
+    elif isinstance(output, VectorDBToolOutputSchema):
+        size = {"results": len(output.results)}
+    elif isinstance(output, GraphDBToolOutputSchema):
+        size = {"result_chars": len(output.result)}
+    else:
+        return {}
+    if output.error:
+        size["failed"] = 1
+    return size
+
+
+def _format_output(output, budgeter: ContextBudgeter) -> str:
+    return output if isinstance(output, str) else format_tool_output_for_llm(output, budgeter)
+
+
+def execute_tool_call(action: str, tool_parameters, tools: Dict[str, BaseTool], budgeter: ContextBudgeter) -> str:
+    """Runs the tool of a 'call_*' action, returns its output formatted for the next reasoning step."""
+    return budgeter.fit([_format_output(run_tool_call(action, tool_parameters, tools), budgeter)])
+
+
+def execute_tool_calls(tool_calls: List[ToolCallSchema], tools: Dict[str, BaseTool], budgeter: ContextBudgeter) -> str:
+    """
+    Runs the tool calls of a 'call_tools' action concurrently and merges their outputs, in the
+    order the agent requested them, into one context for the next reasoning step.
+    """
+    def execute(tool_call: ToolCallSchema):
+        try:
+            return run_tool_call(tool_call.tool, tool_call.tool_parameters, tools)
+        except Exception as e:
+            logger.error(f"Error during {tool_call.tool} execution: {e}", exc_info=True)
+            return f"Error encountered during {tool_call.tool}: {e}."
+
+    workers = min(len(tool_calls), MAX_PARALLEL_TOOL_CALLS)
+    # Every call runs in a copy of this context, so its spans are nested in the current one
+    contexts = [copy_context() for _ in tool_calls]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool") as executor:
+        outputs = list(executor.map(lambda context, tool_call: context.run(execute, tool_call), contexts, tool_calls))
+    # Formatted in request order, so a chunk returned by several calls is shown by the first
+    return budgeter.fit([
+        f"Result of tool call {number} ({tool_call.tool}):\n{_format_output(output, budgeter)}"
+        for number, (tool_call, output) in enumerate(zip(tool_calls, outputs), 1)
+    ])
+
+
 def run_agent_workflow(user_query: str, main_agent: BaseAgent, vector_db_tool: VectorDBTool,
-                       relational_db_tool: RelationalDBTool, graph_db_tool: GraphDBTool):
+                       relational_db_tool: RelationalDBTool, graph_db_tool: GraphDBTool,
+                       budgeter: Optional[ContextBudgeter] = None):
     """
     Orchestrates the multi-step agent workflow to answer a user query.
 
@@ -66,6 +147,7 @@ def run_agent_workflow(user_query: str, main_agent: BaseAgent, vector_db_tool: V
         vector_db_tool: Instantiated vector DB tool.
         relational_db_tool: Instantiated relational DB tool (ensure read-only connection if possible).
         graph_db_tool: Instantiated graph DB tool.
+        budgeter: Fits the tool outputs of every step into the token budget, a new one by default.
 
     Returns:
         The final answer string or an error/fallback message.
@@ -74,14 +156,23 @@ def run_agent_workflow(user_query: str, main_agent: BaseAgent, vector_db_tool: V
     current_date = datetime.date.today()
     logger.info(f"[{current_date}] Starting workflow for query: '{user_query}'")
 
+    # Shared by all steps, so chunks already shown are not repeated
+    budgeter = budgeter or ContextBudgeter()
+
     # 1. Initial Context Fetch
     try:
-        initial_context = get_initial_context(user_query, vector_db_tool)
+        with trace_span("initial_context"):
+            initial_context = get_initial_context(user_query, vector_db_tool, budgeter)
         logger.debug(f"Initial context fetched (first 500 chars):\n{initial_context[:500]}...")
     except Exception as e:
         logger.error(f"Fatal: Failed to get initial context: {e}", exc_info=True)
         return f"Error: Could not retrieve initial context needed to answer the query. Details: {e}"
 
+    tools = {
+        'call_vector_db': vector_db_tool,
+        'call_relational_db': relational_db_tool,
+        'call_graph_db': graph_db_tool,
+    }
     current_context = initial_context
     final_response = None
     last_tool_output_formatted = None
@@ -89,110 +180,74 @@ def run_agent_workflow(user_query: str, main_agent: BaseAgent, vector_db_tool: V
     # --- Main Interaction Loop ---
     for i in range(MAX_ITERATIONS):
         iteration_num = i + 1
-        logger.info(f"--- Starting Iteration {iteration_num}/{MAX_ITERATIONS} ---")
-
-        # 4. Prepare Agent Input
-        agent_input = ReasoningInputSchema(
-            original_query=user_query,
-            context=current_context,
-            iteration=iteration_num
-        )
-
-        # 5. Run Agent
-        try:
-            agent_decision: AgentDecisionSchema = main_agent.run(agent_input)
-            logger.info(f"Agent Action Decision: {agent_decision.action}")
-            logger.debug(f"Agent Thought Process: {agent_decision.thought}")
-        except Exception as e:
-            logger.error(f"Agent execution failed on iteration {iteration_num}: {e}", exc_info=True)
-            final_response = f"Error: The agent failed to make a decision during iteration {iteration_num}. Details: {e}"
-            break  # Exit loop on agent failure
-
-        # 6. Process Agent Decision
-        try:
-            if agent_decision.action == 'final_answer':
-                if agent_decision.final_answer is not None and agent_decision.final_answer.strip():
-                    logger.info("Agent decided on final answer.")
-                    final_response = agent_decision.final_answer
-                    break
-                else:
-                    logger.warning("Agent action was 'final_answer' but no answer text was provided.")
-                    current_context = "Agent failed to provide a final answer despite choosing the action. Please reassess the situation based on previous context and the original query."
-                    last_tool_output_formatted = current_context
-
-            elif agent_decision.action == 'call_vector_db':
-                if agent_decision.tool_parameters and isinstance(agent_decision.tool_parameters,
-                                                                 VectorDBToolInputSchema):
-                    logger.info("Agent requests tool call: vector_db")
-                    logger.debug(f"Tool parameters: {agent_decision.tool_parameters}")
-                    # --- Directly call the tool's run method ---
-                    tool_output_obj: VectorDBToolOutputSchema = vector_db_tool.run(agent_decision.tool_parameters)
-                    last_tool_output_formatted = format_tool_output_for_llm(tool_output_obj)
+        with trace_span("iteration", iteration=iteration_num) as iteration_span:
+            logger.info(f"--- Starting Iteration {iteration_num}/{MAX_ITERATIONS} ---")
+
+            # 4. Prepare Agent Input
+            agent_input = ReasoningInputSchema(
+                original_query=user_query,
+                context=current_context,
+                iteration=iteration_num
+            )
+
+            # 5. Run Agent
+            try:
+                with trace_span("llm", context_chars=len(current_context)) as llm_span:
+                    if is_tracing():
+                        llm_span.set(context_tokens=budgeter.count(current_context))
+                    agent_decision: AgentDecisionSchema = main_agent.run(agent_input)
+                    if is_tracing():
+                        llm_span.set(decision_tokens=budgeter.count(agent_decision.model_dump_json()))
+                iteration_span.set(action=agent_decision.action)
+                logger.info(f"Agent Action Decision: {agent_decision.action}")
+                logger.debug(f"Agent Thought Process: {agent_decision.thought}")
+            except Exception as e:
+                logger.error(f"Agent execution failed on iteration {iteration_num}: {e}", exc_info=True)
+                final_response = f"Error: The agent failed to make a decision during iteration {iteration_num}. Details: {e}"
+                break  # Exit loop on agent failure
+
+            # 6. Process Agent Decision
+            try:
+                if agent_decision.action == 'final_answer':
+                    if agent_decision.final_answer is not None and agent_decision.final_answer.strip():
+                        logger.info("Agent decided on final answer.")
+                        final_response = agent_decision.final_answer
+                        break
+                    else:
+                        logger.warning("Agent action was 'final_answer' but no answer text was provided.")
+                        current_context = "Agent failed to provide a final answer despite choosing the action. Please reassess the situation based on previous context and the original query."
+                        last_tool_output_formatted = current_context
+
+                elif agent_decision.action in TOOL_INPUT_SCHEMAS:
+                    last_tool_output_formatted = execute_tool_call(agent_decision.action,
+                                                                   agent_decision.tool_parameters, tools, budgeter)
                     current_context = last_tool_output_formatted
                     logger.debug(f"Tool output (formatted, first 500 chars):\n{current_context[:500]}...")
-                elif agent_decision.tool_parameters:
-                    logger.warning(
-                        f"Agent requested 'call_vector_db' but parameters were wrong type: {type(agent_decision.tool_parameters)}")
-                    current_context = f"Agent provided incorrect parameter type for 'call_vector_db'. Expected VectorDBToolInputSchema, got {type(agent_decision.tool_parameters)}. Please reassess."
-                    last_tool_output_formatted = current_context
-                else:
-                    logger.warning("Agent chose action 'call_vector_db' but provided no tool parameters.")
-                    current_context = "Agent action was 'call_vector_db' but tool parameters were missing. Please reassess the situation based on previous context and the original query."
-                    last_tool_output_formatted = current_context
-
-            elif agent_decision.action == 'call_relational_db':
-                if agent_decision.tool_parameters and isinstance(agent_decision.tool_parameters,
-                                                                 RelationalDBToolInputSchema):
-                    logger.info("Agent requests tool call: relational_db")
-                    logger.debug(f"Tool parameters: {agent_decision.tool_parameters}")
-                    # --- Directly call the tool's run method ---
-                    tool_output_obj: RelationalDBToolOutputSchema = relational_db_tool.run(
-                        agent_decision.tool_parameters)
-                    last_tool_output_formatted = format_tool_output_for_llm(tool_output_obj)
-                    current_context = last_tool_output_formatted
-                    logger.debug(f"Tool output (formatted, first 500 chars):\n{current_context[:500]}...")
-                elif agent_decision.tool_parameters:
-                    logger.warning(
-                        f"Agent requested 'call_relational_db' but parameters were wrong type: {type(agent_decision.tool_parameters)}")
-                    current_context = f"Agent provided incorrect parameter type for 'call_relational_db'. Expected RelationalDBToolInputSchema, got {type(agent_decision.tool_parameters)}. Please reassess."
-                    last_tool_output_formatted = current_context
-                else:
-                    logger.warning("Agent chose action 'call_relational_db' but provided no tool parameters.")
-                    current_context = "Agent action was 'call_relational_db' but tool parameters were missing. Please reassess the situation based on previous context and the original query."
-                    last_tool_output_formatted = current_context
-            elif agent_decision.action == 'call_graph_db':
-                if agent_decision.tool_parameters and isinstance(agent_decision.tool_parameters,
-                                                                 GraphDBToolInputSchema):
-                    logger.info("Agent requests tool call: graph_db")
-                    logger.debug(f"Tool parameters: {agent_decision.tool_parameters}")
-                    # --- Directly call the tool's run method ---
-                    tool_output_obj: GraphDBToolOutputSchema = graph_db_tool.run(agent_decision.tool_parameters)
-                    last_tool_output_formatted = format_tool_output_for_llm(tool_output_obj)
+
+                elif agent_decision.action == 'call_tools':
+                    if agent_decision.tool_calls:
+                        logger.info(f"Agent requests {len(agent_decision.tool_calls)} concurrent tool calls")
+                        last_tool_output_formatted = execute_tool_calls(agent_decision.tool_calls, tools, budgeter)
+                    else:
+                        logger.warning("Agent chose action 'call_tools' but provided no tool calls.")
+                        last_tool_output_formatted = "Agent action was 'call_tools' but tool calls were missing. Please reassess the situation based on previous context and the original query."
                     current_context = last_tool_output_formatted
                     logger.debug(f"Tool output (formatted, first 500 chars):\n{current_context[:500]}...")
-                elif agent_decision.tool_parameters:
-                    logger.warning(
-                        f"Agent requested 'call_graph_db' but parameters were wrong type: {type(agent_decision.tool_parameters)}")
-                    current_context = f"Agent provided incorrect parameter type for 'call_graph_db'. Expected GraphDBToolInputSchema, got {type(agent_decision.tool_parameters)}. Please reassess."
-                    last_tool_output_formatted = current_context
+
                 else:
-                    logger.warning("Agent chose action 'call_graph_db' but provided no tool parameters.")
-                    current_context = "Agent action was 'call_graph_db' but tool parameters were missing. Please reassess the situation based on previous context and the original query."
-                    last_tool_output_formatted = current_context
-            else:
-                logger.error(f"Unknown or invalid agent action received: {agent_decision.action}")
-                final_response = f"Error: Agent returned an invalid action '{agent_decision.action}'."
-                break
+                    logger.error(f"Unknown or invalid agent action received: {agent_decision.action}")
+                    final_response = f"Error: Agent returned an invalid action '{agent_decision.action}'."
+                    break
 
-        except Exception as e:
-            # Catch errors during tool execution or formatting step
-            tool_name = agent_decision.action if agent_decision.action.startswith('call_') else 'processing'
-            logger.error(f"Error during {tool_name} execution/formatting on iteration {iteration_num}: {e}",
-                         exc_info=True)
-            # Provide error info back to the agent for the next turn
-            current_context = f"Error encountered during the last action ({tool_name}): {e}. Please analyze this error and the previous state to decide the next step."
-            last_tool_output_formatted = current_context
-            # Allow loop to continue so agent can potentially react to the error
+            except Exception as e:
+                # Catch errors during tool execution or formatting step
+                tool_name = agent_decision.action if agent_decision.action.startswith('call_') else 'processing'
+                logger.error(f"Error during {tool_name} execution/formatting on iteration {iteration_num}: {e}",
+                             exc_info=True)
+                # Provide error info back to the agent for the next turn
+                current_context = f"Error encountered during the last action ({tool_name}): {e}. Please analyze this error and the previous state to decide the next step."
+                last_tool_output_formatted = current_context
+                # Allow loop to continue so agent can potentially react to the error
 
     # --- After Loop ---
     if final_response:
@@ -210,15 +265,41 @@ def run_agent_workflow(user_query: str, main_agent: BaseAgent, vector_db_tool: V
 
 
 SQLITE_SCHEMA = """
-CREATE TABLE IF NOT EXISTS lines (
-    id INTEGER PRIMARY KEY,
-    line_id TEXT UNIQUE,
-    parent_type TEXT, -- fully qualified type name - if the line belongs to class
-    parent_method TEXT, -- method name - if the line belongs to method
-    file_line_no INTEGER, -- file line number in the file
+CREATE TABLE files (
+    file_id INTEGER PRIMARY KEY,
+    file_path TEXT UNIQUE, -- file path relative to project directory
+    line_count INTEGER,
+    created_at TEXT
+);
+CREATE TABLE types (
+    type_id INTEGER PRIMARY KEY,
+    file_id INTEGER, -- file declaring the type
+    name TEXT, -- fully qualified type name
+    start_line INTEGER, -- first line of the type in the file
+    end_line INTEGER -- last line of the type in the file
+);
+CREATE TABLE methods (
+    method_id INTEGER PRIMARY KEY,
+    file_id INTEGER, -- file declaring the method
+    type_id INTEGER, -- type declaring the method
+    name TEXT, -- method name
+    start_line INTEGER, -- first line of the method in the file
+    end_line INTEGER -- last line of the method in the file
+);
+CREATE TABLE line_text (
+    file_id INTEGER,
+    line_no INTEGER, -- file line number in the file
+    source TEXT, -- source code of the line
+    PRIMARY KEY (file_id, line_no)
+);
+-- Every line with the type and method it belongs to. Filter it on file_path or parent_type
+-- (with parent_method); for the lines of a method, join methods with line_text by line range
+CREATE VIEW lines (
     file_path TEXT, -- file path relative to project directory
+    file_line_no INTEGER, -- file line number in the file
     source TEXT, -- source code of the line
-    created_at TEXT
+    parent_type TEXT, -- fully qualified type name - if the line belongs to class
+    parent_method TEXT -- method name - if the line belongs to method
 );
 """
 
@@ -266,10 +347,10 @@ Examples:
 
 
 
-def run(query: str, sqlite_client, qdrant_client):
-    orchestrator_agent = BaseAgent(
+def create_orchestrator_agent() -> BaseAgent:
+    return BaseAgent(
         BaseAgentConfig(
-            client=instructor.from_openai(openai.OpenAI()),
+            client=instructor.from_openai(get_openai_client(OPENAI_QUERY_RETRIES)),
             model="gpt-4o-mini",
             system_prompt_generator=SystemPromptGenerator(
                 background=[
@@ -279,6 +360,7 @@ def run(query: str, sqlite_client, qdrant_client):
                     "First, reason step-by-step what is required to answer the query.",
                     "If confident, choose final_answer and provide the answer.",
                     "If unsure or if additional information is needed, choose one of the following actions: call_vector_db, call_relational_db, call_graph_db.",
+                    "If several independent lookups are needed, choose call_tools and list them all in tool_calls, they run concurrently and their results come back together.",
                     "Use call_relational_db for SQL style structured metadata queries. The database schema is:\n" + SQLITE_SCHEMA,
                     "Use call_vector_db when semantic search across code snippets is needed. Output format:\n" + QDRANT_SCHEMA,
                     "Use call_graph_db for static analysis graph queries. These should use Joern CPG queries in the format:\n" + JOERN_SCHEMA,
@@ -290,6 +372,34 @@ def run(query: str, sqlite_client, qdrant_client):
         )
     )
 
+
+def run(query: Optional[str], sqlite_client=None, qdrant_client=None, use_cache: bool = AGENT_CACHE_ENABLED,
+        record_path: Optional[Path] = None, replay_path: Optional[Path] = None, tracer: Optional[Tracer] = None,
+        trace_path: Optional[Path] = None):
+    """
+    Answers query with the orchestrator agent. Without a sqlite_client, relational tool calls use
+    the read-only connection of the thread running them, so concurrent tool calls never share one.
+
+    Decisions are taken from the decision cache while the indexes are unchanged, unless use_cache
+    is off. record_path saves the session's decisions, replay_path runs a saved session again
+    without calling the LLM, its recorded query being used when query is None.
+
+    The iterations, LLM decisions, tool calls, embeddings and database queries are traced into
+    tracer, a new one when only trace_path is given, and the trace is exported to trace_path.
+    """
+    if tracer is None and trace_path is not None:
+        tracer = Tracer()
+    qdrant_client = qdrant_client or get_qdrant_client()
+    if replay_path is not None:
+        session = load_session(replay_path)
+        query = query or session["query"]
+        orchestrator_agent = ReplayAgent(session["decisions"], load_decision)
+    else:
+        orchestrator_agent = create_orchestrator_agent()
+        if use_cache or record_path is not None:
+            orchestrator_agent = CachedAgent(orchestrator_agent, get_decision_cache() if use_cache else None,
+                                             load_decision)
+
     vector_tool_cfg = VectorDBToolConfig(
         qdrant_client=qdrant_client,
         collection_name=QDRANT_COLLECTION,
@@ -307,6 +417,13 @@ def run(query: str, sqlite_client, qdrant_client):
     graph_db_tool = GraphDBTool(graph_db_tool_cfg)
 
     logger.info("Tools configured, running the main workflow...")
-    final_result = run_agent_workflow(query, orchestrator_agent, vector_db_tool, relational_db_tool, graph_db_tool)
+    with activate(tracer), trace_span("agent", query_chars=len(query), replay=replay_path is not None):
+        final_result = run_agent_workflow(query, orchestrator_agent, vector_db_tool, relational_db_tool,
+                                          graph_db_tool)
+    if trace_path is not None:
+        tracer.export(trace_path)
+    if record_path is not None:
+        save_session(record_path, query, orchestrator_agent.decisions)
+        logger.info(f"Recorded {len(orchestrator_agent.decisions)} decisions to {record_path}")
     return final_result
 
@@ -0,0 +1,105 @@
+import logging
+
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from atlas.config import AGENT_CONTEXT_TOKENS, AGENT_MAX_SQL_ROWS
+from atlas.utils import get_encoder
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_key(payload: Dict) -> Tuple:
+    return payload.get("file_path"), payload.get("start_line"), payload.get("end_line"), payload.get("chunk_no")
+
+
+class ContextBudgeter:
+    """
+    Assembles the tool outputs passed to the agent within a token budget per reasoning step.
+    The agent keeps every step in its history, so code chunks it was already shown in full are
+    only referenced again. SQL results are cut to their first rows plus a summary of the rest, and
+    sections still over the budget are truncated, the largest first.
+    """
+
+    def __init__(self, budget: int = AGENT_CONTEXT_TOKENS, max_rows: int = AGENT_MAX_SQL_ROWS, encoder=None):
+        self.budget = budget
+        self.max_rows = max_rows
+        self._encoder = encoder
+        self._seen_chunks: Set[Tuple] = set()
+        # Chunks formatted for the current step, seen once fit() kept them in full
+        self._pending_chunks: Dict[Tuple, str] = {}
+
+    @property
+    def encoder(self):
+        return self._encoder or get_encoder()
+
+    def count(self, text: str) -> int:
+        return len(self.encoder.encode(text))
+
+    def format_chunks(self, payloads: List) -> str:
+        """Formats the payloads of a vector search, referencing the chunks already shown."""
+        parts = []
+        for payload in payloads:
+            if not isinstance(payload, dict):
+                parts.append(str(payload))
+                continue
+            header = (f"{payload.get('type')} {payload.get('name')} in {payload.get('file_path')} "
+                      f"lines {payload.get('start_line')}-{payload.get('end_line')}")
+            key = _chunk_key(payload)
+            if key in self._seen_chunks:
+                parts.append(f"{header} (already shown in an earlier step)")
+            elif key in self._pending_chunks:
+                parts.append(f"{header} (shown above)")
+            else:
+                part = f"{header}:\n{payload.get('source', '')}"
+                self._pending_chunks[key] = part
+                parts.append(part)
+        return "\n---\n".join(parts)
+
+    def format_rows(self, rows: List) -> str:
+        """Formats the first max_rows rows of a SQL result and summarizes the others."""
+        lines = [str(row) for row in rows[:self.max_rows]]
+        rest = rows[self.max_rows:]
+        if rest:
+            summary = f"... {len(rest)} more rows not shown ({len(rows)} in total)"
+            if isinstance(rest[0], dict):
+                distinct = ", ".join(
+                    f"{column}: {len(Counter(row.get(column) for row in rest))}" for column in rest[0]
+                )
+                summary += f", distinct values per column among them: {distinct}"
+            lines.append(summary + ". Narrow the query or aggregate to see more.")
+        return "\n".join(lines)
+
+    def truncate(self, text: str, tokens: int) -> str:
+        encoded = self.encoder.encode(text)
+        if len(encoded) <= tokens:
+            return text
+        # The note is measured with the total size, it is never longer than with what is cut
+        keep = max(tokens - self.count(f"\n[... {len(encoded)} more tokens truncated]"), 0)
+        return self.encoder.decode(encoded[:keep]) + f"\n[... {len(encoded) - keep} more tokens truncated]"
+
+    def fit(self, sections: List[str]) -> str:
+        """
+        Joins the sections of a step within the budget. Sections share the budget evenly, the
+        ones needing less than their share leave the remainder to the others. Chunks formatted
+        for the step count as shown only if they were not truncated.
+        """
+        sizes = [self.count(section) for section in sections]
+        if sum(sizes) <= self.budget:
+            self._seen_chunks.update(self._pending_chunks)
+            self._pending_chunks = {}
+            return "\n\n".join(sections)
+
+        limits = {}
+        remaining = self.budget
+        for position, index in enumerate(sorted(range(len(sections)), key=sizes.__getitem__)):
+            limits[index] = min(sizes[index], remaining // (len(sections) - position))
+            remaining -= limits[index]
+        logger.info(f"Tool output of {sum(sizes)} tokens truncated to the budget of {self.budget} tokens")
+        text = "\n\n".join(
+            section if limits[index] == sizes[index] else self.truncate(section, limits[index])
+            for index, section in enumerate(sections)
+        )
+        self._seen_chunks.update(key for key, part in self._pending_chunks.items() if part in text)
+        self._pending_chunks = {}
+        return text
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from atlas.clients import get_client
+from atlas.config import AGENT_CACHE_PATH, DB_VERSION_PATH, QDRANT_VERSION_PATH
+from atlas.qdrant.search_cache import collection_version
+from atlas.sqlite.utils import database_version
+from atlas.tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+DECISION_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    key TEXT PRIMARY KEY,          -- sha256 of model, system prompt, history and input of the agent
+    index_version TEXT NOT NULL,   -- versions of the indexes the decision was made over
+    decision TEXT NOT NULL,        -- JSON of the agent's output
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def index_version(db_version_path: Path = DB_VERSION_PATH, qdrant_version_path: Path = QDRANT_VERSION_PATH) -> str:
+    """Versions of the indexes read by the agent's tools: the Qdrant collection and the SQLite database."""
+    return f"{collection_version(qdrant_version_path)}|{database_version(db_version_path)}"
+
+
+class DecisionCache:
+    """
+    Persistent cache of agent decisions. Entries made over other index versions are deleted the
+    first time a version is used. Thread-safe.
+    """
+
+    def __init__(self, path: Path = AGENT_CACHE_PATH):
+        self.hits = 0
+        self.misses = 0
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(DECISION_CACHE_SCHEMA)
+
+    def _prune(self, version: str):
+        if version != self._version:
+            deleted = self.conn.execute("DELETE FROM decisions WHERE index_version != ?", (version,)).rowcount
+            self.conn.commit()
+            if deleted:
+                logger.info(f"Dropped {deleted} agent decisions made over other index versions")
+            self._version = version
+
+    def get(self, key: str, version: str) -> Optional[str]:
+        with self._lock:
+            self._prune(version)
+            row = self.conn.execute(
+                "SELECT decision FROM decisions WHERE key = ? AND index_version = ?", (key, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, version: str, decision: str):
+        with self._lock:
+            self._prune(version)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO decisions (key, index_version, decision, created_at) VALUES (?, ?, ?, ?)",
+                (key, version, decision, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def get_decision_cache() -> DecisionCache:
+    """The decision cache of the project, shared by all threads."""
+    return get_client("decision_cache", DecisionCache)
+
+
+class CachedAgent:
+    """
+    Wraps a BaseAgent, answering inputs it already decided on in the same conversation from the
+    cache. Cached decisions are added to the agent's memory like its own, so a later miss sends
+    the LLM the same history. Every decision is recorded for save_session(), without a cache
+    the agent is only recorded.
+    """
+
+    def __init__(self, agent, cache: Optional[DecisionCache], decode: Callable[[str], Any], version: str = None):
+        self.agent = agent
+        self.cache = cache
+        self.decode = decode
+        self.version = index_version() if version is None else version
+        self.decisions: List[str] = []
+        self._prompt_hash = hashlib.sha256(agent.system_prompt_generator.generate_prompt().encode("utf-8")).hexdigest()
+
+    def key(self, agent_input) -> str:
+        history = json.dumps(self.agent.memory.get_history(), sort_keys=True, default=str)
+        payload = json.dumps([self.agent.model, self._prompt_hash, history, agent_input.model_dump_json()])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def run(self, agent_input):
+        key = self.key(agent_input) if self.cache is not None else None
+        data = self.cache.get(key, self.version) if key is not None else None
+        current_span().set(cached=data is not None)
+        if data is None:
+            decision = self.agent.run(agent_input)
+            data = decision.model_dump_json()
+            if key is not None:
+                self.cache.put(key, self.version, data)
+        else:
+            logger.info("Agent decision taken from the cache")
+            decision = self.decode(data)
+            self.agent.memory.initialize_turn()
+            self.agent.current_user_input = agent_input
+            self.agent.memory.add_message("user", agent_input)
+            self.agent.memory.add_message("assistant", decision)
+        self.decisions.append(data)
+        return decision
+
+
+class ReplayAgent:
+    """Answers with the decisions of a recorded session in their order, without calling the LLM."""
+
+    def __init__(self, decisions: List[str], decode: Callable[[str], Any]):
+        self.decisions = list(decisions)
+        self.decode = decode
+        self.position = 0
+
+    def run(self, agent_input):
+        if self.position == len(self.decisions):
+            raise RuntimeError(f"The recorded session has only {len(self.decisions)} decisions")
+        self.position += 1
+        return self.decode(self.decisions[self.position - 1])
+
+
+def save_session(path: Path, query: str, decisions: List[str]):
+    """Records the decisions of a session for replay."""
+    session = {
+        "query": query,
+        "index_version": index_version(),
+        "decisions": [json.loads(decision) for decision in decisions],
+    }
+    path.write_text(json.dumps(session, indent=2), encoding="utf-8")
+
+
+def load_session(path: Path) -> Dict[str, Any]:
+    """Reads a recorded session, its decisions as the JSON strings ReplayAgent decodes."""
+    session = json.loads(path.read_text(encoding="utf-8"))
+    if session["index_version"] != index_version():
+        logger.warning(f"Session {path} was recorded over other indexes, tool outputs may differ")
+    session["decisions"] = [json.dumps(decision) for decision in session["decisions"]]
+    return session
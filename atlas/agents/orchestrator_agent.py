@@ -1,6 +1,6 @@
 import logging
 
-from typing import Union, Optional, Literal
+from typing import List, Union, Optional, Literal
 from pydantic import Field
 
 from atomic_agents.lib.base.base_io_schema import BaseIOSchema
@@ -21,13 +21,26 @@ class ReasoningInputSchema(BaseIOSchema):
     iteration: int = Field(1, description="Current iteration number.")
 
 
+class ToolCallSchema(BaseIOSchema):
+    """A single tool call of a 'call_tools' action."""
+    tool: Literal['call_vector_db', 'call_relational_db', 'call_graph_db'] = Field(
+        ...,
+        description="The tool to call."
+    )
+    tool_parameters: Union[
+        RelationalDBToolInputSchema,
+        VectorDBToolInputSchema,
+        GraphDBToolInputSchema
+    ] = Field(..., description="Parameters of the tool call.")
+
+
 class AgentDecisionSchema(BaseIOSchema):
     """Combined output schema for the Orchestrator Agent. Contains the tool to use and its parameters."""
     thought: str = Field(
         ...,
         description="Your step-by-step reasoning based on the query and context to decide the next action."
     )
-    action: Literal['final_answer', 'call_vector_db', 'call_relational_db', 'call_graph_db'] = Field(
+    action: Literal['final_answer', 'call_vector_db', 'call_relational_db', 'call_graph_db', 'call_tools'] = Field(
         ...,
         description="The action to take next."
     )
@@ -39,9 +52,43 @@ class AgentDecisionSchema(BaseIOSchema):
         None,
         description="Parameters if action is 'call_vector_db', 'call_relational_db' or 'call_graph_db'"
     )
+    tool_calls: Optional[List[ToolCallSchema]] = Field(
+        None,
+        description="Independent tool calls if action is 'call_tools', they run concurrently"
+    )
     final_answer: Optional[str] = Field(None, description="The final answer if action is 'final_answer'")
 
 
+# Input schema of the tool called by every single-tool action
+TOOL_INPUT_SCHEMAS = {
+    'call_vector_db': VectorDBToolInputSchema,
+    'call_relational_db': RelationalDBToolInputSchema,
+    'call_graph_db': GraphDBToolInputSchema,
+}
+
+
+def as_tool_input(tool: str, parameters):
+    """
+    The parameters as the input schema of the tool. The tool input schemas share their fields, so
+    parameters parsed from JSON may have the type of another tool; they are validated again with
+    the schema of the tool they are meant for. Raises a ValidationError if they do not fit it.
+    """
+    schema = TOOL_INPUT_SCHEMAS[tool]
+    if parameters is None or isinstance(parameters, schema):
+        return parameters
+    return schema.model_validate(parameters.model_dump())
+
+
+def load_decision(data: str) -> AgentDecisionSchema:
+    """Parses a decision serialized with model_dump_json(), typing the parameters by their tool."""
+    decision = AgentDecisionSchema.model_validate_json(data)
+    if decision.action in TOOL_INPUT_SCHEMAS:
+        decision.tool_parameters = as_tool_input(decision.action, decision.tool_parameters)
+    for tool_call in decision.tool_calls or []:
+        tool_call.tool_parameters = as_tool_input(tool_call.tool, tool_call.tool_parameters)
+    return decision
+
+
 class OrchestratorAgentConfig(BaseAgentConfig):
     """Configuration for the Orchestrator Agent."""
     vector_db_config: VectorDBToolConfig
@@ -1,10 +1,15 @@
 import sqlite3
 import logging
 
+from typing import Optional
+
 from pydantic import Field
 from atomic_agents.lib.base.base_tool import BaseTool, BaseToolConfig
 from atomic_agents.agents.base_agent import BaseIOSchema
 
+from atlas.sqlite.utils import get_read_connection
+from atlas.tracing import trace_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +32,9 @@ class RelationalDBToolConfig(BaseToolConfig):
     """
     Configuration for RelationalDBToolConfig.
     """
-    conn: sqlite3.Connection = Field(..., description="Sqlite connection.")
+    conn: Optional[sqlite3.Connection] = Field(
+        None, description="Sqlite connection, the read-only connection of the calling thread if not set."
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -47,11 +54,13 @@ class RelationalDBTool(BaseTool):
     def run(self, params: RelationalDBToolInputSchema) -> RelationalDBToolOutputSchema:
         try:
             logger.info(f"Execution of SQlite query was requested: {params.query}")
-            cursor = self.conn.cursor()
-            cursor.execute(params.query)
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
-            cursor.close()
+            with trace_span("sqlite.query", sql_chars=len(params.query)) as span:
+                cursor = (self.conn or get_read_connection()).cursor()
+                cursor.execute(params.query)
+                columns = [desc[0] for desc in cursor.description]
+                rows = cursor.fetchall()
+                cursor.close()
+                span.set(rows=len(rows))
             hits = [dict(zip(columns, row)) for row in rows]
             return RelationalDBToolOutputSchema(rows=hits, error='')
         except Exception as e:
@@ -1,4 +1,3 @@
-import openai
 import logging
 
 from pydantic import Field
@@ -6,6 +5,9 @@ from qdrant_client import QdrantClient
 from atomic_agents.lib.base.base_tool import BaseTool, BaseToolConfig
 from atomic_agents.agents.base_agent import BaseIOSchema
 
+from atlas.config import EMBED_PROVIDER
+from atlas.qdrant.hybrid_search import hybrid_search
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,7 +17,7 @@ class VectorDBToolConfig(BaseToolConfig):
     """
     qdrant_client: QdrantClient = Field(..., description="Instance of QdrantClient.")
     collection_name: str = Field(..., description="Name of the Qdrant collection.")
-    embedding_model: str = Field(..., description="Name of the OpenAI embedding model.")
+    embedding_model: str = Field(..., description="Name of the embedding model of the configured provider.")
 
     class Config:
         arbitrary_types_allowed = True
@@ -39,7 +41,8 @@ class VectorDBToolOutputSchema(BaseIOSchema):
 
 class VectorDBTool(BaseTool):
     """
-    Search Qdrant vector database for relevant code chunks.
+    Search Qdrant vector database for relevant code chunks, fused with a lexical search of their
+    names and sources.
     """
     input_schema = VectorDBToolInputSchema
     output_schema = VectorDBToolOutputSchema
@@ -53,23 +56,10 @@ class VectorDBTool(BaseTool):
     def run(self, params: VectorDBToolInputSchema) -> VectorDBToolOutputSchema:
         try:
             logger.info(f"Execution of Vector query was requested: {params.query}")
-            embedding = openai.embeddings.create(
-                input=params.query,
-                model=self.embedding_model
-            ).data[0].embedding
-        except Exception as e:
-            logger.error(f"Failed to get embedding from OpenAI: {e}", exc_info=True)
-            return VectorDBToolOutputSchema(results=[], error=f"Retrieving OpenAI embedding failed: {e}")
-
-        try:
-            results = self.qdrant_client.query_points(
-                collection_name=self.collection_name,
-                query=embedding,
-                limit=params.top_k
-            )
-            hits = [hit.payload for hit in results.points]
-            return VectorDBToolOutputSchema(results=hits, error='')
+            hits = hybrid_search(params.query, params.top_k, self.qdrant_client, self.collection_name,
+                                 EMBED_PROVIDER, self.embedding_model)
+            return VectorDBToolOutputSchema(results=[hit.payload for hit in hits], error='')
         except Exception as e:
-            logger.error(f"Qdrant search failed: {e}", exc_info=True)
+            logger.error(f"Vector search failed: {e}", exc_info=True)
             return VectorDBToolOutputSchema(results=[], error=f"Vector DB query failed: {e}")
 
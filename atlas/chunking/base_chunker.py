@@ -1,6 +1,12 @@
+import hashlib
+import uuid
+
 from pathlib import Path
 from typing import List, Optional, Dict
 
+# Namespace for deterministic chunk ids, so the same span of the same file always maps to the same id
+CHUNK_ID_NAMESPACE = uuid.UUID("5b0f4bb4-3c8e-4f1e-9d0a-6c2f1f0a7e13")
+
 
 class CodeChunk:
     def __init__(
@@ -21,6 +27,15 @@ class CodeChunk:
         self.source = source
         self.file_path = file_path
 
+    @property
+    def chunk_id(self) -> str:
+        key = f"{self.file_path}:{self.chunk_type}:{self.name}:{self.chunk_no}:{self.start_line}:{self.end_line}"
+        return str(uuid.uuid5(CHUNK_ID_NAMESPACE, key))
+
+    @property
+    def source_hash(self) -> str:
+        return hashlib.sha256(self.source.encode("utf-8")).hexdigest()
+
     def to_dict(self) -> Dict:
         return {
             "type": self.chunk_type,
@@ -40,3 +55,7 @@ class BaseChunker:
     def extract_chunks_from_file(self, file_path: Path) -> List[CodeChunk]:
         raise NotImplementedError
 
+    def extract_chunks_from_tree(self, root_node, lines: List[str], relative_file_path: Path) -> List[CodeChunk]:
+        """Chunks a file already parsed by a line extractor, see atlas.index_pipeline."""
+        raise NotImplementedError
+
@@ -0,0 +1,115 @@
+import logging
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from atlas.chunking.base_chunker import BaseChunker, CodeChunk
+from atlas.chunking.chunk_dispatcher import get_chunker
+from atlas.config import CHUNK_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Chunkers are cached per process, so every worker builds its own tree-sitter Parser once
+_chunkers: Dict[Tuple[str, Path], BaseChunker] = {}
+
+
+@dataclass(slots=True)
+class FileChunkResult:
+    file_path: Path
+    chunks: List[CodeChunk] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def get_cached_chunker(file_path: Path, project_root: Path) -> BaseChunker:
+    key = (file_path.suffix.lower(), project_root)
+    chunker = _chunkers.get(key)
+    if chunker is None:
+        chunker = get_chunker(file_path, project_root)
+        _chunkers[key] = chunker
+    return chunker
+
+
+def chunk_file(file_path: Path, project_root: Path) -> FileChunkResult:
+    """Chunks a single file, capturing any failure in the result instead of raising."""
+    try:
+        chunker = get_cached_chunker(file_path, project_root)
+        return FileChunkResult(file_path, chunker.extract_chunks_from_file(file_path))
+    except Exception:
+        return FileChunkResult(file_path, [], traceback.format_exc())
+
+
+def _iter_serial(process_file: Callable[[Path, Path], R], files: Iterable[Path], project_root: Path) -> Iterator[R]:
+    for file_path in files:
+        yield process_file(file_path, project_root)
+
+
+def _iter_parallel(
+        process_file: Callable[[Path, Path], R],
+        files: Iterable[Path],
+        project_root: Path,
+        workers: int,
+) -> Iterator[R]:
+    # Keep a bounded number of files in flight, so huge trees do not queue up all at once
+    max_pending = workers * 4
+    files = iter(files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < max_pending:
+                file_path = next(files, None)
+                if file_path is None:
+                    exhausted = True
+                    break
+                pending.add(executor.submit(process_file, file_path, project_root))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def process_files(
+        process_file: Callable[[Path, Path], R],
+        files: Iterable[Path],
+        project_root: Path,
+        workers: int = 1,
+        batch_size: int = CHUNK_BATCH_SIZE,
+) -> Iterator[List[R]]:
+    """
+    Runs process_file(file_path, project_root) over the files, either in-process (workers <= 1)
+    or over a process pool, yielding the per-file results in batches of roughly batch_size chunks.
+    process_file must be a module-level function that never raises, and its results need a
+    `chunks` list.
+    """
+    if workers > 1:
+        results = _iter_parallel(process_file, files, project_root, workers)
+    else:
+        results = _iter_serial(process_file, files, project_root)
+
+    batch: List[R] = []
+    chunk_count = 0
+    for result in results:
+        batch.append(result)
+        chunk_count += len(result.chunks)
+        if chunk_count >= batch_size:
+            yield batch
+            batch = []
+            chunk_count = 0
+    if batch:
+        yield batch
+
+
+def chunk_files(
+        files: Iterable[Path],
+        project_root: Path,
+        workers: int = 1,
+        batch_size: int = CHUNK_BATCH_SIZE,
+) -> Iterator[List[FileChunkResult]]:
+    """Chunks files, yielding per-file results in batches of roughly batch_size chunks."""
+    return process_files(chunk_file, files, project_root, workers, batch_size)
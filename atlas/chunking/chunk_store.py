@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.config import CHUNK_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    seq INTEGER PRIMARY KEY,      -- insertion order, scans page through it sequentially
+    chunk_id TEXT NOT NULL UNIQUE,
+    type TEXT,
+    name TEXT,
+    chunk_no INTEGER,
+    start_line INTEGER,
+    end_line INTEGER,
+    file_path TEXT,
+    source TEXT,
+    source_hash TEXT,
+    errors TEXT                   -- JSON list of errors, NULL for valid chunks
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_file_path ON chunks(file_path);
+CREATE TABLE IF NOT EXISTS qdrant_points (  -- checkpoint of the points upserted into Qdrant
+    chunk_id TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lexical_chunks (  -- text of the chunks loaded into Qdrant, indexed by chunk_fts
+    id INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    name TEXT,                    -- name followed by the words of its identifiers, see lexical_name()
+    source TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(name, source, content='lexical_chunks', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS lexical_chunks_insert AFTER INSERT ON lexical_chunks BEGIN
+    INSERT INTO chunk_fts (rowid, name, source) VALUES (new.id, new.name, new.source);
+END;
+CREATE TRIGGER IF NOT EXISTS lexical_chunks_delete AFTER DELETE ON lexical_chunks BEGIN
+    INSERT INTO chunk_fts (chunk_fts, rowid, name, source) VALUES ('delete', old.id, old.name, old.source);
+END;
+"""
+
+# BM25 weights of the name and source columns of chunk_fts
+LEXICAL_SEARCH_QUERY = """
+SELECT l.chunk_id, bm25(chunk_fts, 10.0, 1.0) AS rank
+FROM chunk_fts JOIN lexical_chunks l ON l.id = chunk_fts.rowid
+WHERE chunk_fts MATCH ?
+ORDER BY rank
+LIMIT ?
+"""
+
+_IDENTIFIER_WORDS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_QUERY_TERMS = re.compile(r"\w+")
+
+_COLUMNS = ("chunk_id", "type", "name", "chunk_no", "start_line", "end_line", "file_path", "source", "source_hash")
+
+
+def lexical_name(name: Optional[str]) -> str:
+    """A chunk name followed by the words of its identifiers, 'applyDiscount' also matches 'apply discount'."""
+    if not name:
+        return ""
+    return f"{name} {' '.join(_IDENTIFIER_WORDS.findall(name))}"
+
+
+def fts_query(query: str, max_terms: int = 32) -> Optional[str]:
+    """FTS5 expression matching any term of a free text query, None if it has no terms."""
+    terms = list(dict.fromkeys(_QUERY_TERMS.findall(query)))[:max_terms]
+    return " OR ".join(f'"{term}"' for term in terms) if terms else None
+
+
+def prepare_chunk_store(conn: sqlite3.Connection):
+    conn.executescript(CHUNK_SCHEMA)
+
+
+def search_lexical(conn: sqlite3.Connection, query: str, limit: int) -> List[Tuple[str, float]]:
+    """(chunk_id, BM25 rank) of the loaded chunks best matching the terms of query, best first."""
+    expression = fts_query(query)
+    if expression is None:
+        return []
+    return [(row[0], row[1]) for row in conn.execute(LEXICAL_SEARCH_QUERY, (expression, limit))]
+
+
+def get_payloads(conn: sqlite3.Connection, chunk_ids: List[str]) -> Dict[str, Dict]:
+    """Chunks by id in the layout of the Qdrant payloads."""
+    rows = conn.execute(
+        f"""SELECT chunk_id, type, name, chunk_no, start_line, end_line, file_path, source FROM chunks
+            WHERE chunk_id IN ({", ".join("?" * len(chunk_ids))})""",
+        chunk_ids
+    )
+    return {row[0]: dict(zip(_COLUMNS[1:8], row[1:])) for row in rows}
+
+
+class ChunkStore:
+    """
+    Packed storage for chunks in a single SQLite file. All commands stream through the
+    chunks table in insertion order instead of globbing and parsing one JSON file per chunk.
+    """
+
+    def __init__(self, path: Path = CHUNK_STORE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.create_function("lexical_name", 1, lexical_name, deterministic=True)
+        prepare_chunk_store(self.conn)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(chunks)")}
+        # Stores created before embeddings moved to the EmbeddingStore keep them in a JSON column
+        self.has_legacy_embeddings = "embedding" in columns
+
+    def __enter__(self) -> "ChunkStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def commit(self):
+        self.conn.commit()
+
+    # Writing --------------------------------------------------------------
+    def put_chunks(self, chunks: Iterable[CodeChunk]) -> int:
+        records = []
+        for chunk in chunks:
+            data = chunk.to_dict()
+            data["chunk_id"] = chunk.chunk_id
+            data["source_hash"] = chunk.source_hash
+            records.append(data)
+        return self.put_records(records)
+
+    def put_records(self, records: Iterable[Dict]) -> int:
+        """Inserts or replaces chunk records in the dict layout used by to_dict()."""
+        rows = [
+            tuple(record.get(column) for column in _COLUMNS) + (
+                json.dumps(record["errors"]) if record.get("errors") else None,
+            )
+            for record in records
+        ]
+        self.conn.executemany(
+            f"""INSERT OR REPLACE INTO chunks ({", ".join(_COLUMNS)}, errors)
+                VALUES ({", ".join("?" * (len(_COLUMNS) + 1))})""",
+            rows
+        )
+        return len(rows)
+
+    def delete_chunks(self, chunk_ids: Iterable[str]) -> int:
+        cur = self.conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", ((chunk_id,) for chunk_id in chunk_ids))
+        return cur.rowcount
+
+    def delete_valid_chunks(self) -> Tuple[int, int]:
+        """Removes every chunk without errors, returns (removed, remaining) counts."""
+        removed = self.conn.execute("DELETE FROM chunks WHERE errors IS NULL").rowcount
+        return removed, self.count()
+
+    def add_error(self, chunk_id: str, source: str, error: str):
+        row = self.conn.execute("SELECT errors FROM chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+        errors = json.loads(row["errors"]) if row and row["errors"] else []
+        errors.append({"source": source, "error": error})
+        self.conn.execute("UPDATE chunks SET errors = ? WHERE chunk_id = ?", (json.dumps(errors), chunk_id))
+
+    # Reading --------------------------------------------------------------
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def iter_chunks(
+            self,
+            with_errors: Optional[bool] = None,
+            page_size: int = 1000,
+    ) -> Iterator[Dict]:
+        """
+        Streams chunk records in insertion order. with_errors filters on the presence of errors
+        (None means no filter). Paging by seq keeps the scan stable while callers update the
+        rows they have already received.
+        """
+        conditions = ["seq > ?"]
+        if with_errors is not None:
+            conditions.append("errors IS NOT NULL" if with_errors else "errors IS NULL")
+        columns = ", ".join(("seq",) + _COLUMNS + ("errors",))
+        query = f"SELECT {columns} FROM chunks WHERE {' AND '.join(conditions)} ORDER BY seq LIMIT ?"
+
+        last_seq = 0
+        while True:
+            rows = self.conn.execute(query, (last_seq, page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_record(row)
+            last_seq = rows[-1]["seq"]
+
+    # Qdrant checkpoint -----------------------------------------------------
+    def iter_unloaded_chunks(self, page_size: int = 1000) -> Iterator[Dict]:
+        """Streams valid chunks that are not in Qdrant yet, or were loaded with a different source."""
+        columns = ", ".join(f"c.{column}" for column in ("seq",) + _COLUMNS + ("errors",))
+        query = f"""SELECT {columns} FROM chunks c
+                     LEFT JOIN qdrant_points p ON p.chunk_id = c.chunk_id AND p.source_hash = c.source_hash
+                     WHERE c.seq > ? AND c.errors IS NULL AND p.chunk_id IS NULL
+                     ORDER BY c.seq LIMIT ?"""
+        last_seq = 0
+        while True:
+            rows = self.conn.execute(query, (last_seq, page_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_record(row)
+            last_seq = rows[-1]["seq"]
+
+    def mark_loaded(self, points: Iterable[Tuple[str, str]]):
+        """Records (chunk_id, source_hash) pairs as upserted into Qdrant and indexes their text."""
+        points = list(points)
+        self.conn.executemany("INSERT OR REPLACE INTO qdrant_points (chunk_id, source_hash) VALUES (?, ?)", points)
+        self._forget_lexical(chunk_id for chunk_id, _ in points)
+        self.conn.executemany(
+            """INSERT INTO lexical_chunks (chunk_id, name, source)
+               SELECT chunk_id, lexical_name(name), source FROM chunks WHERE chunk_id = ? AND source_hash = ?""",
+            points
+        )
+
+    def index_loaded_chunks(self) -> int:
+        """Indexes the text of loaded points missing from the lexical index, e.g. loaded by older versions."""
+        return self.conn.execute(
+            """INSERT INTO lexical_chunks (chunk_id, name, source)
+               SELECT c.chunk_id, lexical_name(c.name), c.source FROM qdrant_points p
+               JOIN chunks c ON c.chunk_id = p.chunk_id AND c.source_hash = p.source_hash
+               WHERE NOT EXISTS (SELECT 1 FROM lexical_chunks l WHERE l.chunk_id = p.chunk_id)"""
+        ).rowcount
+
+    def _forget_lexical(self, chunk_ids: Iterable[str]):
+        # Row by row, the delete trigger needs the old text to remove it from chunk_fts
+        self.conn.executemany("DELETE FROM lexical_chunks WHERE chunk_id = ?", ((chunk_id,) for chunk_id in chunk_ids))
+
+    def stale_points(self) -> List[str]:
+        """Ids of loaded points whose chunk was removed or has errors by now."""
+        rows = self.conn.execute(
+            """SELECT p.chunk_id FROM qdrant_points p
+               LEFT JOIN chunks c ON c.chunk_id = p.chunk_id AND c.errors IS NULL
+               WHERE c.chunk_id IS NULL"""
+        )
+        return [row["chunk_id"] for row in rows]
+
+    def forget_points(self, chunk_ids: Iterable[str]):
+        chunk_ids = list(chunk_ids)
+        self.conn.executemany("DELETE FROM qdrant_points WHERE chunk_id = ?", ((chunk_id,) for chunk_id in chunk_ids))
+        self._forget_lexical(chunk_ids)
+
+    def clear_points(self):
+        self.conn.execute("DELETE FROM qdrant_points")
+        self.conn.execute("DELETE FROM lexical_chunks")
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict:
+        record = {column: row[column] for column in _COLUMNS}
+        record["errors"] = json.loads(row["errors"]) if row["errors"] else []
+        return record
+
+    # Migration ------------------------------------------------------------
+    def import_chunk_dir(self, chunk_dir: Path, embedding_store=None, batch_size: int = 1000) -> List[Path]:
+        """
+        Imports the legacy one-JSON-file-per-chunk layout, returns the imported files.
+        Embeddings found in the files are moved to embedding_store when one is given.
+        """
+        imported = []
+        batch = []
+        for chunk_file in chunk_dir.glob("*.json"):
+            with open(chunk_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if "source_hash" not in data:
+                data["source_hash"] = hashlib.sha256(data.get("source", "").encode("utf-8")).hexdigest()
+            if embedding_store is not None and data.get("embedding"):
+                embedding_store.put(data["chunk_id"], data["source_hash"], data["embedding"])
+            batch.append(data)
+            imported.append(chunk_file)
+            if len(batch) >= batch_size:
+                self.put_records(batch)
+                batch = []
+        if batch:
+            self.put_records(batch)
+        self.commit()
+        return imported
+
+    def pop_legacy_embeddings(self) -> Iterator[Tuple[str, str, List[float]]]:
+        """Yields (chunk_id, source_hash, embedding) from the legacy column, then drops it."""
+        if not self.has_legacy_embeddings:
+            return
+        for row in self.conn.execute("SELECT chunk_id, source_hash, embedding FROM chunks WHERE embedding IS NOT NULL"):
+            yield row["chunk_id"], row["source_hash"], json.loads(row["embedding"])
+        self.conn.execute("ALTER TABLE chunks DROP COLUMN embedding")
+        self.conn.commit()
+        self.has_legacy_embeddings = False
@@ -1,65 +1,54 @@
 import logging
-import json
-import os
-from typing import List, Tuple
-import uuid
-import tiktoken
-from atlas.chunking.base_chunker import CodeChunk
-from atlas.config import CHUNK_DIR, MAX_TOKENS
-
-ENCODER = tiktoken.get_encoding("cl100k_base")
-logger = logging.getLogger(__name__)
-
-
-def ensure_chunk_dir():
-    CHUNK_DIR.mkdir(parents=True, exist_ok=True)
-
+from typing import Tuple
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.config import CHUNK_DIR, CHUNK_MANIFEST_PATH, MAX_TOKENS
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.utils import get_encoder
 
-def save_chunks_to_files(chunks: List[CodeChunk]):
-    ensure_chunk_dir()
-    for chunk in chunks:
-        chunk_id = str(uuid.uuid4())
-        data = chunk.to_dict()
-        data["chunk_id"] = chunk_id
-        filename = f"chunk_{chunk_id}.json"
-        path = CHUNK_DIR / filename
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+logger = logging.getLogger(__name__)
 
 
 def cleanup_chunks():
-    ensure_chunk_dir()
-    count = 0
-    errors = 0
-    for chunk_file in CHUNK_DIR.glob("*.json"):
-        with open(chunk_file, "r", encoding="utf-8") as r:
-            data = json.load(r)
-        if 'errors' not in data:
-            try:
-                os.remove(chunk_file)
-                count += 1
-            except Exception as e:
-                logger.info(f"Failed to remove {chunk_file.name}: {e}")
-        else:
-            errors += 1
+    with ChunkStore() as store:
+        count, errors = store.delete_valid_chunks()
 
-    logger.info(f"Removed {count} chunk files in total, leaving {errors} files with error")
+    # Without the chunks the manifest is stale, the next run has to chunk everything again
+    CHUNK_MANIFEST_PATH.unlink(missing_ok=True)
+    logger.info(f"Removed {count} chunks in total, leaving {errors} chunks with error")
 
 
 def display_error_chunks():
-    ensure_chunk_dir()
-    count = 0
-    errors = 0
-    for chunk_file in CHUNK_DIR.glob("*.json"):
-        with open(chunk_file, "r", encoding="utf-8") as r:
-            data = json.load(r)
-        if 'errors' not in data:
-            count += 1
-        else:
-            logger.info(f"Chunk {chunk_file.name} has these errors {data['errors']}")
+    with ChunkStore() as store:
+        errors = 0
+        for data in store.iter_chunks(with_errors=True):
+            logger.info(f"Chunk {data['chunk_id']} has these errors {data['errors']}")
             errors += 1
-
-    logger.info(f"Found {count} correct chunk files, {errors} files have errors")
+        count = store.count() - errors
+
+    logger.info(f"Found {count} correct chunks, {errors} chunks have errors")
+
+
+def migrate_chunk_dir(keep_files: bool = False) -> int:
+    """
+    Moves chunks from the legacy .chunks/*.json layout into the chunk store and their
+    embeddings, including those kept in the chunk store's old JSON column, into the
+    embedding store.
+    """
+    with ChunkStore() as store, EmbeddingStore() as embedding_store:
+        moved = 0
+        for chunk_id, source_hash, embedding in store.pop_legacy_embeddings():
+            embedding_store.put(chunk_id, source_hash, embedding)
+            moved += 1
+        if moved:
+            logger.info(f"Moved {moved} embeddings from the chunk store into the embedding store")
+        if not CHUNK_DIR.exists():
+            return 0
+        imported = store.import_chunk_dir(CHUNK_DIR, embedding_store)
+    if not keep_files:
+        for chunk_file in imported:
+            chunk_file.unlink()
+    logger.info(f"Migrated {len(imported)} chunk files from {CHUNK_DIR.name}/")
+    return len(imported)
 
 
 def classify_chunk_content(source: str) -> Tuple[str, int]:
@@ -82,7 +71,6 @@ def classify_chunk_content(source: str) -> Tuple[str, int]:
     return "normal", len(meaningful_lines)
 
 def validate_chunks():
-    ensure_chunk_dir()
     failed = []
     ok = 0
 
@@ -94,31 +82,26 @@ def validate_chunks():
         "normal": 0
     }
 
-    for chunk_file in CHUNK_DIR.glob("*.json"):
-        with open(chunk_file, "r", encoding="utf-8") as r:
-            data = json.load(r)
-
-        source = data.get("source", "")
-        token_count = len(ENCODER.encode(source))
-
-        # Token limit check
-        if token_count > MAX_TOKENS:
-            logger.info(f"{chunk_file.name} too large: {token_count} tokens")
-            if 'errors' not in data:
-                data['errors'] = []
-            data['errors'].append({
-                'source': 'validation',
-                'error': f"{chunk_file.name} too large: {token_count} tokens while maximum is {MAX_TOKENS}"
-            })
-            with open(chunk_file, "w", encoding="utf-8") as w:
-                w.write(json.dumps(data, indent=2))
-            failed.append((chunk_file, token_count))
-        else:
-            ok += 1
-
-        # Chunk content classification
-        chunk_type, count = classify_chunk_content(source)
-        trivial_counts[chunk_type] += 1
+    with ChunkStore() as store:
+        for data in store.iter_chunks():
+            source = data.get("source", "")
+            token_count = len(get_encoder().encode(source))
+
+            # Token limit check
+            if token_count > MAX_TOKENS:
+                logger.info(f"{data['chunk_id']} too large: {token_count} tokens")
+                store.add_error(
+                    data['chunk_id'],
+                    'validation',
+                    f"{data['chunk_id']} too large: {token_count} tokens while maximum is {MAX_TOKENS}"
+                )
+                failed.append((data['chunk_id'], token_count))
+            else:
+                ok += 1
+
+            # Chunk content classification
+            chunk_type, count = classify_chunk_content(source)
+            trivial_counts[chunk_type] += 1
 
     logger.info(f"Validation complete. Valid: {ok}, Over-limit: {len(failed)}")
 
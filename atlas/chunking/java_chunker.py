@@ -2,7 +2,7 @@ import tree_sitter_java
 
 from pathlib import Path
 from typing import List
-from tree_sitter import Language, Parser
+from tree_sitter import Language, Node, Parser
 from atlas.chunking.base_chunker import BaseChunker, CodeChunk
 from atlas.config import MAX_CHUNK_LINES
 
@@ -22,8 +22,10 @@ class JavaChunker(BaseChunker):
         source_code = file_path.read_text(encoding="utf-8")
         relative_file_path = file_path.relative_to(self.project_root)
         tree = self.parser.parse(bytes(source_code, "utf8"))
-        root_node = tree.root_node
-        lines = source_code.splitlines()
+        return self.extract_chunks_from_tree(tree.root_node, source_code.splitlines(), relative_file_path)
+
+    def extract_chunks_from_tree(self, root_node: Node, lines: List[str], relative_file_path: Path) -> List[CodeChunk]:
+        """Chunks an already parsed file, lines are the decoded source lines of the tree."""
         chunks = []
 
         def walk_tree(cursor, callback):
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from atlas.config import CHUNK_MANIFEST_PATH
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+@dataclass(slots=True)
+class FileEntry:
+    mtime_ns: int
+    size: int
+    content_hash: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ManifestDiff:
+    """Result of comparing the files on disk with the manifest of the previous run."""
+    added: List[Path] = field(default_factory=list)
+    modified: List[Path] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    # (mtime_ns, size, content_hash) of every added or modified file
+    fingerprints: Dict[Path, Tuple[int, int, str]] = field(default_factory=dict)
+
+    @property
+    def changed_files(self) -> List[Path]:
+        return self.added + self.modified
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChunkManifest:
+    """
+    Persistent record of which files were chunked, in which state, and which chunk ids they produced.
+    Files are keyed by their path relative to the project root, the same way chunks reference them.
+    """
+
+    def __init__(self, path: Path = CHUNK_MANIFEST_PATH):
+        self.path = path
+        self.files: Dict[str, FileEntry] = {}
+
+    @classmethod
+    def load(cls, path: Path = CHUNK_MANIFEST_PATH) -> "ChunkManifest":
+        manifest = cls(path)
+        if not path.exists():
+            return manifest
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            logger.info(f"Ignoring manifest {path.name} with unsupported version {data.get('version')}")
+            return manifest
+        manifest.files = {rel_path: FileEntry(**entry) for rel_path, entry in data["files"].items()}
+        return manifest
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {rel_path: asdict(entry) for rel_path, entry in self.files.items()},
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def diff(self, files: Iterable[Path], project_root: Path, full: bool = False) -> ManifestDiff:
+        """
+        Classifies files as added, modified or unchanged. Size and mtime are checked first,
+        the content hash is only computed when they differ. Manifest entries whose files no
+        longer exist are reported as deleted. With full, every file is added or modified and
+        every manifest entry not among the files is deleted.
+        """
+        result = ManifestDiff()
+        seen = set()
+        for file_path in files:
+            rel_path = str(file_path.relative_to(project_root))
+            seen.add(rel_path)
+            stat = file_path.stat()
+            entry = self.files.get(rel_path)
+            if not full and entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                result.unchanged += 1
+                continue
+
+            content_hash = hash_file(file_path)
+            if not full and entry and entry.content_hash == content_hash:
+                # Touched but not changed, just refresh the stat data
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                result.unchanged += 1
+                continue
+
+            result.fingerprints[file_path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+            if entry:
+                result.modified.append(file_path)
+            else:
+                result.added.append(file_path)
+
+        for rel_path in self.files:
+            if rel_path not in seen and (full or not (project_root / rel_path).exists()):
+                result.deleted.append(rel_path)
+        return result
+
+    def record(self, rel_path: str, fingerprint: Tuple[int, int, str], chunk_ids: List[str]):
+        mtime_ns, size, content_hash = fingerprint
+        self.files[rel_path] = FileEntry(mtime_ns, size, content_hash, chunk_ids)
+
+    def forget(self, rel_path: str) -> List[str]:
+        """Removes the file from the manifest and returns the chunk ids it used to produce."""
+        entry = self.files.pop(rel_path, None)
+        return entry.chunk_ids if entry else []
@@ -1,29 +1,16 @@
 import typer
 import logging
 
-from typing import List
+from typing import List, Optional
 from pprint import pprint
 from pathlib import Path
 
-from atlas.lining.line_extractor import save_lines_to_file
-from atlas.lining.line_extractor_dispatcher import get_line_extractor
-from atlas.qdrant.chunks_loader import client as qdrant_client
-
-from atlas.stacktrace.dbaccess import get_method_context
-from atlas.stacktrace.parser import parse_stacktrace, find_root_cause_frame
-from atlas.stacktrace.prompt import build_explainer_prompt
-
-from atlas.agents.agent_workflow import run
-from atlas.chunking.chunk_dispatcher import get_chunker
-from atlas.chunking.chunker import save_chunks_to_files, validate_chunks, cleanup_chunks, display_error_chunks
-from atlas.config import EMBED_PROVIDER, EMBED_MODEL, QDRANT_PATH, CONTEXT_LINES
-from atlas.embedding.embedder import embed_chunks
-from atlas.embedding.embedding_dispatcher import get_embedder
-from atlas.sqlite.lines_loader import load_lines_to_sqlite
-from atlas.sqlite.utils import get_db_connection, execute_sql_query
-from atlas.qdrant.chunks_loader import load_chunks_to_qdrant, execute_qdrant_query
+from atlas.config import CONTEXT_LINES, QDRANT_BATCH_SIZE, QDRANT_UPSERT_WORKERS
 from atlas.utils import iter_files
 
+# Commands import what they need when they run: tree-sitter, tiktoken, the API clients and the
+# agent framework take seconds to import, and the local Qdrant store is locked once opened.
+
 logging.basicConfig(
     level=logging.INFO
 )
@@ -75,6 +62,9 @@ def extract_lines(
 ):
     base_path, project_root_path = validate_and_normalize(root, project_root)
 
+    from atlas.lining.line_extractor import save_lines_to_file
+    from atlas.lining.line_extractor_dispatcher import get_line_extractor
+
     typer.echo(f"🔍 Scanning and extracting lines for embedding: {base_path}")
     counter = 0
 
@@ -82,8 +72,7 @@ def extract_lines(
         if file_path.is_file():
             try:
                 line_extractor = get_line_extractor(file_path, project_root_path)
-                lines = line_extractor.extract_lines_from_file(file_path)
-                save_lines_to_file(lines)
+                save_lines_to_file(line_extractor.extract_file_lines(file_path))
                 counter += 1
             except Exception as e:
                 import traceback
@@ -99,6 +88,11 @@ def explain_trace(
     context_lines: int = typer.Option(CONTEXT_LINES, "--context-lines", help="Lines of context to show around root cause"),
     dry_run: bool = typer.Option(True, "--dry-run", help="Print prompt instead of calling LLM"),
 ):
+    from atlas.sqlite.utils import get_read_connection
+    from atlas.stacktrace.dbaccess import get_method_context
+    from atlas.stacktrace.parser import parse_stacktrace, find_root_cause_frame
+    from atlas.stacktrace.prompt import build_explainer_prompt
+
     stacktrace = trace_file.read_text()
     frames = parse_stacktrace(stacktrace)
     if not frames:
@@ -110,14 +104,13 @@ def explain_trace(
         typer.echo("❌No root frame could be determined.")
         raise typer.Exit(code=1)
 
-    with get_db_connection() as sqlite:
-        context = get_method_context(
-            db_conn=sqlite,
-            parent_type=root_frame["class"],
-            parent_method=root_frame["method"],
-            line_no=root_frame["line"],
-            context_lines=context_lines
-        )
+    context = get_method_context(
+        db_conn=get_read_connection(),
+        parent_type=root_frame["class"],
+        parent_method=root_frame["method"],
+        line_no=root_frame["line"],
+        context_lines=context_lines
+    )
 
     if not context:
         typer.echo(f"[yellow]Code context for method {root_frame['method']} not found in DB.[/yellow]")
@@ -154,65 +147,206 @@ def chunk(
             "-p",
             help="Root of the project directory.",
         ),
+        workers: int = typer.Option(
+            1,
+            "--workers",
+            "-w",
+            min=1,
+            help="Number of worker processes used for chunking.",
+        ),
+        full: bool = typer.Option(
+            False,
+            "--full",
+            help="Re-chunk all files, ignoring the manifest of the previous run.",
+        ),
 ):
     base_path, project_root_path = validate_and_normalize(root, project_root)
 
+    from atlas.chunking.chunk_pipeline import chunk_files
+    from atlas.chunking.chunk_store import ChunkStore
+    from atlas.chunking.manifest import ChunkManifest
+    from atlas.embedding.embedding_store import EmbeddingStore
+    from atlas.index_pipeline import forget_changes
+
     typer.echo(f"🔍 Scanning and chunking for embedding: {base_path}")
-    all_chunks = []
+    manifest = ChunkManifest.load()
+    with ChunkStore() as store, EmbeddingStore() as embedding_store:
+        files = (file_path for file_path in iter_files(root, include_ext, exclude_dir) if file_path.is_file())
+        changes = manifest.diff(files, project_root_path, full)
+        typer.echo(f"📋 {len(changes.added)} added, {len(changes.modified)} modified, "
+                   f"{len(changes.deleted)} deleted, {changes.unchanged} unchanged files")
+
+        replaced_ids = forget_changes(manifest, changes, project_root_path, store, embedding_store)
+
+        chunk_count = 0
+        failed_files = []
+        for batch in chunk_files(changes.changed_files, project_root_path, workers=workers):
+            batch_chunks = []
+            for result in batch:
+                if result.error:
+                    typer.echo(f"⚠️ Skipped {result.file_path.name}: {result.error.strip().splitlines()[-1]}")
+                    logging.debug(f"Chunking of {result.file_path} failed:\n{result.error}")
+                    failed_files.append(result.file_path)
+                else:
+                    batch_chunks.extend(result.chunks)
+                    manifest.record(
+                        str(result.file_path.relative_to(project_root_path)),
+                        changes.fingerprints[result.file_path],
+                        [c.chunk_id for c in result.chunks]
+                    )
+                    replaced_ids.difference_update(c.chunk_id for c in result.chunks)
+            chunk_count += store.put_chunks(batch_chunks)
+            store.commit()
+        embedding_store.delete(replaced_ids)
+    manifest.save()
+
+    typer.echo(f"💾 Saved {chunk_count} chunks to the chunk store")
+    if failed_files:
+        typer.echo(f"⚠️ {len(failed_files)} files could not be chunked")
 
-    for file_path in iter_files(root, include_ext, exclude_dir):
-        if file_path.is_file():
-            try:
-                chunker = get_chunker(file_path, project_root_path)
-                chunks = chunker.extract_chunks_from_file(file_path)
-                all_chunks.extend(chunks)
-            except Exception as e:
-                import traceback
-                typer.echo(f"⚠️ Skipped {file_path.name}: {e}")
-                raise ValueError(f"Java parse error:\n{traceback.format_exc()}")
 
-    save_chunks_to_files(all_chunks)
-    typer.echo(f"💾 Saved {len(all_chunks)} chunks to .chunks/")
+@app.command()
+def index(
+        root: Path = typer.Argument(..., exists=True, file_okay=False, resolve_path=True),
+        include_ext: List[str] = typer.Option(
+            ...,
+            "--ext",
+            "-e",
+            help="File extension(s) to include. Repeat the flag for multiple.",
+            show_default=False,
+        ),
+        exclude_dir: List[str] = typer.Option(
+            None,
+            "--exclude-dir",
+            "-x",
+            help="Directory name(s) to skip. Repeat for multiple.",
+        ),
+        project_root: str = typer.Option(
+            "/",
+            "--project-root",
+            "-p",
+            help="Root of the project directory.",
+        ),
+        workers: int = typer.Option(
+            1,
+            "--workers",
+            "-w",
+            min=1,
+            help="Number of worker processes used for parsing.",
+        ),
+        full: bool = typer.Option(
+            False,
+            "--full",
+            help="Re-index all files, ignoring the manifest of the previous run.",
+        ),
+):
+    """Chunks files and loads their lines into SQLite, reading and parsing every file once."""
+    base_path, project_root_path = validate_and_normalize(root, project_root)
+
+    from atlas.index_pipeline import index_project
+    from atlas.sqlite.utils import bump_database_version, get_db_connection
+
+    typer.echo(f"🔍 Scanning and indexing: {base_path}")
+    files = (file_path for file_path in iter_files(root, include_ext, exclude_dir) if file_path.is_file())
+    stats = index_project(files, project_root_path, get_db_connection(), workers=workers, full=full)
+    bump_database_version()
+
+    typer.echo(f"📋 {stats.added} added, {stats.modified} modified, "
+               f"{stats.deleted} deleted, {stats.unchanged} unchanged files")
+    typer.echo(f"💾 Saved {stats.chunks} chunks to the chunk store and {stats.lines} lines to SQLite")
+    if stats.failed_files:
+        for file_path in stats.failed_files:
+            typer.echo(f"⚠️ Skipped {file_path.name}")
+        typer.echo(f"⚠️ {len(stats.failed_files)} files could not be indexed")
 
 
 @app.command()
 def validate():
+    from atlas.chunking.chunker import validate_chunks
+
     typer.echo(f"🔍 Validating chunks ...")
     validate_chunks()
 
 
 @app.command()
 def errors():
+    from atlas.chunking.chunker import display_error_chunks
+
     typer.echo(f"🔍 Display chunks with errors ...")
     display_error_chunks()
 
 
 @load_app.command("sqlite")
 def load_sqlite_lines():
+    from atlas.sqlite.lines_loader import load_lines_to_sqlite
+    from atlas.sqlite.utils import bump_database_version
+
     typer.echo("📥 Loading line metadata into SQLite...")
-    load_lines_to_sqlite()
+    count, errors = load_lines_to_sqlite()
+    bump_database_version()
+    typer.echo(f"💾 Loaded {count} files, {errors} failed")
 
 
 @app.command()
 def embed():
+    from atlas.embedding.embedder import embed_chunks
+
     typer.echo(f"🚀 Getting embeddings for chunks...")
     embed_chunks()
 
 
 @load_app.command("qdrant")
-def load_qdrant():
+def load_qdrant(
+        batch_size: int = typer.Option(
+            QDRANT_BATCH_SIZE,
+            "--batch-size",
+            "-b",
+            min=1,
+            help="Number of points per upsert request.",
+        ),
+        workers: int = typer.Option(
+            QDRANT_UPSERT_WORKERS,
+            "--workers",
+            "-w",
+            min=1,
+            help="Number of concurrent upsert requests to a Qdrant server, a local store is written serially.",
+        ),
+        full: bool = typer.Option(
+            False,
+            "--full",
+            help="Upsert all points, ignoring the checkpoint of previous loads.",
+        ),
+):
+    from atlas.qdrant.chunks_loader import load_chunks_to_qdrant
+
     typer.echo(f"🚀 Loading chunks into qdrant...")
-    load_chunks_to_qdrant()
+    loaded = load_chunks_to_qdrant(batch_size, workers, full)
+    typer.echo(f"💾 Upserted {loaded} points")
+
+
+@app.command("migrate-chunks")
+def migrate_chunks(
+        keep_files: bool = typer.Option(False, "--keep-files", help="Keep the migrated .chunks/*.json files."),
+):
+    from atlas.chunking.chunker import migrate_chunk_dir
+
+    typer.echo("📦 Migrating .chunks/*.json into the chunk store...")
+    count = migrate_chunk_dir(keep_files)
+    typer.echo(f"💾 Migrated {count} chunks")
 
 
 @app.command()
 def cleanup():
+    from atlas.chunking.chunker import cleanup_chunks
+
     typer.echo('Cleaning up chunks')
     cleanup_chunks()
 
 
 @test_app.command("sqlite")
 def test_sqlite(query: str):
+    from atlas.sqlite.utils import execute_sql_query
+
     typer.echo(f"Running SQL query {query}...")
     rows = execute_sql_query(query)
     for row in rows:
@@ -221,19 +355,41 @@ def test_sqlite(query: str):
 
 @test_app.command("qdrant")
 def test_qdrant(query: str):
+    from atlas.embedding.query_cache import embed_query
+    from atlas.qdrant.chunks_loader import execute_qdrant_query
+
     typer.echo(f"Running semantic query {query}...")
-    embedder = get_embedder(EMBED_PROVIDER, EMBED_MODEL)
-    embedding = embedder.retrieve_embedding_for_query(query)
+    embedding = embed_query(query)
     rows = execute_qdrant_query(embedding, 10)
     for row in rows:
         pprint(dict(row))
 
 
 @test_app.command("agent")
-def test_agent(query: str):
-    with get_db_connection() as sqlite:
-        result = run(query, sqlite, qdrant_client)
-        pprint(result)
+def test_agent(
+        query: Optional[str] = typer.Argument(None, help="Question to answer, the recorded one with --replay."),
+        no_cache: bool = typer.Option(False, "--no-cache", help="Ask the LLM even for cached decisions."),
+        record: Optional[Path] = typer.Option(None, "--record", help="Save the session's decisions to this file."),
+        replay: Optional[Path] = typer.Option(
+            None, "--replay", exists=True, dir_okay=False,
+            help="Run a recorded session again without calling the LLM."
+        ),
+        trace: Optional[Path] = typer.Option(None, "--trace", help="Write the timing trace of the session to this file."),
+):
+    from atlas.agents.agent_workflow import run
+    from atlas.tracing import Tracer
+
+    if query is None and replay is None:
+        typer.echo("❌ A query is required unless a session is replayed")
+        raise typer.Exit(code=1)
+    tracer = Tracer() if trace else None
+    result = run(query, use_cache=not no_cache, record_path=record, replay_path=replay, tracer=tracer,
+                 trace_path=trace)
+    pprint(result)
+    if tracer:
+        typer.echo("⏱️ Time per span:")
+        for name, total in tracer.totals().items():
+            typer.echo(f"  {name}: {total['duration_ms']:.1f} ms in {total['count']} spans")
 
 
 @test_app.command("list-files")
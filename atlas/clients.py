@@ -0,0 +1,99 @@
+# Process-wide API clients, created once and shared by all threads so their connection pools stay warm.
+# Client libraries are imported on first use, commands not needing them start faster.
+import logging
+import threading
+
+from typing import Any, Callable, Dict, Hashable
+
+from atlas.config import (
+    EMBED_MODEL, EMBED_PROVIDER, JOERN_POOL_SIZE, OPENAI_API_KEY, OPENAI_QUERY_RETRIES, QDRANT_PATH, VOYAGE_API_KEY
+)
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Hashable, Any] = {}
+# Reentrant, factories may fetch the clients they build upon
+_lock = threading.RLock()
+
+
+def get_client(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Returns the client registered under key, creating it with factory on first use."""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+
+def get_openai_client(max_retries: int = 0):
+    """
+    OpenAI client, without retries by default since batch embedding retries are scheduled by the
+    EmbeddingScheduler. Clients with retries share the connection pool of the default one.
+    """
+    def create():
+        import openai
+        if max_retries == 0:
+            return openai.OpenAI(max_retries=0)
+        return get_openai_client().with_options(max_retries=max_retries)
+
+    return get_client(("openai", max_retries), create)
+
+
+def get_voyage_client():
+    def create():
+        import voyageai
+        return voyageai.Client(max_retries=0)
+
+    return get_client("voyage", create)
+
+
+def get_joern_session():
+    """HTTP session keeping connections to the Joern server alive."""
+    def create():
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=JOERN_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    return get_client("joern", create)
+
+
+def get_qdrant_client():
+    """Client of the local Qdrant store, opening it locks the store directory for this process."""
+    def create():
+        from qdrant_client import QdrantClient
+        return QdrantClient(path=QDRANT_PATH)
+
+    return get_client("qdrant", create)
+
+
+def init_clients():
+    """Creates the clients of the configured providers up front, e.g. when the web app starts."""
+    from atlas.embedding.embedding_dispatcher import get_embedder
+
+    get_joern_session()
+    if OPENAI_API_KEY:
+        get_openai_client()
+        get_openai_client(OPENAI_QUERY_RETRIES)
+    if VOYAGE_API_KEY:
+        get_voyage_client()
+    try:
+        get_embedder(EMBED_PROVIDER, EMBED_MODEL)
+    except Exception as e:
+        logger.warning(f"Embedder {EMBED_PROVIDER}/{EMBED_MODEL} not available: {e}")
+    logger.info(f"Initialized clients: {', '.join(map(str, _clients))}")
+
+
+def close_clients():
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+        _clients.clear()
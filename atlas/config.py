@@ -3,20 +3,63 @@ import os
 from pathlib import Path
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+VOYAGE_API_KEY = os.getenv("VOYAGE_API_KEY")
 
 PROJECT_ROOT = Path(".").resolve()
-CHUNK_DIR = PROJECT_ROOT / ".chunks"
+CHUNK_DIR = PROJECT_ROOT / ".chunks"  # legacy one-file-per-chunk layout, see migrate-chunks
+CHUNK_STORE_PATH = PROJECT_ROOT / ".codeatlas.chunks.sqlite"
+EMBEDDING_DIR = PROJECT_ROOT / ".codeatlas.embeddings"
+EMBEDDING_DTYPE = "float32"  # "float16" halves the matrix size at a small precision cost
 LINES_DIR = PROJECT_ROOT / ".lines"
+CHUNK_MANIFEST_PATH = PROJECT_ROOT / ".codeatlas.manifest.json"
 DB_PATH = PROJECT_ROOT / ".codeatlas.sqlite"
+DB_VERSION_PATH = PROJECT_ROOT / ".codeatlas.sqlite.version"  # changed by every load into the database
+LINE_LOAD_BATCH_SIZE = 50_000  # lines per executemany call when loading into SQLite
+SQLITE_MMAP_SIZE = 256 * 1024 ** 2  # bytes of the database memory-mapped by read-only connections
 MAX_TOKENS = 8192
 MAX_CHUNK_LINES = 80
 CONTEXT_LINES = 10
+CHUNK_BATCH_SIZE = 1000  # chunks collected from workers before they are saved
 
 EMBED_PROVIDER = "openai"
 EMBED_MODEL = "text-embedding-3-small"
+EMBED_MAX_IN_FLIGHT = 4  # concurrent embedding requests
+EMBED_REQUESTS_PER_MINUTE = 3000
+EMBED_TOKENS_PER_MINUTE = 1_000_000
+EMBED_MAX_RETRIES = 5
+EMBED_PACKING_WINDOW = 10_000  # chunks bin-packed together into request batches
+# Share of Voyage's token limits that batches are packed to. Its tokenizer counts more tokens for code than cl100k
+VOYAGE_TOKEN_MARGIN = 0.8
+# Embeddings cache shared by all projects, keyed by provider, model and source hash
+EMBED_CACHE_PATH = Path(os.getenv("CODEATLAS_CACHE_DIR", Path.home() / ".cache" / "codeatlas")) / "embeddings.sqlite"
+EMBED_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Query embeddings of semantic searches, kept in memory and optionally in the embeddings cache
+QUERY_EMBED_CACHE_SIZE = 1024  # entries
+QUERY_EMBED_CACHE_TTL = 3600  # seconds
+QUERY_EMBED_CACHE_PERSIST = os.getenv("CODEATLAS_PERSIST_QUERY_EMBEDDINGS", "0") == "1"
 
 QDRANT_COLLECTION = "codeatlas_chunks"
 QDRANT_DIM = 1536  # For text-embedding-3-small
 QDRANT_PATH = PROJECT_ROOT / ".codeatlas.qdrant"
+QDRANT_BATCH_SIZE = 256  # points per upsert request
+QDRANT_UPSERT_WORKERS = 4  # concurrent upsert requests
+QDRANT_VERSION_PATH = PROJECT_ROOT / ".codeatlas.qdrant.version"  # changed by every load that modifies the collection
+QDRANT_SEARCH_CACHE_SIZE = 512  # cached search results
+# Hybrid search: candidates per ranking as a multiple of the results, constant of reciprocal-rank fusion
+HYBRID_CANDIDATES_FACTOR = 3
+HYBRID_RRF_K = 60
 
 JOERN_SERVER_URL = "http://localhost:8080/query-sync"
+JOERN_TIMEOUT = 120  # seconds per query
+JOERN_POOL_SIZE = 4  # keep-alive connections to the Joern server
+OPENAI_QUERY_RETRIES = 2  # retries of interactive OpenAI calls, batch embedding retries are scheduled
+# Agent: tokens of tool output passed to each reasoning step, SQL rows shown before the rest is summarized
+AGENT_CONTEXT_TOKENS = 6000
+AGENT_MAX_SQL_ROWS = 50
+# Decisions of the agent, reused for the same conversation while the indexes are unchanged
+AGENT_CACHE_PATH = PROJECT_ROOT / ".codeatlas.agent.sqlite"
+AGENT_CACHE_ENABLED = os.getenv("CODEATLAS_AGENT_CACHE", "1") == "1"
+
+# Web API: concurrent requests per service and seconds a request may take, queueing included
+WEB_SERVICE_CONCURRENCY = {"relational": 8, "vector": 4, "graph": 2, "llm": 2}
+WEB_SERVICE_TIMEOUTS = {"relational": 30, "vector": 30, "graph": 150, "llm": 300}
@@ -1,10 +1,14 @@
-from typing import List
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import List, Mapping, Optional
 
 
 class Embedding:
-    def __init__(self, chunk_id: str, chunk_text: str):
+    def __init__(self, chunk_id: str, chunk_text: str, source_hash: str = None, token_count: int = 0):
         self.chunk_id = chunk_id
         self.chunk_text = chunk_text
+        self.source_hash = source_hash
+        self.token_count = token_count
         self.embedding = []
         self.errors = []
 
@@ -12,11 +16,51 @@ class Embedding:
         return f'{self.chunk_id} {self.chunk_text}'
 
 
+class RetryableEmbeddingError(Exception):
+    """Raised by embedders for failures worth retrying, e.g. rate limits or transient server errors."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Returns the number of seconds a provider asked us to wait, if it said so."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class BaseEmbedder:
+    # Provider limits used to pack request batches, tokens are counted with the cl100k tokenizer
+    MAX_BATCH_INPUTS = 2048
+    MAX_BATCH_TOKENS = 300_000
+    MAX_INPUT_TOKENS = 8192
+
     def __init__(self, model_type):
         self.model_type = model_type
 
-    def retrieve_embedding(self, chunks: List[Embedding]) -> List[Embedding]:
+    def request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Sends a single embedding request. Transient failures are raised as RetryableEmbeddingError,
+        retrying is left to the EmbeddingScheduler.
+        """
         raise NotImplementedError
 
     def retrieve_embedding_for_query(self, query: str):
@@ -0,0 +1,89 @@
+import math
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List
+
+from atlas.config import EMBED_PACKING_WINDOW
+from atlas.embedding.base_embedder import Embedding
+
+
+@dataclass(slots=True)
+class PackingStats:
+    max_batch_inputs: int
+    max_batch_tokens: int
+    batches: int = 0
+    inputs: int = 0
+    tokens: int = 0
+
+    @property
+    def min_batches(self) -> int:
+        """Lower bound on the number of requests needed for everything packed so far."""
+        return max(math.ceil(self.tokens / self.max_batch_tokens), math.ceil(self.inputs / self.max_batch_inputs))
+
+    @property
+    def efficiency(self) -> float:
+        """Ratio of the lower bound to the requests actually used, 1.0 is a perfect packing."""
+        return self.min_batches / self.batches if self.batches else 1.0
+
+    def __str__(self):
+        return (f"Packed {self.inputs} chunks ({self.tokens} tokens) into {self.batches} requests, "
+                f"lower bound is {self.min_batches} ({self.efficiency:.1%} efficiency)")
+
+
+class _Bin:
+    __slots__ = ("items", "tokens")
+
+    def __init__(self):
+        self.items: List[Embedding] = []
+        self.tokens = 0
+
+
+def pack_batches(
+        items: Iterable[Embedding],
+        max_batch_inputs: int,
+        max_batch_tokens: int,
+        stats: PackingStats = None,
+        window: int = EMBED_PACKING_WINDOW,
+) -> Iterator[List[Embedding]]:
+    """
+    Packs embeddings into request batches that respect both the provider's inputs-per-request
+    and tokens-per-request limits, using first-fit decreasing over windows of items so memory
+    stays bounded. The least filled batch of each window is carried over into the next one.
+    """
+    buffer: List[Embedding] = []
+    for item in items:
+        buffer.append(item)
+        if len(buffer) >= window:
+            bins = _first_fit_decreasing(buffer, max_batch_inputs, max_batch_tokens)
+            leftover = min(bins, key=lambda b: b.tokens)
+            for b in bins:
+                if b is not leftover:
+                    yield _emit(b, stats)
+            buffer = leftover.items
+
+    if buffer:
+        for b in _first_fit_decreasing(buffer, max_batch_inputs, max_batch_tokens):
+            yield _emit(b, stats)
+
+
+def _first_fit_decreasing(items: List[Embedding], max_batch_inputs: int, max_batch_tokens: int) -> List[_Bin]:
+    bins: List[_Bin] = []
+    for item in sorted(items, key=lambda i: i.token_count, reverse=True):
+        for b in bins:
+            if len(b.items) < max_batch_inputs and b.tokens + item.token_count <= max_batch_tokens:
+                break
+        else:
+            # Also covers items larger than a whole request, they get a batch of their own
+            b = _Bin()
+            bins.append(b)
+        b.items.append(item)
+        b.tokens += item.token_count
+    return bins
+
+
+def _emit(b: _Bin, stats: PackingStats) -> List[Embedding]:
+    if stats is not None:
+        stats.batches += 1
+        stats.inputs += len(b.items)
+        stats.tokens += b.tokens
+    return b.items
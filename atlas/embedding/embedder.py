@@ -1,54 +1,109 @@
 import json
 import logging
-import tiktoken
 
-from atlas.config import CHUNK_DIR, EMBED_MODEL, EMBED_PROVIDER, MAX_TOKENS
+from typing import Dict, Iterator, List, Set
+
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.config import EMBED_MODEL, EMBED_PROVIDER
 from atlas.embedding.base_embedder import Embedding
+from atlas.embedding.batch_packer import PackingStats, pack_batches
+from atlas.embedding.embedding_cache import EmbeddingCache
 from atlas.embedding.embedding_dispatcher import get_embedder
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.embedding.scheduler import EmbeddingScheduler
+from atlas.utils import get_encoder
 
 logger = logging.getLogger(__name__)
-ENCODER = tiktoken.get_encoding("cl100k_base")
 
 
-def save_embeddings(chunks_with_embedding):
+def save_embeddings(
+        store: ChunkStore,
+        embedding_store: EmbeddingStore,
+        cache: EmbeddingCache,
+        duplicates: Dict[str, List[str]],
+        chunks_with_embedding,
+):
     for chunk in chunks_with_embedding:
-        chunk_file = CHUNK_DIR / f"chunk_{chunk.chunk_id}.json"
-        with open(chunk_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if len(chunk.errors) > 0:
-                if 'errors' not in data:
-                    data['errors'] = []
-                data['errors'].append({'source': 'embedding', 'error': json.dumps(chunk.errors)})
-                with open(chunk_file, "r+", encoding="utf-8") as w:
-                    json.dump(data, w, indent=2)
-            else:
-                with open(chunk_file, "r+", encoding="utf-8") as w:
-                    data['embedding'] = chunk.embedding
-                    json.dump(data, w, indent=2)
+        # Chunks with the same source as this one were not sent, they share its result
+        chunk_ids = [chunk.chunk_id] + duplicates.pop(chunk.source_hash, [])
+        if len(chunk.errors) > 0:
+            for chunk_id in chunk_ids:
+                store.add_error(chunk_id, 'embedding', json.dumps(chunk.errors))
+        else:
+            cache.put(chunk.source_hash, chunk.embedding)
+            for chunk_id in chunk_ids:
+                embedding_store.put(chunk_id, chunk.source_hash, chunk.embedding)
+    store.commit()
+    embedding_store.flush()
+    cache.flush()
+
+
+def iter_pending_chunks(
+        store: ChunkStore,
+        embedding_store: EmbeddingStore,
+        cache: EmbeddingCache,
+        duplicates: Dict[str, List[str]],
+        max_input_tokens: int,
+        stats: dict,
+) -> Iterator[Embedding]:
+    sent: Set[str] = set()
+    for data in store.iter_chunks():
+        chunk_id = data['chunk_id']
+        source_hash = data['source_hash']
+        # Chunk ids are deterministic, so chunks of unchanged files keep their embedding
+        if embedding_store.has(chunk_id, source_hash):
+            stats['skipped'] += 1
+            continue
+        # Checked before the sent sources: once the batch of a sent source is saved, its
+        # duplicates are no longer collected and take the vector from the cache
+        vector = cache.get(source_hash)
+        if vector is not None:
+            embedding_store.put(chunk_id, source_hash, vector)
+            continue
+        if source_hash in sent:
+            duplicates.setdefault(source_hash, []).append(chunk_id)
+            stats['duplicates'] += 1
+            continue
+        source = data.get('source', '')
+        token_count = len(get_encoder().encode(source))
+        if token_count > max_input_tokens:
+            store.add_error(chunk_id, 'embedding',
+                            f"{chunk_id} too large: {token_count} tokens while maximum is {max_input_tokens}")
+            stats['too_large'] += 1
+            continue
+        sent.add(source_hash)
+        yield Embedding(chunk_id, source, source_hash, token_count)
 
 
 def embed_chunks():
-    chunks = []
-    batch_no = 1
-    token_count = 0
-    embedder = get_embedder(EMBED_PROVIDER, EMBED_MODEL)
-    for chunk_file in CHUNK_DIR.glob("*.json"):
-        with open(chunk_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            chunk_id = data['chunk_id']
-            source = data.get('source', '')
-            token_count += len(ENCODER.encode(source))
-            chunks.append(Embedding(chunk_id, source))
-            if token_count > MAX_TOKENS:
-                last = chunks.pop()
-                logger.info(f"Running batch num {batch_no}")
-                chunks_with_embedding = embedder.retrieve_embedding(chunks)
-                save_embeddings(chunks_with_embedding)
-                chunks = [last]
-                token_count = 0
-                batch_no += 1
-
-    if len(chunks) > 0:
-        logger.info(f"Running batch num {batch_no}. This batch is the last.")
-        chunks_with_embedding = embedder.retrieve_embedding(chunks)
-        save_embeddings(chunks_with_embedding)
+    stats = {'skipped': 0, 'duplicates': 0, 'too_large': 0}
+    duplicates: Dict[str, List[str]] = {}
+    cache = EmbeddingCache(EMBED_PROVIDER, EMBED_MODEL)
+    with cache, ChunkStore() as store, EmbeddingStore() as embedding_store:
+        embedder = get_embedder(EMBED_PROVIDER, EMBED_MODEL)
+        scheduler = EmbeddingScheduler(embedder)
+        packing = PackingStats(embedder.MAX_BATCH_INPUTS, embedder.MAX_BATCH_TOKENS)
+        batches = pack_batches(
+            iter_pending_chunks(store, embedding_store, cache, duplicates, embedder.MAX_INPUT_TOKENS, stats),
+            embedder.MAX_BATCH_INPUTS,
+            embedder.MAX_BATCH_TOKENS,
+            packing
+        )
+        # Batches are read ahead by the scheduler, results are saved here, on the thread owning the stores
+        for batch_no, chunks_with_embedding in enumerate(scheduler.map(batches), 1):
+            logger.info(f"Finished batch num {batch_no} with {len(chunks_with_embedding)} chunks")
+            save_embeddings(store, embedding_store, cache, duplicates, chunks_with_embedding)
+        # Duplicates read after their original's batch was saved with errors, or whose vector
+        # was evicted from the cache since, are left without an embedding
+        for source_hash, chunk_ids in duplicates.items():
+            logger.warning(f"No embedding for {len(chunk_ids)} chunks with source {source_hash}, "
+                           f"they are embedded on the next run")
+        # Cache hits are only written to the stores, commit them even if nothing was sent
+        store.commit()
+        embedding_store.flush()
+
+    logger.info(str(packing))
+    logger.info(f"Embedding cache: {cache.hits} hits, {cache.misses} misses")
+    logger.info(f"Skipped {stats['skipped']} chunks that were already embedded, "
+                f"{stats['duplicates']} chunks duplicating another chunk's source, "
+                f"{stats['too_large']} chunks were too large to embed")
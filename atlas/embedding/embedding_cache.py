@@ -0,0 +1,122 @@
+import logging
+import sqlite3
+import time
+import numpy as np
+
+from pathlib import Path
+from typing import List, Optional
+
+from atlas.config import EMBED_CACHE_PATH, EMBED_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    source_hash TEXT NOT NULL,   -- sha256 of the embedded source
+    vector BLOB NOT NULL,        -- float32 bytes
+    last_used REAL NOT NULL,
+    PRIMARY KEY (provider, model, source_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache shared by all projects, keyed by (provider, model, source hash).
+    The cache is bounded by max_bytes of vector data, least recently used entries are evicted first.
+    Reads are tracked in memory and their last-used times are written on flush().
+    """
+
+    def __init__(
+            self,
+            provider: str,
+            model: str,
+            path: Path = EMBED_CACHE_PATH,
+            max_bytes: int = EMBED_CACHE_MAX_BYTES,
+    ):
+        self.provider = provider
+        self.model = model
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Callers sharing a cache between threads serialize access themselves
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.executescript(CACHE_SCHEMA)
+        self._touched: List[str] = []
+        self._size = self.size_bytes()
+
+    def __enter__(self) -> "EmbeddingCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, source_hash: str) -> Optional[List[float]]:
+        row = self.conn.execute(
+            "SELECT vector FROM embeddings WHERE provider = ? AND model = ? AND source_hash = ?",
+            (self.provider, self.model, source_hash)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(source_hash)
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, source_hash: str, vector: List[float]):
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO embeddings (provider, model, source_hash, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+            (self.provider, self.model, source_hash, blob, time.time())
+        )
+        self._size += len(blob)
+
+    def flush(self):
+        if self._touched:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE provider = ? AND model = ? AND source_hash = ?",
+                ((now, self.provider, self.model, source_hash) for source_hash in self._touched)
+            )
+            self._touched = []
+        self.conn.commit()
+        self.evict()
+
+    def size_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def evict(self) -> int:
+        """Drops least recently used entries until the cache is back under 90% of max_bytes."""
+        # The running size is an estimate (other processes share the cache), verify before evicting
+        if self._size <= self.max_bytes:
+            return 0
+        size = self._size = self.size_bytes()
+        if size <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        keys = []
+        rows = self.conn.execute(
+            "SELECT provider, model, source_hash, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        )
+        for provider, model, source_hash, length in rows:
+            if size <= target:
+                break
+            keys.append((provider, model, source_hash))
+            size -= length
+        evicted = len(keys)
+        self._size = size
+        self.conn.executemany(
+            "DELETE FROM embeddings WHERE provider = ? AND model = ? AND source_hash = ?", keys
+        )
+        self.conn.commit()
+        logger.info(f"Evicted {evicted} entries from the embedding cache")
+        return evicted
+
+    def close(self):
+        self.flush()
+        self.conn.close()
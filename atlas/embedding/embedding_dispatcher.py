@@ -1,7 +1,13 @@
+from atlas.clients import get_client
 from atlas.embedding.openai_embedder import OpenAIEmbedder
+from atlas.embedding.voyage_embedder import VoyageEmbedder
 
 
 def get_embedder(model_provider: str, model_type: str):
-    if model_provider.lower() == 'openai':
-        return OpenAIEmbedder(model_type)
-    raise ValueError(f"No embedder implemented for model provider: {model_provider}")
\ No newline at end of file
+    """Embedders are stateless, one per provider and model is shared by the whole process."""
+    provider = model_provider.lower()
+    if provider == 'openai':
+        return get_client(("embedder", provider, model_type), lambda: OpenAIEmbedder(model_type))
+    elif provider == 'voyage':
+        return get_client(("embedder", provider, model_type), lambda: VoyageEmbedder(model_type))
+    raise ValueError(f"No embedder implemented for model provider: {model_provider}")
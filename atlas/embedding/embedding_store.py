@@ -0,0 +1,167 @@
+import json
+import logging
+import sqlite3
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from atlas.config import EMBEDDING_DIR, EMBEDDING_DTYPE, QDRANT_DIM
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.sqlite"
+LEGACY_INDEX_FILE = "index.json"
+MATRIX_FILE = "vectors.bin"
+INITIAL_CAPACITY = 1024
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (   -- layout of the matrix: dim, dtype and capacity
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rows (
+    chunk_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,           -- row of the vector in the matrix
+    source_hash TEXT NOT NULL       -- hash of the source the vector was computed from
+) WITHOUT ROWID;
+"""
+
+
+class EmbeddingStore:
+    """
+    Embeddings kept in one contiguous, memory-mapped (capacity x dim) matrix. A SQLite index maps
+    each chunk id to its row and to the hash of the source the vector was computed from, so
+    stale vectors are detected when a chunk with the same id changes. Rows of deleted chunks
+    are reused by later writes. flush() only writes the index entries changed since the last one.
+    """
+
+    def __init__(self, path: Path = EMBEDDING_DIR, dim: int = QDRANT_DIM, dtype: str = EMBEDDING_DTYPE):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.rows: Dict[str, Tuple[int, str]] = {}
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.capacity = 0
+        self._changed: Dict[str, Tuple[int, str]] = {}
+        self._deleted: Set[str] = set()
+        self._matrix: Optional[np.memmap] = None
+
+        self.conn = sqlite3.connect(self.path / INDEX_FILE)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.executescript(INDEX_SCHEMA)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        legacy_path = self.path / LEGACY_INDEX_FILE
+        if meta:
+            # An existing matrix dictates its own layout, regardless of the current config
+            self.dim = int(meta["dim"])
+            self.dtype = np.dtype(meta["dtype"])
+            self.capacity = int(meta["capacity"])
+            self.rows = {chunk_id: (row, source_hash)
+                         for chunk_id, row, source_hash in self.conn.execute("SELECT chunk_id, row, source_hash FROM rows")}
+        elif legacy_path.exists():
+            self._import_legacy_index(legacy_path)
+
+        used = {row for row, _ in self.rows.values()}
+        self._free_rows = sorted(set(range(self.capacity)) - used, reverse=True)
+        if self.capacity:
+            self._open_matrix()
+
+    def __enter__(self) -> "EmbeddingStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self.rows
+
+    def has(self, chunk_id: str, source_hash: str) -> bool:
+        """True if a vector for exactly this version of the chunk source is stored."""
+        entry = self.rows.get(chunk_id)
+        return entry is not None and entry[1] == source_hash
+
+    def get(self, chunk_id: str) -> np.ndarray:
+        """Returns the stored vector as a view into the memory-mapped matrix."""
+        row, _ = self.rows[chunk_id]
+        return self._matrix[row]
+
+    def put(self, chunk_id: str, source_hash: str, vector: List[float]):
+        entry = self.rows.get(chunk_id)
+        row = entry[0] if entry else self._allocate_row()
+        self._matrix[row] = vector
+        self.rows[chunk_id] = self._changed[chunk_id] = (row, source_hash)
+        self._deleted.discard(chunk_id)
+
+    def delete(self, chunk_ids: Iterable[str]) -> int:
+        count = 0
+        for chunk_id in chunk_ids:
+            entry = self.rows.pop(chunk_id, None)
+            if entry:
+                self._free_rows.append(entry[0])
+                self._changed.pop(chunk_id, None)
+                self._deleted.add(chunk_id)
+                count += 1
+        return count
+
+    def flush(self):
+        """Writes the vectors, then the index entries changed since the last flush."""
+        if self._matrix is not None:
+            self._matrix.flush()
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("dim", str(self.dim)), ("dtype", self.dtype.name), ("capacity", str(self.capacity)),
+            ])
+            self.conn.executemany("DELETE FROM rows WHERE chunk_id = ?", ((chunk_id,) for chunk_id in self._deleted))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO rows (chunk_id, row, source_hash) VALUES (?, ?, ?)",
+                ((chunk_id, row, source_hash) for chunk_id, (row, source_hash) in self._changed.items())
+            )
+        self._changed = {}
+        self._deleted = set()
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+        self._matrix = None
+
+    # Internal -------------------------------------------------------------
+    def _import_legacy_index(self, legacy_path: Path):
+        """Moves the JSON index of older versions into the SQLite index."""
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.dim = index["dim"]
+        self.dtype = np.dtype(index["dtype"])
+        self.capacity = index["capacity"]
+        self.rows = {chunk_id: (row, source_hash) for chunk_id, (row, source_hash) in index["rows"].items()}
+        self._changed = dict(self.rows)
+        self.flush()
+        legacy_path.unlink()
+        logger.info(f"Moved the index of {len(self.rows)} embeddings from {legacy_path} to {INDEX_FILE}")
+
+    def _open_matrix(self):
+        self._matrix = np.memmap(self.path / MATRIX_FILE, dtype=self.dtype, mode="r+",
+                                 shape=(self.capacity, self.dim))
+
+    def _allocate_row(self) -> int:
+        if not self._free_rows:
+            self._grow(max(INITIAL_CAPACITY, self.capacity * 2))
+        return self._free_rows.pop()
+
+    def _grow(self, capacity: int):
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.path / MATRIX_FILE, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self._free_rows = list(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+        self._open_matrix()
+        logger.debug(f"Embedding matrix grown to {capacity} rows")
@@ -1,44 +1,36 @@
 import logging
 import openai
-import time
 from typing import List
 
-from atlas.config import EMBED_MODEL
-from atlas.embedding.base_embedder import BaseEmbedder, Embedding
+from atlas.clients import get_openai_client
+from atlas.config import OPENAI_QUERY_RETRIES
+from atlas.embedding.base_embedder import BaseEmbedder, RetryableEmbeddingError, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAIEmbedder(BaseEmbedder):
+    MAX_BATCH_INPUTS = 2048
+    MAX_BATCH_TOKENS = 300_000
+    MAX_INPUT_TOKENS = 8192
+
     def __init__(self, model_type):
         super().__init__(model_type)
+        # Retries are handled by the EmbeddingScheduler, which knows about the rate limits
+        self.client = get_openai_client()
+        self.query_client = get_openai_client(OPENAI_QUERY_RETRIES)
 
-    def retrieve_embedding(self, chunks: List[Embedding]) -> List[Embedding]:
-        max_retries = 3
-        delay = 1
-        time.sleep(0.05) # for rate limiting, should be improved
-        for attempt in range(max_retries):
-            try:
-                response = openai.embeddings.create(
-                    input=[str(embed.chunk_text) for embed in chunks],
-                    model=self.model_type
-                )
-                embeddings = [res.embedding for res in response.data]
-                for chunk, embed in zip(chunks, embeddings):
-                    chunk.embedding = embed
-
-                return chunks
-            except openai.OpenAIError as e:
-                logger.info(f"Embedding failed (attempt {attempt + 1}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(delay)
-                    delay *= 2
-                else:
-                    for chunk in chunks:
-                        chunk.errors.append({'source': 'embedding', 'error': str(e)})
-                    return chunks
-        return []
+    def request_embeddings(self, texts: List[str]) -> List[List[float]]:
+        try:
+            response = self.client.embeddings.create(input=texts, model=self.model_type)
+        except openai.RateLimitError as e:
+            raise RetryableEmbeddingError(str(e), parse_retry_after(e.response.headers)) from e
+        except openai.InternalServerError as e:
+            raise RetryableEmbeddingError(str(e), parse_retry_after(e.response.headers)) from e
+        except openai.APIConnectionError as e:
+            raise RetryableEmbeddingError(str(e)) from e
+        return [res.embedding for res in response.data]
 
     def retrieve_embedding_for_query(self, query: str):
-        embedding = openai.embeddings.create(input=query, model=EMBED_MODEL).data[0].embedding
+        embedding = self.query_client.embeddings.create(input=query, model=self.model_type).data[0].embedding
         return embedding
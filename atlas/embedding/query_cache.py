@@ -0,0 +1,160 @@
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from atlas.config import (
+    EMBED_CACHE_PATH, EMBED_MODEL, EMBED_PROVIDER, QUERY_EMBED_CACHE_PERSIST, QUERY_EMBED_CACHE_SIZE,
+    QUERY_EMBED_CACHE_TTL
+)
+from atlas.embedding.embedding_cache import EmbeddingCache
+from atlas.embedding.embedding_dispatcher import get_embedder
+from atlas.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Queries differing only in whitespace share their embedding. Case is kept, it matters for code."""
+    return " ".join(query.split())
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache of query embeddings keyed by (provider, model, normalized query), entries
+    expire ttl seconds after they were computed. With persist_path set, misses are looked up in
+    and stored to the embeddings cache at that path, so entries survive restarts.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = QUERY_EMBED_CACHE_SIZE,
+            ttl: float = QUERY_EMBED_CACHE_TTL,
+            persist_path: Optional[Path] = None,
+            clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.expired = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Tuple[str, str, str], Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Dict[Tuple[str, str], EmbeddingCache] = {}
+        self._disk_lock = threading.Lock()
+
+    def get_or_compute(
+            self,
+            provider: str,
+            model: str,
+            query: str,
+            compute: Callable[[str], Optional[List[float]]],
+    ) -> Optional[List[float]]:
+        """Returns the cached embedding of query, calling compute on a miss. Failures (None) are not cached."""
+        text = normalize_query(query)
+        key = (provider.lower(), model, text)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+
+        embedding = self._load(key)
+        if embedding is None:
+            embedding = compute(text)
+            if embedding is None:
+                return None
+            self._store(key, embedding)
+
+        with self._lock:
+            self._entries[key] = (now, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return embedding
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Persistence ----------------------------------------------------------
+    @staticmethod
+    def _disk_key(text: str) -> str:
+        # Namespaced, so query embeddings never collide with the document embeddings of the same text
+        return hashlib.sha256(f"query:{text}".encode("utf-8")).hexdigest()
+
+    def _disk_cache(self, provider: str, model: str) -> EmbeddingCache:
+        cache = self._disk.get((provider, model))
+        if cache is None:
+            cache = self._disk[(provider, model)] = EmbeddingCache(provider, model, self.persist_path)
+        return cache
+
+    def _load(self, key: Tuple[str, str, str]) -> Optional[List[float]]:
+        if self.persist_path is None:
+            return None
+        provider, model, text = key
+        with self._disk_lock:
+            embedding = self._disk_cache(provider, model).get(self._disk_key(text))
+        if embedding is not None:
+            with self._lock:
+                self.disk_hits += 1
+        return embedding
+
+    def _store(self, key: Tuple[str, str, str], embedding: List[float]):
+        if self.persist_path is None:
+            return
+        provider, model, text = key
+        with self._disk_lock:
+            cache = self._disk_cache(provider, model)
+            cache.put(self._disk_key(text), embedding)
+            cache.flush()
+
+    def close(self):
+        with self._disk_lock:
+            for cache in self._disk.values():
+                cache.close()
+            self._disk = {}
+
+
+query_cache = QueryEmbeddingCache(persist_path=EMBED_CACHE_PATH if QUERY_EMBED_CACHE_PERSIST else None)
+
+
+atexit.register(query_cache.close)
+
+
+def embed_query(query: str, provider: str = EMBED_PROVIDER, model: str = EMBED_MODEL) -> Optional[List[float]]:
+    """Embedding of a search query, served from the process-wide query cache when possible."""
+    with trace_span("embedding", provider=provider, model=model, query_chars=len(query), cached=True) as span:
+        def compute(text: str) -> Optional[List[float]]:
+            with trace_span("embedding.request"):
+                span.set(cached=False)
+                return get_embedder(provider, model).retrieve_embedding_for_query(text)
+
+        return query_cache.get_or_compute(provider, model, query, compute)
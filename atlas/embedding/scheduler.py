@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator, List
+
+from atlas.config import EMBED_MAX_IN_FLIGHT, EMBED_REQUESTS_PER_MINUTE, EMBED_TOKENS_PER_MINUTE, EMBED_MAX_RETRIES
+from atlas.embedding.base_embedder import BaseEmbedder, Embedding, RetryableEmbeddingError
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket holding up to capacity tokens, refilled evenly over period seconds."""
+
+    def __init__(
+            self,
+            capacity: float,
+            period: float = 60.0,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        # A request larger than the whole bucket would wait forever, it gets a full bucket instead
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_time = (amount - self.tokens) / self.rate
+            self._sleep(wait_time)
+
+
+class EmbeddingScheduler:
+    """
+    Keeps up to max_in_flight embedding requests running on a thread pool while staying within
+    the requests-per-minute and tokens-per-minute budgets. Retryable failures are retried with
+    exponential backoff, or after the delay the provider asked for; such a delay pauses all
+    workers, since the quota is shared.
+    """
+
+    def __init__(
+            self,
+            embedder: BaseEmbedder,
+            max_in_flight: int = EMBED_MAX_IN_FLIGHT,
+            requests_per_minute: int = EMBED_REQUESTS_PER_MINUTE,
+            tokens_per_minute: int = EMBED_TOKENS_PER_MINUTE,
+            max_retries: int = EMBED_MAX_RETRIES,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.embedder = embedder
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.request_bucket = TokenBucket(requests_per_minute, sleep=sleep)
+        self.token_bucket = TokenBucket(tokens_per_minute, sleep=sleep)
+        self._sleep = sleep
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def map(self, batches: Iterable[List[Embedding]]) -> Iterator[List[Embedding]]:
+        """Embeds the batches concurrently and yields each one, in completion order, once it is done."""
+        batches = iter(batches)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embedder") as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_in_flight:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self.embed_batch, batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def embed_batch(self, batch: List[Embedding]) -> List[Embedding]:
+        tokens = sum(chunk.token_count for chunk in batch)
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            self._wait_while_paused()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+            try:
+                vectors = self.embedder.request_embeddings([str(chunk.chunk_text) for chunk in batch])
+                for chunk, vector in zip(batch, vectors):
+                    chunk.embedding = vector
+                return batch
+            except RetryableEmbeddingError as e:
+                if attempt == self.max_retries:
+                    return self._fail(batch, e)
+                wait_time = e.retry_after if e.retry_after is not None else delay
+                delay *= 2
+                logger.info(f"Embedding failed (attempt {attempt + 1}), retrying in {wait_time:.1f}s: {e}")
+                self._pause(wait_time)
+            except Exception as e:
+                return self._fail(batch, e)
+        return batch
+
+    @staticmethod
+    def _fail(batch: List[Embedding], error: Exception) -> List[Embedding]:
+        logger.info(f"Embedding of {len(batch)} chunks failed: {error}")
+        for chunk in batch:
+            chunk.errors.append({'source': 'embedding', 'error': str(error)})
+        return batch
+
+    def _pause(self, seconds: float):
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _wait_while_paused(self):
+        while True:
+            with self._pause_lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            self._sleep(remaining)
@@ -1,46 +1,45 @@
 import logging
-import time
-import voyageai
 
 from typing import List
-from voyageai.error import VoyageError
+from voyageai.error import VoyageError, RateLimitError, ServiceUnavailableError, ServerError, Timeout, \
+    APIConnectionError, TryAgain
 
-from atlas.config import EMBED_MODEL
-from atlas.embedding.base_embedder import BaseEmbedder, Embedding
+from atlas.clients import get_voyage_client
+from atlas.config import VOYAGE_TOKEN_MARGIN
+from atlas.embedding.base_embedder import BaseEmbedder, RetryableEmbeddingError, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+_RETRYABLE_ERRORS = (RateLimitError, ServiceUnavailableError, ServerError, Timeout, APIConnectionError, TryAgain)
+
 
 class VoyageEmbedder(BaseEmbedder):
+    MAX_BATCH_INPUTS = 1000
+    # Voyage's limits are in tokens of its own tokenizer, the cl100k counts are kept below them by a margin
+    MAX_BATCH_TOKENS = int(120_000 * VOYAGE_TOKEN_MARGIN)
+    MAX_INPUT_TOKENS = int(32_000 * VOYAGE_TOKEN_MARGIN)
+
     def __init__(self, model_type):
         super().__init__(model_type)
-        self.client = voyageai.Client(max_retries=3)
-
-    def retrieve_embedding(self, chunks: List[Embedding]) -> List[Embedding]:
-        texts = [embed.chunk_text for embed in chunks]
+        # Retries are handled by the EmbeddingScheduler, which knows about the rate limits
+        self.client = get_voyage_client()
 
+    def request_embeddings(self, texts: List[str]) -> List[List[float]]:
         try:
-            time.sleep(0.05)  # for rate limiting, should be improved
             response = self.client.embed(
                 texts=texts,
                 model=self.model_type,
                 input_type="document"
             )
-            for chunk, embed in zip(chunks, response.embeddings):
-                chunk.embedding = embed
-            return chunks
-
-        except VoyageError as e:
-            for chunk in chunks:
-                chunk.errors.append({'source': 'embedding', 'error': str(e)})
-            return chunks
-
+        except _RETRYABLE_ERRORS as e:
+            raise RetryableEmbeddingError(str(e), parse_retry_after(e.headers)) from e
+        return response.embeddings
 
     def retrieve_embedding_for_query(self, query: str):
         try:
             result = self.client.embed(
                 texts=[query],
-                model=EMBED_MODEL,
+                model=self.model_type,
                 input_type="query"
             )
             return result.embeddings[0]
@@ -0,0 +1,159 @@
+import logging
+import sqlite3
+import traceback
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.chunking.chunk_pipeline import get_cached_chunker, process_files
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.chunking.manifest import ChunkManifest, ManifestDiff
+from atlas.config import CHUNK_BATCH_SIZE
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.lining.base_line_extractor import BaseLineExtractor, FileLines
+from atlas.lining.line_extractor_dispatcher import get_line_extractor
+from atlas.sqlite.lines_loader import LineLoader
+from atlas.sqlite.utils import bulk_load
+
+logger = logging.getLogger(__name__)
+
+# Line extractors are cached per process like the chunkers, None marks unsupported file types
+_line_extractors: Dict[Tuple[str, Path], Optional[BaseLineExtractor]] = {}
+
+
+@dataclass(slots=True)
+class FileIndexResult:
+    file_path: Path
+    chunks: List[CodeChunk] = field(default_factory=list)
+    file_lines: Optional[FileLines] = None
+    error: Optional[str] = None
+
+
+@dataclass(slots=True)
+class IndexStats:
+    added: int = 0
+    modified: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    chunks: int = 0
+    lines: int = 0
+    failed_files: List[Path] = field(default_factory=list)
+
+
+def _get_cached_line_extractor(file_path: Path, project_root: Path) -> Optional[BaseLineExtractor]:
+    key = (file_path.suffix.lower(), project_root)
+    if key not in _line_extractors:
+        try:
+            _line_extractors[key] = get_line_extractor(file_path, project_root)
+        except ValueError:
+            _line_extractors[key] = None
+    return _line_extractors[key]
+
+
+def index_file(file_path: Path, project_root: Path) -> FileIndexResult:
+    """
+    Reads and parses a file once and extracts both its chunks and its lines from the same tree.
+    File types without a line extractor are only chunked. Failures are captured in the result.
+    """
+    try:
+        chunker = get_cached_chunker(file_path, project_root)
+        line_extractor = _get_cached_line_extractor(file_path, project_root)
+        if line_extractor is None:
+            return FileIndexResult(file_path, chunker.extract_chunks_from_file(file_path))
+
+        src_bytes = file_path.read_bytes()
+        src_lines = src_bytes.decode("utf-8").splitlines()
+        root = line_extractor.parse(src_bytes).root_node
+        relative_file_path = file_path.relative_to(project_root)
+        return FileIndexResult(
+            file_path,
+            chunker.extract_chunks_from_tree(root, src_lines, relative_file_path),
+            line_extractor.extract_file_lines_from_tree(root, src_bytes, src_lines, relative_file_path),
+        )
+    except Exception:
+        return FileIndexResult(file_path, error=traceback.format_exc())
+
+
+def index_files(
+        files: Iterable[Path],
+        project_root: Path,
+        workers: int = 1,
+        batch_size: int = CHUNK_BATCH_SIZE,
+) -> Iterator[List[FileIndexResult]]:
+    """Indexes files, yielding per-file results in batches of roughly batch_size chunks."""
+    return process_files(index_file, files, project_root, workers, batch_size)
+
+
+def forget_changes(
+        manifest: ChunkManifest,
+        changes: ManifestDiff,
+        project_root: Path,
+        store: ChunkStore,
+        embedding_store: EmbeddingStore,
+) -> Set[str]:
+    """
+    Removes the deleted and modified files of a diff from the manifest and their chunks from the
+    store, and drops the embeddings of deleted files. Returns the chunk ids of the modified files:
+    their embeddings stay until the files are rechunked, chunks whose source did not change keep
+    their ids and reuse them.
+    """
+    for rel_path in changes.deleted:
+        chunk_ids = manifest.forget(rel_path)
+        store.delete_chunks(chunk_ids)
+        embedding_store.delete(chunk_ids)
+    replaced_ids = set()
+    for file_path in changes.modified:
+        chunk_ids = manifest.forget(str(file_path.relative_to(project_root)))
+        store.delete_chunks(chunk_ids)
+        replaced_ids.update(chunk_ids)
+    return replaced_ids
+
+
+def index_project(
+        files: Iterable[Path],
+        project_root: Path,
+        conn: sqlite3.Connection,
+        workers: int = 1,
+        full: bool = False,
+) -> IndexStats:
+    """
+    Incrementally indexes the files: only files changed since the last run are read, their
+    chunks go to the chunk store and their lines straight to the line tables. Chunks are
+    committed batch by batch, lines are loaded in one bulk transaction.
+    """
+    stats = IndexStats()
+    manifest = ChunkManifest.load()
+    with ChunkStore() as store, EmbeddingStore() as embedding_store, bulk_load(conn):
+        loader = LineLoader(conn)
+        changes = manifest.diff(files, project_root, full)
+        stats.added, stats.modified = len(changes.added), len(changes.modified)
+        stats.deleted, stats.unchanged = len(changes.deleted), changes.unchanged
+
+        replaced_ids = forget_changes(manifest, changes, project_root, store, embedding_store)
+        loader.delete_files(changes.deleted)
+
+        for batch in index_files(changes.changed_files, project_root, workers=workers):
+            batch_chunks = []
+            for result in batch:
+                if result.error:
+                    logger.info(f"Indexing of {result.file_path} failed:\n{result.error}")
+                    stats.failed_files.append(result.file_path)
+                    continue
+                batch_chunks.extend(result.chunks)
+                if result.file_lines is not None:
+                    loader.add_file(result.file_lines)
+                    stats.lines += len(result.file_lines.sources)
+                manifest.record(
+                    str(result.file_path.relative_to(project_root)),
+                    changes.fingerprints[result.file_path],
+                    [c.chunk_id for c in result.chunks]
+                )
+                replaced_ids.difference_update(c.chunk_id for c in result.chunks)
+            stats.chunks += store.put_chunks(batch_chunks)
+            store.commit()
+        embedding_store.delete(replaced_ids)
+        loader.finish()
+    manifest.save()
+    return stats
@@ -2,7 +2,9 @@ import requests
 import logging
 import re
 
-from atlas.config import JOERN_SERVER_URL
+from atlas.clients import get_joern_session
+from atlas.config import JOERN_SERVER_URL, JOERN_TIMEOUT
+from atlas.tracing import trace_span
 
 logger = logging.getLogger(__name__)
 ansi_escape_pattern = re.compile(r'\x1b\[[0-9;]*m')
@@ -12,7 +14,9 @@ def run_command(query: str):
         "query": query
     }
 
-    response = requests.post(JOERN_SERVER_URL, json=payload)
+    with trace_span("joern.query", query_chars=len(query)) as span:
+        response = get_joern_session().post(JOERN_SERVER_URL, json=payload, timeout=JOERN_TIMEOUT)
+        span.set(status=response.status_code, response_bytes=len(response.content))
     response.raise_for_status()
 
     try:
@@ -1,10 +1,10 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from pathlib import Path
 from dataclasses import dataclass
 
 @dataclass(slots=True)
 class Line:
-    line_id: str
+    line_id: str  # <file_name>:<file_line_no>, stable across extractions
     file_name: str
     source: str
     file_line_no: int
@@ -22,12 +22,45 @@ class Line:
         }
 
 @dataclass(slots=True)
-class LineContext:
-    """Container for context metadata attached to a single source line."""
+class ContextSpan:
+    """Run of consecutive lines sharing the same context, line numbers are 1-based and inclusive."""
+    start_line: int
+    end_line: int
     clazz: Optional[str] = None  # fully‑qualified class or enum or interface
     method: Optional[str] = None  # simple method name
 
 
+@dataclass(slots=True)
+class FileLines:
+    """Source lines of one file with their context run-length encoded as spans covering every line."""
+    file_name: str
+    sources: List[str]
+    spans: List[ContextSpan]
+
+    def iter_lines(self) -> Iterator[Line]:
+        for span in self.spans:
+            for line_no in range(span.start_line, span.end_line + 1):
+                yield Line(
+                    line_id=f"{self.file_name}:{line_no}",
+                    source=self.sources[line_no - 1],
+                    file_name=self.file_name,
+                    file_line_no=line_no,
+                    clazz=span.clazz,
+                    method=span.method,
+                )
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "file_path": self.file_name,
+            "sources": self.sources,
+            "spans": [[s.start_line, s.end_line, s.clazz, s.method] for s in self.spans],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "FileLines":
+        return cls(data["file_path"], data["sources"], [ContextSpan(*span) for span in data["spans"]])
+
+
 def read_source(path: Path) -> tuple[bytes, List[str]]:
     if not path.is_file():
         raise SystemExit(f"Error: File not found – {path}")
@@ -42,4 +75,20 @@ class BaseLineExtractor:
         self.project_root = project_root
 
     def extract_lines_from_file(self, file_path: Path) -> List[Line]:
+        raise NotImplementedError
+
+    def extract_file_lines(self, file_path: Path) -> FileLines:
+        raise NotImplementedError
+
+    def parse(self, src_bytes: bytes):
+        """Parses the source once, for extract_file_lines_from_tree and the matching chunker."""
+        raise NotImplementedError
+
+    def extract_file_lines_from_tree(
+            self,
+            root,
+            src_bytes: bytes,
+            src_lines: List[str],
+            relative_file_path: Path,
+    ) -> FileLines:
         raise NotImplementedError
\ No newline at end of file
@@ -1,25 +1,41 @@
+import bisect
+import heapq
 import tree_sitter_java
-import uuid
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
-from tree_sitter import Language, Node, Parser
+from typing import List, Optional, Tuple
+from tree_sitter import Language, Node, Parser, Query, QueryCursor, Tree
 
-from atlas.lining.base_line_extractor import LineContext, Line, BaseLineExtractor, read_source
+from atlas.lining.base_line_extractor import ContextSpan, FileLines, Line, BaseLineExtractor, read_source
 
 JAVA_LANGUAGE = Language(tree_sitter_java.language())
 parser = Parser(JAVA_LANGUAGE)
+# Every node that can claim lines, the walk only descends into subtrees containing one
+DECLARATION_QUERY = Query(
+    JAVA_LANGUAGE,
+    "[(class_declaration) (interface_declaration) (enum_declaration) (method_declaration)] @declaration"
+)
 
 
 @dataclass(slots=True)
 class JavaContextExtractor:
-    """Walks a tree‑sitter syntax tree and fills a list[LineContext]."""
+    """
+    Walks a tree‑sitter syntax tree and computes which class and method own each line,
+    as run-length encoded spans.
+
+    Declarations, methods and their Javadoc claim their whole line span, and nodes that continue
+    a line on which a nested declaration ended claim that line back for the enclosing class.
+    Later claims win; class and method are resolved independently in one sweep over the claims,
+    so the cost no longer depends on span length or nesting depth.
+    """
 
     source_bytes: bytes
     source_lines: List[str]
     package_name: Optional[str] = None
-    _line_ctx: List[LineContext] = field(init=False, repr=False)
+    _class_claims: List[Tuple[int, int, str]] = field(init=False, repr=False)
+    _method_claims: List[Tuple[int, int, str]] = field(init=False, repr=False)
+    _declaration_starts: List[int] = field(init=False, repr=False)
 
     # Pre‑computed lookup tables – class attrs for speed & memory
     _DECLARATIONS = {
@@ -32,15 +48,23 @@ class JavaContextExtractor:
         "interface_body",
         "enum_body_declarations",
     }
+    _DOCUMENTED = _DECLARATIONS | {"method_declaration"}
 
     # Public ---------------------------------------------------------------
-    def extract(self, root: Node) -> List[LineContext]:
-        """Returns a list whose length == len(source_lines)."""
+    def extract(self, root: Node) -> List[ContextSpan]:
+        """Returns spans covering every source line, in line order."""
 
-        self._line_ctx = [LineContext() for _ in self.source_lines]
+        self._class_claims = []
+        self._method_claims = []
+        captures = QueryCursor(DECLARATION_QUERY).captures(root)
+        self._declaration_starts = sorted(node.start_byte for node in captures.get("declaration", []))
         self._discover_package_name(root)
-        self._visit(root, None, None)
-        return self._line_ctx
+        self._walk(root)
+        line_count = len(self.source_lines)
+        return _merge_runs(
+            _resolve(self._class_claims, line_count),
+            _resolve(self._method_claims, line_count),
+        )
 
     # Internal -------------------------------------------------------------
     def _discover_package_name(self, root: Node) -> None:
@@ -55,87 +79,83 @@ class JavaContextExtractor:
         if name_node:
             self.package_name = self._text(name_node)
 
-    # Recursive DFS traversal
-    def _visit(
-            self,
-            node: Node,
-            fq_class: Optional[str],
-            method: Optional[str],
-    ) -> None:
-        node_type = node.type
-        new_fq_class, new_method = fq_class, method
-
-        # ---------------- Determine context for *this* node -------------
-        if node_type in self._DECLARATIONS:
-            name_node = node.child_by_field_name("name")
-            if name_node:  # skip anonymous classes
-                simple = self._text(name_node)
-                new_fq_class = (
-                    f"{fq_class}.{simple}"
-                    if fq_class
-                    else f"{self.package_name}.{simple}" if self.package_name else simple
-                )
-                new_method = None  # entering a new class scope resets method
-
-        elif node_type == "method_declaration":
-            name_node = node.child_by_field_name("name")
-            if name_node:
-                new_method = self._text(name_node)
-
-        # -------------- Apply context to the node's own line span -------
-        self._set_context(node, new_fq_class, new_method)
-
-        # -------------- Special handling for class bodies ---------------
-        children = node.children
-        if node_type in self._DECLARATIONS:
-            body = node.child_by_field_name("body")
-            if body and body.type in self._CONTAINERS:
-                children = body.children
-
-        # Detect Javadoc immediately preceding method or class/interface/enum
-        prev: Optional[Node] = None
-        for child in children:
+    # Iterative pre-order DFS, the claim order is the visiting order
+    def _walk(self, root: Node) -> None:
+        stack: List[Tuple[Node, Optional[str], Optional[Node]]] = [(root, None, None)]
+        while stack:
+            node, fq_class, prev = stack.pop()
+            node_type = node.type
+
+            # Javadoc immediately preceding a method or class/interface/enum
             if (
                     prev
                     and prev.type == "block_comment"
-                    and child.type in {"class_declaration", "interface_declaration", "enum_declaration",
-                                       "method_declaration"}
+                    and node_type in self._DOCUMENTED
                     and self._is_javadoc(prev)
-                    and prev.end_byte <= child.start_byte  # contiguous after whitespace
             ):
-                name_node = child.child_by_field_name("name")
+                name_node = node.child_by_field_name("name")
                 if name_node:
                     simple = self._text(name_node)
-                    if child.type == "method_declaration":
-                        # Associate with method
-                        self._set_context(prev, new_fq_class, simple)
+                    if node_type == "method_declaration":
+                        self._claim(prev, fq_class, simple)
                     else:
-                        # Associate with class/interface/enum
-                        fq_child_class = (
-                            f"{new_fq_class}.{simple}"
-                            if new_fq_class
-                            else f"{self.package_name}.{simple}" if self.package_name else simple
-                        )
-                        self._set_context(prev, fq_child_class, None)
+                        self._claim(prev, self._qualify(fq_class, simple), None)
+
+            # ---------------- Determine context for *this* node -------------
+            new_fq_class = fq_class
+            if node_type in self._DECLARATIONS:
+                name_node = node.child_by_field_name("name")
+                if name_node:  # skip anonymous classes
+                    new_fq_class = self._qualify(fq_class, self._text(name_node))
+                self._claim(node, new_fq_class, None)
+            elif node_type == "method_declaration":
+                name_node = node.child_by_field_name("name")
+                self._claim(node, fq_class, self._text(name_node) if name_node else None)
+            elif fq_class and prev and prev.end_point[0] == node.start_point[0]:
+                # Only this node's first line can have been claimed by an earlier sibling
+                row = node.start_point[0]
+                self._class_claims.append((row, row, fq_class))
+
+            # Nothing below can claim a line differently from this node
+            if not self._contains_declaration(node):
+                continue
+
+            # -------------- Special handling for class bodies ---------------
+            children = node.children
+            if node_type in self._DECLARATIONS:
+                body = node.child_by_field_name("body")
+                if body and body.type in self._CONTAINERS:
+                    children = body.children
 
             # Recurse – class context carries over; method resets for new child
-            self._visit(child, new_fq_class, None)
-            prev = child
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], new_fq_class, children[i - 1] if i else None))
 
     # Helpers -------------------------------------------------------------
-    def _set_context(
+    def _claim(
             self,
             node: Node,
             fq_class: Optional[str],
             method: Optional[str],
     ) -> None:
         start, end = node.start_point[0], node.end_point[0]
-        for line_no in range(start, min(end + 1, len(self._line_ctx))):
-            ctx = self._line_ctx[line_no]
-            if fq_class:
-                ctx.clazz = fq_class
-            if method:
-                ctx.method = method
+        if fq_class:
+            self._class_claims.append((start, end, fq_class))
+        if method:
+            self._method_claims.append((start, end, method))
+
+    def _contains_declaration(self, node: Node) -> bool:
+        if node.type in self._DOCUMENTED:
+            # The node itself is in the list, only look past its start
+            i = bisect.bisect_right(self._declaration_starts, node.start_byte)
+        else:
+            i = bisect.bisect_left(self._declaration_starts, node.start_byte)
+        return i < len(self._declaration_starts) and self._declaration_starts[i] < node.end_byte
+
+    def _qualify(self, fq_class: Optional[str], simple: str) -> str:
+        if fq_class:
+            return f"{fq_class}.{simple}"
+        return f"{self.package_name}.{simple}" if self.package_name else simple
 
     def _text(self, node: Node) -> str:
         return self.source_bytes[node.start_byte: node.end_byte].decode("utf‑8")
@@ -145,28 +165,81 @@ class JavaContextExtractor:
         return node.start_byte < node.end_byte and node.text.startswith(b"/**")
 
 
+def _resolve(claims: List[Tuple[int, int, str]], line_count: int) -> List[Tuple[int, int, Optional[str]]]:
+    """
+    Resolves (start_row, end_row, value) claims, where later claims win, into runs
+    (start_row, end_row, value) covering rows 0..line_count-1, None where nothing was claimed.
+    """
+    order = sorted(range(len(claims)), key=lambda i: claims[i][0])
+    active: List[Tuple[int, int]] = []  # heap of (-claim index, end row)
+    runs: List[Tuple[int, int, Optional[str]]] = []
+    k = 0
+    row = 0
+    while row < line_count:
+        while k < len(order) and claims[order[k]][0] <= row:
+            heapq.heappush(active, (-order[k], claims[order[k]][1]))
+            k += 1
+        while active and active[0][1] < row:
+            heapq.heappop(active)
+        next_start = min(claims[order[k]][0], line_count) if k < len(order) else line_count
+        if active:
+            value = claims[-active[0][0]][2]
+            stop = min(active[0][1] + 1, next_start)
+        else:
+            value = None
+            stop = next_start
+        if runs and runs[-1][2] == value:
+            runs[-1] = (runs[-1][0], stop - 1, value)
+        else:
+            runs.append((row, stop - 1, value))
+        row = stop
+    return runs
+
+
+def _merge_runs(
+        class_runs: List[Tuple[int, int, Optional[str]]],
+        method_runs: List[Tuple[int, int, Optional[str]]],
+) -> List[ContextSpan]:
+    """Overlays class and method runs into 1-based spans."""
+    spans: List[ContextSpan] = []
+    i = j = 0
+    row = 0
+    while i < len(class_runs) and j < len(method_runs):
+        (_, class_end, clazz), (_, method_end, method) = class_runs[i], method_runs[j]
+        end = min(class_end, method_end)
+        spans.append(ContextSpan(row + 1, end + 1, clazz, method))
+        row = end + 1
+        if class_end == end:
+            i += 1
+        if method_end == end:
+            j += 1
+    return spans
+
+
 class JavaLineExtractor(BaseLineExtractor):
     def __init__(self, project_root: Path):
         super().__init__(project_root)
 
+    def parse(self, src_bytes: bytes) -> Tree:
+        return parser.parse(src_bytes)
+
     def extract_lines_from_file(self, file_path: Path) -> List[Line]:
+        return list(self.extract_file_lines(file_path).iter_lines())
+
+    def extract_file_lines(self, file_path: Path) -> FileLines:
         src_bytes, src_lines = read_source(file_path)
         tree = parser.parse(src_bytes)
+        return self.extract_file_lines_from_tree(
+            tree.root_node, src_bytes, src_lines, file_path.relative_to(self.project_root)
+        )
 
-        extractor = JavaContextExtractor(src_bytes, src_lines)
-        line_ctx = extractor.extract(tree.root_node)
-
-        relative_file_path = file_path.relative_to(self.project_root)
-        result = []
-        for i, (src_line, ctx) in enumerate(zip(src_lines, line_ctx)):
-            result.append(
-                Line(
-                    line_id=str(uuid.uuid4()),
-                    source=src_line,
-                    file_name=str(relative_file_path),
-                    file_line_no=i + 1,
-                    clazz=ctx.clazz,
-                    method=ctx.method,
-                )
-            )
-        return result
+    def extract_file_lines_from_tree(
+            self,
+            root: Node,
+            src_bytes: bytes,
+            src_lines: List[str],
+            relative_file_path: Path,
+    ) -> FileLines:
+        """Extracts lines of an already parsed file, root must be parsed from src_bytes."""
+        spans = JavaContextExtractor(src_bytes, src_lines).extract(root)
+        return FileLines(str(relative_file_path), src_lines, spans)
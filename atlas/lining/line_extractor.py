@@ -1,11 +1,9 @@
+import hashlib
 import logging
-import uuid
 import json
 
-from typing import List
-
 from atlas.config import LINES_DIR
-from atlas.lining.base_line_extractor import Line
+from atlas.lining.base_line_extractor import FileLines
 
 logger = logging.getLogger(__name__)
 
@@ -14,13 +12,11 @@ def ensure_line_dir():
     LINES_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def save_lines_to_file(lines: List[Line]):
+def save_lines_to_file(file_lines: FileLines):
+    """Writes the lines of a source file, replacing the file written by a previous extraction."""
     ensure_line_dir()
-    file_id = str(uuid.uuid4())
-    data = [line.as_json() for line in lines]
+    file_id = hashlib.blake2b(file_lines.file_name.encode("utf-8"), digest_size=8).hexdigest()
     filename = f"lines_{file_id}.json"
     path = LINES_DIR / filename
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-
+        json.dump(file_lines.as_json(), f, indent=2)
@@ -1,54 +1,139 @@
-import json
 import logging
 import numpy as np
 
-from typing import List
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
-from atlas.config import QDRANT_COLLECTION, QDRANT_DIM, QDRANT_PATH, CHUNK_DIR
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, List, Tuple
+from qdrant_client.models import PointStruct, PointIdsList, Distance, VectorParams
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.clients import get_qdrant_client
+from atlas.config import QDRANT_COLLECTION, QDRANT_DIM, QDRANT_BATCH_SIZE, QDRANT_UPSERT_WORKERS
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.qdrant.search_cache import bump_collection_version, search_points
 
-client = QdrantClient(path=QDRANT_PATH)
 logger = logging.getLogger(__name__)
 
 
-def ensure_qdrant_collection():
+def ensure_qdrant_collection() -> bool:
+    """Creates the collection if it is missing, returns whether it was created."""
+    client = get_qdrant_client()
     existing = client.get_collections().collections
     if QDRANT_COLLECTION not in [col.name for col in existing]:
         client.recreate_collection(
             collection_name=QDRANT_COLLECTION,
             vectors_config=VectorParams(size=QDRANT_DIM, distance=Distance.COSINE)
         )
+        return True
+    return False
 
 
-def load_chunks_to_qdrant():
-    ensure_qdrant_collection()
-    records = []
-    for chunk_file in CHUNK_DIR.glob("*.json"):
-        with open(chunk_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if len(data.get('errors', [])) == 0:
-            records.append(PointStruct(
-                id=data['chunk_id'],
-                vector=np.array(data['embedding'], dtype=np.float32).tolist(),
-                payload={
-                    "type": data['type'],
-                    "name": data['name'],
-                    "chunk_no": data['chunk_no'],
-                    "start_line": data['start_line'],
-                    "end_line": data['end_line'],
-                    "file_path": data['file_path'],
-                    "source": data['source'],
-                }
-            ))
-    client.upsert(collection_name=QDRANT_COLLECTION, points=records)
-    logger.info(f"Indexed {len(records)} chunks into Qdrant.")
+def _to_point(data: dict, embedding_store: EmbeddingStore) -> PointStruct:
+    return PointStruct(
+        id=data['chunk_id'],
+        vector=embedding_store.get(data['chunk_id']).astype(np.float32).tolist(),
+        payload={
+            "type": data['type'],
+            "name": data['name'],
+            "chunk_no": data['chunk_no'],
+            "start_line": data['start_line'],
+            "end_line": data['end_line'],
+            "file_path": data['file_path'],
+            "source": data['source'],
+        }
+    )
+
+
+def iter_point_batches(
+        store: ChunkStore,
+        embedding_store: EmbeddingStore,
+        batch_size: int,
+) -> Iterator[Tuple[List[PointStruct], List[Tuple[str, str]]]]:
+    """
+    Yields batches of points for embedded chunks that are missing or outdated in Qdrant,
+    along with the (chunk_id, source_hash) pairs to checkpoint once the batch is upserted.
+    """
+    points, keys = [], []
+    for data in store.iter_unloaded_chunks():
+        if not embedding_store.has(data['chunk_id'], data['source_hash']):
+            continue
+        points.append(_to_point(data, embedding_store))
+        keys.append((data['chunk_id'], data['source_hash']))
+        if len(points) >= batch_size:
+            yield points, keys
+            points, keys = [], []
+    if points:
+        yield points, keys
+
+
+def is_local_client(client) -> bool:
+    """Whether the client runs Qdrant in this process, on a path or in memory, rather than against a server."""
+    options = getattr(client, "init_options", {})
+    return options.get("path") is not None or options.get("location") == ":memory:"
+
+
+def _upsert(points: List[PointStruct], keys: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    get_qdrant_client().upsert(collection_name=QDRANT_COLLECTION, points=points, wait=True)
+    return keys
+
+
+def load_chunks_to_qdrant(
+        batch_size: int = QDRANT_BATCH_SIZE,
+        workers: int = QDRANT_UPSERT_WORKERS,
+        full: bool = False,
+) -> int:
+    """
+    Streams points into Qdrant in batches, with up to `workers` upserts in flight. Every finished
+    batch is checkpointed in the chunk store, so a rerun only upserts points whose source changed
+    and resumes where a failed run stopped. Points of removed chunks are deleted.
+    """
+    created = ensure_qdrant_collection()
+    # The storage of a local client takes one write transaction at a time, only a server is written concurrently
+    if workers > 1 and is_local_client(get_qdrant_client()):
+        workers = 1
+    loaded = 0
+    with ChunkStore() as store, EmbeddingStore() as embedding_store:
+        if created or full:
+            store.clear_points()
+
+        stale = store.stale_points()
+        if stale:
+            get_qdrant_client().delete(
+                collection_name=QDRANT_COLLECTION, points_selector=PointIdsList(points=stale), wait=True
+            )
+            store.forget_points(stale)
+            store.commit()
+            logger.info(f"Deleted {len(stale)} points of removed chunks from Qdrant.")
+        indexed = store.index_loaded_chunks()
+        if indexed:
+            store.commit()
+            logger.info(f"Added {indexed} previously loaded chunks to the lexical index.")
+
+        batches = iter_point_batches(store, embedding_store, batch_size)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrant") as executor:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < workers:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(_upsert, *batch))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    keys = future.result()
+                    store.mark_loaded(keys)
+                    store.commit()
+                    loaded += len(keys)
+                    logger.info(f"Upserted {loaded} points into Qdrant.")
+
+    if created or stale or loaded:
+        bump_collection_version()
+    logger.info(f"Indexed {loaded} chunks into Qdrant.")
+    return loaded
 
 
 def execute_qdrant_query(embedding: List[float], limit: int):
-    result = client.query_points(
-        collection_name=QDRANT_COLLECTION,
-        query=embedding,
-        limit=limit
-    )
-    return result.points
+    return search_points(get_qdrant_client(), embedding, limit)
 
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from atlas.chunking.chunk_store import get_payloads, prepare_chunk_store, search_lexical
+from atlas.clients import get_qdrant_client
+from atlas.config import (
+    CHUNK_STORE_PATH, EMBED_MODEL, EMBED_PROVIDER, HYBRID_CANDIDATES_FACTOR, HYBRID_RRF_K, QDRANT_COLLECTION
+)
+from atlas.embedding.query_cache import embed_query
+from atlas.qdrant.search_cache import search_points
+from atlas.sqlite.utils import ReadConnectionPool
+from atlas.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+# Queries that are a (qualified) code identifier, like OrderService.applyDiscount or order_total
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*(\.[A-Za-z_$][\w$]*)*")
+
+_lexical_pool = ReadConnectionPool(CHUNK_STORE_PATH, prepare=prepare_chunk_store)
+# Lexical searches run next to the embedding request and the vector search of the calling thread
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+
+
+@dataclass(slots=True)
+class SearchHit:
+    id: str
+    score: float  # reciprocal-rank fusion score
+    payload: Dict[str, Any]
+    vector_rank: Optional[int] = None
+    lexical_rank: Optional[int] = None
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = HYBRID_RRF_K) -> List[Tuple[str, float]]:
+    """Fuses rankings of ids, each id scoring the sum of 1 / (k + rank) over the rankings it is in."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, hit_id in enumerate(ranking, 1):
+            scores[hit_id] = scores.get(hit_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def is_identifier(query: str) -> bool:
+    query = query.strip()
+    return (_IDENTIFIER.fullmatch(query) is not None
+            and ("." in query or "_" in query or query[1:] != query[1:].lower()))
+
+
+def lexical_search(query: str, limit: int) -> List[str]:
+    """Ids of the loaded chunks best matching the terms of query, empty if the lexical index fails."""
+    with trace_span("lexical.search", limit=limit) as span:
+        try:
+            ids = [chunk_id for chunk_id, _ in search_lexical(_lexical_pool.get(), query, limit)]
+        except Exception as e:
+            logger.warning(f"Lexical search failed: {e}")
+            ids = []
+        span.set(results=len(ids))
+        return ids
+
+
+def _hits(fused: List[Tuple[str, float]], vector_ids: List[str], lexical_ids: List[str],
+          payloads: Dict[str, Dict]) -> List[SearchHit]:
+    vector_ranks = {hit_id: rank for rank, hit_id in enumerate(vector_ids, 1)}
+    lexical_ranks = {hit_id: rank for rank, hit_id in enumerate(lexical_ids, 1)}
+    missing = [hit_id for hit_id, _ in fused if hit_id not in payloads]
+    if missing:
+        payloads.update(get_payloads(_lexical_pool.get(), missing))
+    return [
+        SearchHit(hit_id, score, payloads[hit_id], vector_ranks.get(hit_id), lexical_ranks.get(hit_id))
+        for hit_id, score in fused if hit_id in payloads
+    ]
+
+
+def hybrid_search(
+        query: str,
+        limit: int = 10,
+        client=None,
+        collection: str = QDRANT_COLLECTION,
+        provider: str = EMBED_PROVIDER,
+        model: str = EMBED_MODEL,
+) -> List[SearchHit]:
+    """
+    Searches the loaded chunks lexically (BM25 over names and sources) and by embedding in
+    parallel and fuses both rankings with reciprocal-rank fusion. A query naming an identifier
+    that a chunk is named after is answered lexically, without an embedding request. When the
+    vector search fails the lexical results are returned alone.
+    """
+    candidates = limit * HYBRID_CANDIDATES_FACTOR
+    with trace_span("hybrid.search", limit=limit) as span:
+        if is_identifier(query):
+            lexical_ids = lexical_search(query, candidates)
+            payloads = get_payloads(_lexical_pool.get(), lexical_ids[:limit]) if lexical_ids else {}
+            names = {query.strip(), query.strip().rsplit(".", 1)[-1]}
+            if any(payload["name"] in names for payload in payloads.values()):
+                span.set(mode="lexical")
+                return _hits(reciprocal_rank_fusion([lexical_ids[:limit]]), [], lexical_ids, payloads)
+            lexical = None
+        else:
+            lexical = _executor.submit(copy_context().run, lexical_search, query, candidates)
+
+        try:
+            embedding = embed_query(query, provider, model)
+            if embedding is None:
+                raise ValueError("no embedding returned")
+            points = search_points(client or get_qdrant_client(), embedding, candidates, collection=collection)
+            vector_error = None
+        except Exception as e:
+            points, vector_error = [], e
+        if lexical is not None:
+            lexical_ids = lexical.result()
+        if vector_error is not None:
+            if not lexical_ids:
+                raise vector_error
+            logger.warning(f"Vector search failed, returning lexical results only: {vector_error}")
+
+        vector_ids = [str(point.id) for point in points]
+        payloads = {str(point.id): point.payload for point in points}
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids])[:limit]
+        span.set(mode="hybrid", vector_results=len(vector_ids), lexical_results=len(lexical_ids))
+        return _hits(fused, vector_ids, lexical_ids, payloads)
+
+
+atexit.register(_lexical_pool.close)
@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from atlas.config import QDRANT_COLLECTION, QDRANT_SEARCH_CACHE_SIZE, QDRANT_VERSION_PATH
+from atlas.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+
+def collection_version(path: Path = QDRANT_VERSION_PATH) -> str:
+    """Version of the collection's content, empty if no load recorded one yet."""
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def bump_collection_version(path: Path = QDRANT_VERSION_PATH) -> str:
+    """Records that the collection changed, invalidating cached results in every process."""
+    version = str(time.time_ns())
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(version, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return version
+
+
+class SearchResultCache:
+    """
+    Thread-safe LRU cache of search results keyed by (collection, embedding hash, limit, filter).
+    All entries are dropped when the collection version changes, which the Qdrant loader bumps
+    after every load that modified the collection.
+    """
+
+    def __init__(self, max_entries: int = QDRANT_SEARCH_CACHE_SIZE, version_path: Path = QDRANT_VERSION_PATH):
+        self.max_entries = max_entries
+        self.version_path = version_path
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._version: Optional[str] = None
+        self._entries: OrderedDict[Hashable, List[Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(collection: str, embedding: List[float], limit: int, query_filter: Any = None) -> Tuple:
+        digest = hashlib.blake2b(np.asarray(embedding, dtype=np.float32).tobytes(), digest_size=16).digest()
+        filter_key = query_filter.model_dump_json() if query_filter is not None else None
+        return collection, digest, limit, filter_key
+
+    def get(self, key: Hashable, version: str) -> Optional[List[Any]]:
+        """Cached results for key, version is the current collection version."""
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._version = version
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def put(self, key: Hashable, results: List[Any], version: str):
+        """Stores results computed while the collection was at version, unless it changed since."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = list(results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+search_cache = SearchResultCache()
+
+
+def search_points(client, embedding: List[float], limit: int, query_filter: Any = None,
+                  collection: str = QDRANT_COLLECTION) -> List[Any]:
+    """Nearest points of the collection, served from the search result cache when possible."""
+    with trace_span("qdrant.search", collection=collection, limit=limit) as span:
+        key = search_cache.make_key(collection, embedding, limit, query_filter)
+        version = collection_version(search_cache.version_path)
+        results = search_cache.get(key, version)
+        span.set(cached=results is not None)
+        if results is None:
+            results = client.query_points(
+                collection_name=collection,
+                query=embedding,
+                query_filter=query_filter,
+                limit=limit
+            ).points
+            search_cache.put(key, results, version)
+        span.set(results=len(results))
+        return results
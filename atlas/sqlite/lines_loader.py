@@ -1,58 +1,186 @@
 import json
 import logging
+import sqlite3
 
 from datetime import datetime, timezone
-from typing import Dict, Tuple, Any, List
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
 
-from atlas.config import LINES_DIR
-from atlas.sqlite.utils import get_db_connection
+from atlas.config import LINES_DIR, LINE_LOAD_BATCH_SIZE
+from atlas.lining.base_line_extractor import ContextSpan, FileLines
+from atlas.sqlite.utils import get_db_connection, bulk_load
 
 logger = logging.getLogger(__name__)
 
 
-def insert_line_record(conn: Any, lines: List[Dict]) -> Tuple[bool, str]:
-    try:
-        cur = conn.cursor()
-        for line in lines:
-            cur.execute(
-                """INSERT INTO lines 
-                   (line_id,
-                    parent_type,
-                    parent_method,
-                    file_line_no,
-                    file_path,
-                    source,
-                    created_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    line['line_id'],
-                    line['parent_type'],
-                    line['parent_method'],
-                    line['file_line_no'],
-                    line['file_path'],
-                    line['source'],
-                    datetime.now(timezone.utc).isoformat()
-                )
-            )
-        conn.commit()
-
-        return False, ''
-    except Exception as e:
-        return True, str(e)
-
-
-def load_lines_to_sqlite():
-    count = 0
+def records_to_file_lines(lines: List[Dict]) -> FileLines:
+    """Converts the per-line layout of Line.as_json(), used by lines files of older versions."""
+    lines = sorted(lines, key=lambda line: line['file_line_no'])
+    spans: List[ContextSpan] = []
+    for line in lines:
+        no, clazz, method = line['file_line_no'], line['parent_type'], line['parent_method']
+        if spans and spans[-1].end_line == no - 1 and (spans[-1].clazz, spans[-1].method) == (clazz, method):
+            spans[-1].end_line = no
+        else:
+            spans.append(ContextSpan(no, no, clazz, method))
+    return FileLines(lines[0]['file_path'] if lines else "", [line['source'] for line in lines], spans)
+
+
+def _declarations(spans: List[ContextSpan]) -> Tuple[Dict[str, List[int]], List[List], List[Tuple]]:
+    """
+    Derives the line spans of the types and methods of a file from its context spans. A method
+    span continues across lines owned by methods nested in it, like those of anonymous classes,
+    and ends at the first line outside of any method. Returns the types by name as [start, end],
+    the methods as [type name, name, start, end] and the context spans as
+    (start, end, type name, method index).
+    """
+    types: Dict[str, List[int]] = {}
+    methods: List[List] = []
+    refs: List[Tuple] = []
+    open_methods: Dict[Tuple[str, str], int] = {}
+    for span in spans:
+        if span.clazz is not None:
+            extent = types.setdefault(span.clazz, [span.start_line, span.end_line])
+            extent[1] = span.end_line
+        index = None
+        if span.method is None:
+            open_methods.clear()
+        else:
+            index = open_methods.get((span.clazz, span.method))
+            if index is None:
+                index = open_methods[(span.clazz, span.method)] = len(methods)
+                methods.append([span.clazz, span.method, span.start_line, span.end_line])
+            else:
+                methods[index][3] = span.end_line
+        refs.append((span.start_line, span.end_line, span.clazz, index))
+    return types, methods, refs
+
+
+class LineLoader:
+    """
+    Streams the lines of source files into the span tables, replacing what was previously loaded
+    for the same files. Line texts are written in batches. Meant to run inside bulk_load(conn).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, batch_size: int = LINE_LOAD_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        # Computed once, every file of a load shares it
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.files = 0
+        self.replaced = 0
+        self._texts: List[Tuple] = []
+        self._buffered_files: Set[int] = set()
+        self._next_type_id = conn.execute("SELECT COALESCE(MAX(type_id), 0) + 1 FROM types").fetchone()[0]
+        self._next_method_id = conn.execute("SELECT COALESCE(MAX(method_id), 0) + 1 FROM methods").fetchone()[0]
+
+    def add_file(self, file_lines: FileLines):
+        file_id = self._replace_file(file_lines.file_name, len(file_lines.sources))
+        types, methods, refs = _declarations(file_lines.spans)
+
+        type_ids = {}
+        for name in types:
+            type_ids[name] = self._next_type_id
+            self._next_type_id += 1
+        method_ids = list(range(self._next_method_id, self._next_method_id + len(methods)))
+        self._next_method_id += len(methods)
+
+        self.conn.executemany(
+            "INSERT INTO types (type_id, file_id, name, start_line, end_line) VALUES (?, ?, ?, ?, ?)",
+            ((type_ids[name], file_id, name, start, end) for name, (start, end) in types.items())
+        )
+        self.conn.executemany(
+            "INSERT INTO methods (method_id, file_id, type_id, name, start_line, end_line) VALUES (?, ?, ?, ?, ?, ?)",
+            ((method_id, file_id, type_ids.get(clazz), name, start, end)
+             for method_id, (clazz, name, start, end) in zip(method_ids, methods))
+        )
+        self.conn.executemany(
+            "INSERT INTO line_spans (file_id, start_line, end_line, type_id, method_id) VALUES (?, ?, ?, ?, ?)",
+            ((file_id, start, end, type_ids.get(clazz), None if index is None else method_ids[index])
+             for start, end, clazz, index in refs)
+        )
+        self._texts.extend((file_id, no, source) for no, source in enumerate(file_lines.sources, 1))
+        self._buffered_files.add(file_id)
+        self.files += 1
+        if len(self._texts) >= self.batch_size:
+            self._flush()
+
+    def add_records(self, lines: List[Dict]):
+        """Adds the lines of one source file, in the layout of Line.as_json()."""
+        if lines:
+            self.add_file(records_to_file_lines(lines))
+
+    def _replace_file(self, file_path: str, line_count: int) -> int:
+        """Returns the id of the file, deleting everything previously loaded for it."""
+        row = self.conn.execute("SELECT file_id FROM files WHERE file_path = ?", (file_path,)).fetchone()
+        if row is None:
+            return self.conn.execute(
+                "INSERT INTO files (file_path, line_count, created_at) VALUES (?, ?, ?)",
+                (file_path, line_count, self.created_at)
+            ).lastrowid
+        file_id = row[0]
+        if file_id in self._buffered_files:
+            # Added more than once in this load
+            self._flush()
+        self._delete_contents(file_id)
+        self.conn.execute("UPDATE files SET line_count = ?, created_at = ? WHERE file_id = ?",
+                          (line_count, self.created_at, file_id))
+        return file_id
+
+    def _delete_contents(self, file_id: int):
+        self.replaced += self.conn.execute("DELETE FROM line_text WHERE file_id = ?", (file_id,)).rowcount
+        for table in ("line_spans", "methods", "types"):
+            self.conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+    def delete_files(self, file_paths: Iterable[str]):
+        """Removes source files that no longer exist."""
+        self._flush()
+        for file_path in file_paths:
+            row = self.conn.execute("SELECT file_id FROM files WHERE file_path = ?", (file_path,)).fetchone()
+            if row is not None:
+                self._delete_contents(row[0])
+                self.conn.execute("DELETE FROM files WHERE file_id = ?", (row[0],))
+
+    def finish(self) -> int:
+        """Writes the remaining lines, returns the number of replaced lines."""
+        self._flush()
+        return self.replaced
+
+    def _flush(self):
+        self.conn.executemany("INSERT INTO line_text (file_id, line_no, source) VALUES (?, ?, ?)", self._texts)
+        self._texts = []
+        self._buffered_files.clear()
+
+
+def load_lines_to_sqlite(
+        conn: sqlite3.Connection = None,
+        lines_dir: Path = LINES_DIR,
+        batch_size: int = LINE_LOAD_BATCH_SIZE,
+) -> Tuple[int, int]:
+    """
+    Bulk loads every lines file in a single transaction, replacing the lines previously loaded
+    for the same source files. Returns the (files, errors) counts.
+    """
+    conn = conn or get_db_connection()
     errors = 0
-    with get_db_connection() as conn:
-        for line_file in LINES_DIR.glob("*.json"):
-            with open(line_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                count += 1
-                is_error, error = insert_line_record(conn, data)
-                if is_error:
-                    errors += 1
-                    logger.error(error)
-
-    logger.info(f"Inserted {count} files into SQLite. {errors} files finished with error")
\ No newline at end of file
+    # Oldest first, so the latest extraction of a source file wins
+    line_files = sorted(lines_dir.glob("*.json"), key=lambda p: p.stat().st_mtime_ns)
+
+    with bulk_load(conn):
+        loader = LineLoader(conn, batch_size)
+        for line_file in line_files:
+            try:
+                with open(line_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    loader.add_records(data)
+                else:
+                    loader.add_file(FileLines.from_json(data))
+            except (OSError, ValueError, KeyError) as e:
+                errors += 1
+                logger.error(f"{line_file}: {e}")
+        replaced = loader.finish()
+
+    logger.info(f"Inserted {loader.files} files into SQLite, replacing {replaced} previously loaded lines. "
+                f"{errors} files finished with error")
+    return loader.files, errors
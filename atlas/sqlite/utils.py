@@ -1,8 +1,16 @@
 import logging
+import os
 import sqlite3
+import threading
+import time
 import atexit
 
-from atlas.config import DB_PATH
+from contextlib import contextmanager
+
+from pathlib import Path
+from typing import Any, Callable, List
+
+from atlas.config import DB_PATH, DB_VERSION_PATH, SQLITE_MMAP_SIZE
 
 _connection = None
 
@@ -21,23 +29,208 @@ CREATE TABLE IF NOT EXISTS lines (
 );
 """
 
+# Lines are stored per file: the text keyed by (file_id, line_no), and the class and method
+# owning each line as run-length encoded spans referencing the types and methods tables
+SPAN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    file_path TEXT NOT NULL UNIQUE,  -- relative to the project directory
+    line_count INTEGER NOT NULL,
+    created_at TEXT
+);
+CREATE TABLE IF NOT EXISTS types (
+    type_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,              -- fully qualified type name
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_types_file ON types(file_id);
+CREATE TABLE IF NOT EXISTS methods (
+    method_id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    type_id INTEGER,                 -- NULL for methods outside any named type
+    name TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_methods_file ON methods(file_id);
+CREATE TABLE IF NOT EXISTS line_spans (
+    file_id INTEGER NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    type_id INTEGER,                 -- type owning the lines, NULL outside any type
+    method_id INTEGER,               -- method owning the lines, NULL outside any method
+    PRIMARY KEY (file_id, start_line)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS line_text (
+    file_id INTEGER NOT NULL,
+    line_no INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (file_id, line_no)
+) WITHOUT ROWID;
+"""
+
+# The former lines table, every span joined with the lines it covers. The CROSS JOIN keeps the
+# spans in the outer loop: filters on the file, type or method select the spans through their
+# indexes and the lines of each span are read as one range of line_text.
+LINES_VIEW = """
+CREATE VIEW IF NOT EXISTS lines AS
+SELECT f.file_path AS file_path,
+       lt.line_no AS file_line_no,
+       lt.source AS source,
+       t.name AS parent_type,
+       m.name AS parent_method
+FROM line_spans s
+CROSS JOIN line_text lt ON lt.file_id = s.file_id AND lt.line_no BETWEEN s.start_line AND s.end_line
+JOIN files f ON f.file_id = s.file_id
+LEFT JOIN types t ON t.type_id = s.type_id
+LEFT JOIN methods m ON m.method_id = s.method_id;
+"""
+
+# Secondary indexes, dropped during bulk loads and rebuilt once afterwards
+LINE_INDEXES = {
+    # Method span lookups of stacktrace frames, see get_method_context
+    "idx_types_name": "CREATE INDEX IF NOT EXISTS idx_types_name ON types(name);",
+    "idx_methods_type": "CREATE INDEX IF NOT EXISTS idx_methods_type ON methods(type_id, name);",
+    # Filters of the lines view on parent_type and parent_method
+    "idx_line_spans_type": "CREATE INDEX IF NOT EXISTS idx_line_spans_type ON line_spans(type_id);",
+    "idx_line_spans_method": "CREATE INDEX IF NOT EXISTS idx_line_spans_method ON line_spans(method_id);",
+}
+
+
+def _migrate_lines_to_spans(conn: sqlite3.Connection):
+    """Moves the per-line rows of the lines table into the span tables and replaces it with a view."""
+    # Imported here, the loader depends on this module
+    from atlas.sqlite.lines_loader import LineLoader, records_to_file_lines
+
+    conn.executescript(SPAN_SCHEMA)
+    create_line_indexes(conn)
+    loader = LineLoader(conn)
+    cursor = conn.execute(
+        "SELECT file_path, file_line_no, parent_type, parent_method, source FROM lines ORDER BY file_path, file_line_no"
+    )
+    records, file_path = [], None
+    for row in cursor:
+        if records and row[0] != file_path:
+            loader.add_file(records_to_file_lines(records))
+            records = []
+        file_path = row[0]
+        records.append(dict(zip(("file_path", "file_line_no", "parent_type", "parent_method", "source"), row)))
+    if records:
+        loader.add_file(records_to_file_lines(records))
+    loader.finish()
+    conn.execute("DROP TABLE lines")
+    conn.executescript(LINES_VIEW)
+
+
+def _rebuild_lines_view(conn: sqlite3.Connection):
+    """Replaces the lines view looking up the span of every line with one reading the lines of every span."""
+    conn.execute("DROP VIEW IF EXISTS lines")
+    conn.executescript(LINES_VIEW)
+    create_line_indexes(conn)
+
+
+# Schema migrations, the database's user_version holds the number of migrations applied.
+# A migration is either an SQL script or a function taking the connection.
+MIGRATIONS = [
+    LINE_SCHEMA,
+    """
+    DROP INDEX IF EXISTS idx_lines_file_path;
+    CREATE INDEX IF NOT EXISTS idx_lines_method ON lines(parent_type, parent_method, file_line_no);
+    CREATE INDEX IF NOT EXISTS idx_lines_file ON lines(file_path, file_line_no);
+    ANALYZE lines;
+    """,
+    _migrate_lines_to_spans,
+    _rebuild_lines_view,
+]
+
+
+def apply_schema(conn: sqlite3.Connection) -> int:
+    """Runs the migrations the database has not seen yet, returns the resulting schema version."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        logger.info(f"Applying schema migration {number}")
+        if callable(migration):
+            migration(conn)
+        else:
+            conn.executescript(migration)
+        conn.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    return len(MIGRATIONS)
+
+
 def get_db_connection():
-    """Gets the single database connection."""
+    """Gets the single read-write database connection, used by the commands loading data."""
     global _connection
     if _connection is None:
         try:
-            # consider check_same_thread=False if using threads, but be careful!
             _connection = sqlite3.connect(DB_PATH)
             _connection.row_factory = sqlite3.Row # Optional: Access columns by name
             _connection.execute("PRAGMA journal_mode=WAL;")
             logger.info("Database connection opened.")
-            _connection.executescript(LINE_SCHEMA)
+            apply_schema(_connection)
             logger.info("Schemas loaded")
         except sqlite3.Error as e:
             logger.error(f"Error connecting to database: {e}")
             raise
     return _connection
 
+def create_line_indexes(conn: sqlite3.Connection):
+    for statement in LINE_INDEXES.values():
+        conn.execute(statement)
+
+
+def drop_line_indexes(conn: sqlite3.Connection):
+    for name in LINE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection):
+    """
+    Runs a bulk load in a single transaction with durability relaxed and secondary indexes
+    dropped, the indexes are rebuilt once at the end. WAL mode keeps the database consistent
+    if the process dies, the load is then rolled back as a whole.
+    """
+    conn.commit()
+    conn.execute("PRAGMA synchronous=OFF;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute("PRAGMA cache_size=-262144;")  # 256 MiB
+    try:
+        conn.execute("BEGIN")
+        drop_line_indexes(conn)
+        yield conn
+        create_line_indexes(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("ANALYZE;")
+
+
+def database_version(path: Path = DB_VERSION_PATH) -> str:
+    """Version of the database's content, empty if no load recorded one yet."""
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def bump_database_version(path: Path = DB_VERSION_PATH) -> str:
+    """
+    Records that a load changed the database. Readers compare this stamp rather than the database
+    files, which change whenever a connection is opened.
+    """
+    version = str(time.time_ns())
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(version, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return version
+
+
 def close_db_connection():
     """Closes the database connection if it's open."""
     global _connection
@@ -46,14 +239,80 @@ def close_db_connection():
         _connection = None
         logger.info("Database connection closed.")
 
-# Ensure the connection is closed when the program exits
+
+class ReadConnectionPool:
+    """
+    Read-only connections to the database, one per thread, so request handlers can query in
+    parallel. WAL mode lets them read while a load writes. Connections are opened with
+    check_same_thread=False and may be handed to a worker thread, as long as one thread at a
+    time uses them. prepare creates or migrates the schema of the database.
+    """
+
+    def __init__(self, path: Path = DB_PATH, mmap_size: int = SQLITE_MMAP_SIZE,
+                 prepare: Callable[[sqlite3.Connection], Any] = None):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.prepare = prepare or apply_schema
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._schema_ready = False
+
+    def get(self) -> sqlite3.Connection:
+        """Returns the connection of the calling thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._ensure_schema()
+            conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA query_only=ON;")
+            conn.execute(f"PRAGMA mmap_size={self.mmap_size};")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _ensure_schema(self):
+        """Creates or migrates the database once, read-only connections cannot."""
+        with self._lock:
+            if self._schema_ready:
+                return
+            conn = sqlite3.connect(self.path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL;")
+                self.prepare(conn)
+            finally:
+                conn.close()
+            self._schema_ready = True
+
+    def close(self):
+        """Closes the connections of all threads."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+_read_pool = ReadConnectionPool()
+
+
+def get_read_connection() -> sqlite3.Connection:
+    """Read-only connection of the calling thread, see ReadConnectionPool."""
+    return _read_pool.get()
+
+
+# Ensure the connections are closed when the program exits
 atexit.register(close_db_connection)
+atexit.register(_read_pool.close)
 
 
 def execute_sql_query(query: str):
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    cursor = get_read_connection().cursor()
+    try:
         cursor.execute(query)
         rows = cursor.fetchall()
-        logger.info(f"{len(rows)} rows returned")
-        return rows
\ No newline at end of file
+    finally:
+        cursor.close()
+    logger.info(f"{len(rows)} rows returned")
+    return rows
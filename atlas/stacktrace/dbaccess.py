@@ -1,34 +1,53 @@
 import logging
 
-def get_method_context(db_conn, parent_type, parent_method, line_no, context_lines=5):
-    start = line_no - context_lines
-    end = line_no + context_lines
+# Served by idx_types_name and idx_methods_type, see LINE_INDEXES. Of overloaded methods
+# the one spanning the frame's line wins, otherwise the nearest one.
+METHOD_SPAN_QUERY = """
+SELECT m.file_id, f.file_path, m.start_line, m.end_line
+FROM types t
+JOIN methods m ON m.type_id = t.type_id AND m.name = ?
+JOIN files f ON f.file_id = m.file_id
+WHERE t.name = ?
+ORDER BY ? BETWEEN m.start_line AND m.end_line DESC, ABS(m.start_line - ?)
+LIMIT 1
+"""
+
+# Range seek on the primary key of line_text
+LINE_TEXT_QUERY = """
+SELECT line_no, source
+FROM line_text
+WHERE file_id = ?
+  AND line_no BETWEEN ? AND ?
+ORDER BY line_no
+"""
+
 
+def get_method_context(db_conn, parent_type, parent_method, line_no, context_lines=5):
     logging.info(f"get_method_context: {parent_type}, {parent_method}, {line_no}, {context_lines}")
 
     cursor = db_conn.cursor()
     try:
-        query = """
-        SELECT file_path, file_line_no, source, parent_method, parent_type
-        FROM lines
-        WHERE parent_type = ?
-          AND parent_method = ?
-          AND file_line_no BETWEEN ? AND ?
-        ORDER BY file_line_no
-        """
-        cursor.execute(query, (parent_type, parent_method, start, end))
+        cursor.execute(METHOD_SPAN_QUERY, (parent_method, parent_type, line_no, line_no))
+        span = cursor.fetchone()
+        if span is None:
+            return None
+
+        file_id, file_path, start_line, end_line = span
+        start = max(line_no - context_lines, start_line)
+        end = min(line_no + context_lines, end_line)
+        cursor.execute(LINE_TEXT_QUERY, (file_id, start, end))
         rows = cursor.fetchall()
 
         if not rows:
             return None
 
         return {
-            "file_path": rows[0][0],
-            "parent_method": rows[0][3],
-            "parent_type": rows[0][4],
+            "file_path": file_path,
+            "parent_method": parent_method,
+            "parent_type": parent_type,
             "lines": [
-                {"line_no": row[1], "source": row[2]} for row in rows
+                {"line_no": row[0], "source": row[1]} for row in rows
             ]
         }
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
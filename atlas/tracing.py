@@ -0,0 +1,139 @@
+# Structured tracing of agent sessions: nested timed spans with attributes, exported as JSON.
+# Spans are recorded only while a Tracer is active in the current context, otherwise they cost
+# a context variable lookup. Threads see the active tracer when they run in a copied context.
+import json
+import logging
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    attributes: Dict[str, Any]
+    start: float
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    children: List["Span"] = field(default_factory=list)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": None if self.duration_ms is None else round(self.duration_ms, 3),
+            "attributes": self.attributes,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+
+class _NoopSpan:
+    """Stands in for a span when nothing is traced."""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects the spans of one session. Spans may be opened from several threads."""
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span, parent: Optional[Span]):
+        with self._lock:
+            (parent.children if parent is not None else self.spans).append(span)
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Count and total duration of the spans of every name."""
+        totals: Dict[str, Dict[str, float]] = {}
+        pending = list(self.spans)
+        while pending:
+            span = pending.pop()
+            total = totals.setdefault(span.name, {"count": 0, "duration_ms": 0.0})
+            total["count"] += 1
+            total["duration_ms"] = round(total["duration_ms"] + (span.duration_ms or 0.0), 3)
+            pending.extend(span.children)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["duration_ms"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "spans": [span.to_dict(self.origin) for span in self.spans],
+                "totals": self.totals(),
+            }
+
+    def export(self, path: Path):
+        path.write_text(json.dumps(self.to_dict(), indent=2, default=str), encoding="utf-8")
+        logger.info(f"Trace written to {path}")
+
+
+_tracer: ContextVar[Optional[Tracer]] = ContextVar("atlas_tracer", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("atlas_span", default=None)
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """Records the spans opened in this context with tracer, None disables tracing."""
+    tracer_token = _tracer.set(tracer)
+    span_token = _span.set(None)
+    try:
+        yield tracer
+    finally:
+        _span.reset(span_token)
+        _tracer.reset(tracer_token)
+
+
+def is_tracing() -> bool:
+    """Whether spans are recorded, to skip computing attributes only a trace needs."""
+    return _tracer.get() is not None
+
+
+def current_span():
+    """The innermost open span, a no-op stand-in when nothing is traced."""
+    span = _span.get()
+    return span if span is not None and _tracer.get() is not None else _NOOP_SPAN
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Times the block as a span nested in the current one. Yields the span to add attributes."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _span.get()
+    span = Span(name, attributes, time.perf_counter())
+    tracer._add(span, parent)
+    token = _span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.duration_ms = (time.perf_counter() - span.start) * 1000
+        _span.reset(token)
@@ -1,4 +1,5 @@
 # Shared utilities
+from functools import lru_cache
 from pathlib import Path
 import os
 from typing import Collection, Iterable, Iterator
@@ -23,3 +24,10 @@ def iter_files(
         for filename in filenames:
             if Path(filename).suffix.lower() in include_exts:
                 yield Path(dirpath) / filename
+
+
+@lru_cache(maxsize=None)
+def get_encoder():
+    """The cl100k tokenizer used to count tokens, loaded on first use since loading it takes a while."""
+    import tiktoken
+    return tiktoken.get_encoding("cl100k_base")
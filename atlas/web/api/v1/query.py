@@ -1,28 +1,44 @@
 import logging
 
 from fastapi import APIRouter, HTTPException
+from atlas.embedding.query_cache import query_cache
+from atlas.qdrant.search_cache import search_cache
+from atlas.tracing import Tracer
 from atlas.web.models.query_request import QueryRequest
 from atlas.web.services import relational, vector, graph, llm
+from atlas.web.services.dispatch import ServiceTimeout, run_service
 from atlas.web.services.utils import ServiceException
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# The handlers block, they run on the executor of run_service
+HANDLERS = {
+    "relational": relational.handle,
+    "vector": vector.handle,
+    "graph": graph.handle,
+}
+
 @router.post("/query")
 async def handle_query(request: QueryRequest):
     service = request.service.lower()
 
     try:
-        if service == "relational":
-            result = relational.handle(request.query)
-        elif service == "vector":
-            result = vector.handle(request.query)
-        elif service == "graph":
-            result = graph.handle(request.query)
+        if service in HANDLERS:
+            result = await run_service(service, HANDLERS[service], request.query)
         elif service == "llm":
             if not request.llmProvider or not request.llmModel:
                 raise HTTPException(status_code=400, detail="Missing llmProvider or llmModel for LLM service.")
-            result = llm.handle(request.query, request.llmProvider, request.llmModel)
+            tracer = Tracer() if request.trace else None
+            result = await run_service(service, llm.handle, request.query, request.llmProvider, request.llmModel,
+                                       tracer)
+            if tracer:
+                return {
+                    "status": "success",
+                    "service": service,
+                    "result": result,
+                    "trace": tracer.to_dict()
+                }
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported service: {request.service}")
 
@@ -37,8 +53,18 @@ async def handle_query(request: QueryRequest):
             "service": service,
             "result": f"{request.query}: {str(e)}"
         }
+    except ServiceTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except HTTPException as e:
         raise e
     except Exception as e:
         logger.error("Query failed with exception", exc_info=e)
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats")
+async def handle_stats():
+    return {
+        "query_embeddings": query_cache.stats(),
+        "search_results": search_cache.stats()
+    }
@@ -1,20 +1,34 @@
 import logging
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse
 
+from atlas.clients import close_clients, init_clients
 from .api.v1.query import router as query_router
 
 logging.basicConfig(
     level=logging.INFO
 )
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Connections are set up once instead of on the first query of every service
+    init_clients()
+    yield
+    close_clients()
+
+
 app = FastAPI(
     title="CodeAtlas+Dev API",
     description="Developer API for querying relational, vector, graph databases, and LLMs.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -5,4 +5,5 @@ class QueryRequest(BaseModel):
     service: str
     query: str
     llmProvider: Optional[str] = None
-    llmModel: Optional[str] = None
\ No newline at end of file
+    llmModel: Optional[str] = None
+    trace: bool = False  # return the timing trace of LLM queries
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+from atlas.config import WEB_SERVICE_CONCURRENCY, WEB_SERVICE_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+# One thread per concurrency slot, a request holding a slot always finds a free thread
+_executor = ThreadPoolExecutor(max_workers=sum(WEB_SERVICE_CONCURRENCY.values()), thread_name_prefix="atlas-web")
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+class ServiceTimeout(Exception):
+    def __init__(self, service: str, timeout: float):
+        self.service = service
+        self.timeout = timeout
+
+    def __str__(self):
+        return f"{self.service} service did not answer within {self.timeout} seconds"
+
+
+async def run_service(service: str, handler: Callable[..., Any], *args) -> Any:
+    """
+    Runs a blocking service handler on the shared executor, keeping the event loop free. At most
+    WEB_SERVICE_CONCURRENCY[service] handlers of a service run at once, further requests wait for
+    a slot. Raises ServiceTimeout when waiting and running take longer than the service's timeout.
+    A handler that timed out keeps its slot until it actually returns.
+    """
+    semaphore = _semaphores.get(service)
+    if semaphore is None:
+        semaphore = _semaphores[service] = asyncio.Semaphore(WEB_SERVICE_CONCURRENCY[service])
+    timeout = WEB_SERVICE_TIMEOUTS[service]
+
+    try:
+        async with asyncio.timeout(timeout):
+            await semaphore.acquire()
+            future = asyncio.get_running_loop().run_in_executor(_executor, partial(handler, *args))
+            future.add_done_callback(lambda _: semaphore.release())
+            return await asyncio.shield(future)
+    except TimeoutError:
+        logger.warning(f"{service} request timed out after {timeout} seconds")
+        raise ServiceTimeout(service, timeout) from None
@@ -1,14 +1,10 @@
 import logging
 
-from atlas.qdrant.chunks_loader import client as qdrant_client
-
 from atlas.agents.agent_workflow import run
-from atlas.sqlite.utils import get_db_connection
+from atlas.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
-def handle(query: str, llm_provider: str, llm_model: str):
+def handle(query: str, llm_provider: str, llm_model: str, tracer: Tracer = None):
     logger.info(f"Calling LLM (provider={llm_provider}, model={llm_model}) with semantic query '{query}'")
-    with get_db_connection() as sqlite:
-        result = run(query, sqlite, qdrant_client)
-        return result
\ No newline at end of file
+    return run(query, tracer=tracer)
\ No newline at end of file
@@ -2,24 +2,24 @@ const docTexts = {
   relational: `
 <h3>Relational DB</h3>
 
-<p><strong>Table:</strong> lines</p>
+<p><strong>View:</strong> lines, one row per source line</p>
 
 <table>
 <thead>
 <tr><th>Column</th><th>Type</th><th>Description</th></tr>
 </thead>
 <tbody>
-<tr><td>id</td><td>INTEGER PRIMARY KEY</td><td>Unique row ID (auto-generated)</td></tr>
-<tr><td>line_id</td><td>TEXT UNIQUE</td><td>Unique identifier for the source line</td></tr>
-<tr><td>parent_type</td><td>TEXT</td><td>Parent block type (e.g. class, method), nullable</td></tr>
-<tr><td>parent_method</td><td>TEXT</td><td>Parent method name, nullable</td></tr>
-<tr><td>file_line_no</td><td>INTEGER</td><td>Line number in the source file</td></tr>
 <tr><td>file_path</td><td>TEXT</td><td>Path to the source file</td></tr>
+<tr><td>file_line_no</td><td>INTEGER</td><td>Line number in the source file</td></tr>
 <tr><td>source</td><td>TEXT</td><td>Source code content of the line</td></tr>
-<tr><td>created_at</td><td>TEXT</td><td>Timestamp when the record was created</td></tr>
+<tr><td>parent_type</td><td>TEXT</td><td>Fully qualified type owning the line, nullable</td></tr>
+<tr><td>parent_method</td><td>TEXT</td><td>Method owning the line, nullable</td></tr>
 </tbody>
 </table>
 
+<p><strong>Tables:</strong> files (file_id, file_path), types and methods (name, start_line, end_line of every declaration),
+line_text (file_id, line_no, source)</p>
+
 <h4>Example Queries</h4>
 
 <pre><code>SELECT * FROM lines
@@ -27,13 +27,19 @@ WHERE file_path = 'GenResourceService.java'
 ORDER BY file_line_no;
 </code></pre>
 
-<pre><code>SELECT * FROM lines
-WHERE parent_method = 'getResource'
-ORDER BY file_line_no;
+<pre><code>SELECT f.file_path, m.start_line, m.end_line FROM methods m
+JOIN files f ON f.file_id = m.file_id
+WHERE m.name = 'getResource';
 </code></pre>
 
 <pre><code>SELECT * FROM lines
 WHERE source LIKE '%password%';
+</code></pre>
+
+<pre><code>SELECT lt.line_no, lt.source FROM methods m
+JOIN line_text lt ON lt.file_id = m.file_id AND lt.line_no BETWEEN m.start_line AND m.end_line
+WHERE m.name = 'getResource'
+ORDER BY lt.line_no;
 </code></pre>`,
 
   vector: `
@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+import unittest
+from atlas.agents.agent_workflow import run_agent_workflow
+from atlas.agents.context_budget import ContextBudgeter
+from atlas.agents.graph_db_tool import GraphDBToolInputSchema, GraphDBToolOutputSchema
+from atlas.agents.orchestrator_agent import AgentDecisionSchema, ToolCallSchema
+from atlas.agents.relational_db_tool import RelationalDBToolInputSchema, RelationalDBToolOutputSchema
+from atlas.agents.vector_db_tool import VectorDBToolInputSchema, VectorDBToolOutputSchema
+from atlas.tracing import Tracer, activate
+
+
+class CharEncoder:
+    """One token per character, tiktoken needs to download its encodings."""
+
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+    def decode(self, tokens):
+        return "".join(map(chr, tokens))
+
+
+class FakeAgent:
+    def __init__(self, decisions):
+        self.decisions = list(decisions)
+        self.inputs = []
+
+    def run(self, agent_input):
+        self.inputs.append(agent_input)
+        return self.decisions.pop(0)
+
+
+class SlowTool:
+    """Tool answering after a delay, recording the threads it ran on."""
+
+    def __init__(self, make_output, delay=0.2):
+        self.make_output = make_output
+        self.delay = delay
+        self.threads = []
+
+    def run(self, params):
+        self.threads.append(threading.get_ident())
+        time.sleep(self.delay)
+        return self.make_output(params)
+
+
+class TestAgentWorkflow(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates slow vector, relational and graph tools echoing their queries.
+        """
+        self.vector_tool = SlowTool(lambda p: VectorDBToolOutputSchema(results=[p.query]), delay=0)
+        self.relational_tool = SlowTool(lambda p: RelationalDBToolOutputSchema(rows=[p.query]))
+        self.graph_tool = SlowTool(lambda p: GraphDBToolOutputSchema(result=p.query))
+
+    def workflow(self, decisions):
+        agent = FakeAgent(decisions)
+        result = run_agent_workflow("question", agent, self.vector_tool, self.relational_tool, self.graph_tool,
+                                    ContextBudgeter(encoder=CharEncoder()))
+        return agent, result
+
+    def test_tool_calls_run_concurrently(self):
+        decisions = [
+            AgentDecisionSchema(thought="t", action="call_tools", tool_calls=[
+                ToolCallSchema(tool="call_relational_db", tool_parameters=RelationalDBToolInputSchema(query="SELECT 1")),
+                ToolCallSchema(tool="call_graph_db", tool_parameters=GraphDBToolInputSchema(query="cpg.method.name")),
+                ToolCallSchema(tool="call_relational_db", tool_parameters=RelationalDBToolInputSchema(query="SELECT 2")),
+            ]),
+            AgentDecisionSchema(thought="t", action="final_answer", final_answer="done"),
+        ]
+
+        start = time.perf_counter()
+        agent, result = self.workflow(decisions)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, "done")
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(len(set(self.relational_tool.threads)), 2)
+        context = agent.inputs[1].context
+        self.assertLess(context.index("SELECT 1"), context.index("cpg.method.name"))
+        self.assertLess(context.index("cpg.method.name"), context.index("SELECT 2"))
+        self.assertIn("Result of tool call 3 (call_relational_db)", context)
+
+    def test_failed_call_keeps_other_results(self):
+        self.graph_tool.make_output = lambda p: 1 / 0
+        decisions = [
+            AgentDecisionSchema(thought="t", action="call_tools", tool_calls=[
+                ToolCallSchema(tool="call_graph_db", tool_parameters=GraphDBToolInputSchema(query="cpg.file.name")),
+                ToolCallSchema(tool="call_relational_db", tool_parameters=GraphDBToolInputSchema.model_construct()),
+                ToolCallSchema(tool="call_relational_db", tool_parameters=RelationalDBToolInputSchema(query="SELECT 1")),
+            ]),
+            AgentDecisionSchema(thought="t", action="final_answer", final_answer="done"),
+        ]
+
+        agent, _ = self.workflow(decisions)
+
+        context = agent.inputs[1].context
+        self.assertIn("Error encountered during call_graph_db: division by zero", context)
+        self.assertIn("invalid parameters for 'call_relational_db', expected RelationalDBToolInputSchema", context)
+        self.assertIn("SELECT 1", context)
+
+    def test_decision_parsed_from_json(self):
+        # Parameters without top_k parse as the first schema of the union, RelationalDBToolInputSchema
+        decision = AgentDecisionSchema.model_validate_json(json.dumps({
+            "thought": "t", "action": "call_tools", "tool_calls": [
+                {"tool": "call_graph_db", "tool_parameters": {"query": "cpg.method.name"}},
+                {"tool": "call_vector_db", "tool_parameters": {"query": "discount"}},
+                {"tool": "call_relational_db", "tool_parameters": {"query": "SELECT 1"}},
+            ]
+        }))
+        self.assertIsInstance(decision.tool_calls[0].tool_parameters, RelationalDBToolInputSchema)
+
+        agent, _ = self.workflow([
+            decision, AgentDecisionSchema(thought="t", action="final_answer", final_answer="done")
+        ])
+
+        context = agent.inputs[1].context
+        self.assertNotIn("invalid parameters", context)
+        self.assertIn("cpg.method.name", context)
+        self.assertIn("discount", context)
+        self.assertIn("SELECT 1", context)
+        self.assertEqual(len(self.graph_tool.threads), 1)
+
+    def test_iterations_are_traced(self):
+        decisions = [
+            AgentDecisionSchema(thought="t", action="call_tools", tool_calls=[
+                ToolCallSchema(tool="call_relational_db", tool_parameters=RelationalDBToolInputSchema(query="SELECT 1")),
+                ToolCallSchema(tool="call_graph_db", tool_parameters=GraphDBToolInputSchema(query="cpg.method.name")),
+            ]),
+            AgentDecisionSchema(thought="t", action="final_answer", final_answer="done"),
+        ]
+        tracer = Tracer()
+
+        with activate(tracer):
+            self.workflow(decisions)
+
+        self.assertEqual([span.name for span in tracer.spans], ["initial_context", "iteration", "iteration"])
+        first = tracer.spans[1]
+        self.assertEqual(first.attributes["action"], "call_tools")
+        self.assertEqual(sorted(span.name for span in first.children), ["llm", "tool.graph_db", "tool.relational_db"])
+        tool = next(span for span in first.children if span.name == "tool.relational_db")
+        self.assertEqual(tool.attributes, {"query_chars": 8, "rows": 1})
+        self.assertGreaterEqual(tool.duration_ms, 200)
+        llm = first.children[0]
+        self.assertEqual(llm.attributes["context_tokens"], llm.attributes["context_chars"])
+
+    def test_single_tool_action(self):
+        decisions = [
+            AgentDecisionSchema(thought="t", action="call_graph_db",
+                                tool_parameters=GraphDBToolInputSchema(query="cpg.call.name")),
+            AgentDecisionSchema(thought="t", action="final_answer", final_answer="done"),
+        ]
+
+        agent, _ = self.workflow(decisions)
+
+        self.assertEqual(agent.inputs[1].context, "Graph DB Tool Output:\ncpg.call.name")
+
+
+if __name__ == '__main__':
+    unittest.main()
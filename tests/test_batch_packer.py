@@ -0,0 +1,67 @@
+import unittest
+from atlas.embedding.base_embedder import Embedding
+from atlas.embedding.batch_packer import PackingStats, pack_batches
+from atlas.embedding.voyage_embedder import VoyageEmbedder
+
+
+def make_items(token_counts):
+    return [Embedding(f"chunk-{i}", "source", token_count=tokens) for i, tokens in enumerate(token_counts)]
+
+
+class TestBatchPacker(unittest.TestCase):
+
+    def test_respects_both_limits(self):
+        items = make_items([700, 600, 500, 400, 300, 200, 100] * 20)
+        stats = PackingStats(max_batch_inputs=8, max_batch_tokens=1000)
+
+        batches = list(pack_batches(items, 8, 1000, stats))
+
+        self.assertEqual(sorted(i.chunk_id for b in batches for i in b), sorted(i.chunk_id for i in items))
+        for batch in batches:
+            self.assertLessEqual(len(batch), 8)
+            self.assertLessEqual(sum(i.token_count for i in batch), 1000)
+        self.assertEqual(stats.batches, len(batches))
+        self.assertEqual(stats.tokens, 2800 * 20)
+
+    def test_packs_better_than_sequential_flushing(self):
+        # Sequential flushing pairs 600+300 and then gets stuck with 600 alone, FFD pairs 600+400
+        items = make_items([600, 300, 600, 400, 100, 400] * 10)
+        stats = PackingStats(max_batch_inputs=100, max_batch_tokens=1000)
+
+        batches = list(pack_batches(items, 100, 1000, stats))
+
+        self.assertEqual(len(batches), stats.min_batches)
+        self.assertEqual(stats.efficiency, 1.0)
+
+    def test_input_limit_binds_for_small_chunks(self):
+        stats = PackingStats(max_batch_inputs=10, max_batch_tokens=100_000)
+        batches = list(pack_batches(make_items([5] * 95), 10, 100_000, stats))
+
+        self.assertEqual(len(batches), 10)
+        self.assertEqual(stats.min_batches, 10)
+
+    def test_windows_carry_over_leftovers(self):
+        stats = PackingStats(max_batch_inputs=4, max_batch_tokens=1000)
+        batches = list(pack_batches(make_items([100] * 30), 4, 1000, stats, window=7))
+
+        self.assertEqual(sum(len(b) for b in batches), 30)
+        self.assertEqual(len(batches), 8)
+
+    def test_oversized_item_gets_own_batch(self):
+        batches = list(pack_batches(make_items([5000, 10, 10]), 10, 1000))
+
+        self.assertIn(["chunk-0"], [[i.chunk_id for i in b] for b in batches])
+
+    def test_voyage_batches_keep_the_margin(self):
+        items = make_items([VoyageEmbedder.MAX_INPUT_TOKENS, 20_000, 9_000, 3_000, 700, 50] * 30)
+
+        batches = list(pack_batches(items, VoyageEmbedder.MAX_BATCH_INPUTS, VoyageEmbedder.MAX_BATCH_TOKENS))
+
+        self.assertLessEqual(VoyageEmbedder.MAX_BATCH_TOKENS, 0.8 * 120_000)
+        self.assertLessEqual(VoyageEmbedder.MAX_INPUT_TOKENS, 0.8 * 32_000)
+        for batch in batches:
+            self.assertLessEqual(sum(i.token_count for i in batch), 0.8 * 120_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
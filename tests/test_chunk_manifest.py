@@ -0,0 +1,82 @@
+import os
+import unittest
+import tempfile
+from pathlib import Path
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.chunking.manifest import ChunkManifest
+
+
+class TestChunkManifest(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a temporary project with three files and a manifest recording all of them.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.manifest_path = self.root / "manifest.json"
+
+        for name in ("a.py", "b.py", "c.py"):
+            (self.root / name).write_text(f"def {name[0]}():\n    return 1\n")
+
+        manifest = ChunkManifest(self.manifest_path)
+        changes = manifest.diff(self.files(), self.root)
+        for file_path in changes.changed_files:
+            manifest.record(file_path.name, changes.fingerprints[file_path], [f"id-{file_path.name}"])
+        manifest.save()
+
+    def files(self):
+        return sorted(p for p in self.root.glob("*.py"))
+
+    def test_unchanged_tree(self):
+        changes = ChunkManifest.load(self.manifest_path).diff(self.files(), self.root)
+
+        self.assertEqual(changes.changed_files, [])
+        self.assertEqual(changes.deleted, [])
+        self.assertEqual(changes.unchanged, 3)
+
+    def test_added_modified_deleted(self):
+        (self.root / "a.py").write_text("def a():\n    return 2\n")
+        (self.root / "c.py").unlink()
+        (self.root / "d.py").write_text("def d():\n    return 1\n")
+
+        manifest = ChunkManifest.load(self.manifest_path)
+        changes = manifest.diff(self.files(), self.root)
+
+        self.assertEqual([p.name for p in changes.added], ["d.py"])
+        self.assertEqual([p.name for p in changes.modified], ["a.py"])
+        self.assertEqual(changes.deleted, ["c.py"])
+        self.assertEqual(changes.unchanged, 1)
+        self.assertEqual(manifest.forget("c.py"), ["id-c.py"])
+
+    def test_full_diff(self):
+        (self.root / "c.py").unlink()
+
+        # b.py is still on disk, but not among the files of this run
+        changes = ChunkManifest.load(self.manifest_path).diff(self.files()[:1], self.root, full=True)
+
+        self.assertEqual([p.name for p in changes.modified], ["a.py"])
+        self.assertEqual(sorted(changes.deleted), ["b.py", "c.py"])
+        self.assertEqual(changes.unchanged, 0)
+
+    def test_touched_file_is_unchanged(self):
+        path = self.root / "b.py"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+        changes = ChunkManifest.load(self.manifest_path).diff(self.files(), self.root)
+
+        self.assertEqual(changes.changed_files, [])
+        self.assertEqual(changes.unchanged, 3)
+
+    def test_chunk_ids_are_deterministic(self):
+        def make(start_line):
+            return CodeChunk("function", 1, "a", start_line, start_line + 1, "def a():\n    return 1", "a.py")
+
+        self.assertEqual(make(1).chunk_id, make(1).chunk_id)
+        self.assertNotEqual(make(1).chunk_id, make(2).chunk_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import tempfile
+from pathlib import Path
+from atlas.chunking.chunk_pipeline import chunk_files
+
+
+class TestChunkPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a temporary project with a few Java and Python files and one broken Python file.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+        for i in range(4):
+            (self.root / f"Service{i}.java").write_text(f"""
+public class Service{i} {{
+    public int compute(int x) {{
+        int y = x * {i};
+        y = y + 1;
+        return y;
+    }}
+}}
+""")
+            (self.root / f"module_{i}.py").write_text(f"""
+def handler_{i}(x):
+    y = x + {i}
+    return y
+""")
+        (self.root / "broken.py").write_text("def broken(:\n    pass\n")
+        self.files = sorted(self.root.iterdir())
+
+    def collect(self, workers, batch_size=1000):
+        results = []
+        for batch in chunk_files(self.files, self.root, workers=workers, batch_size=batch_size):
+            results.extend(batch)
+        return {result.file_path.name: result for result in results}
+
+    def test_parallel_matches_serial(self):
+        serial = self.collect(workers=1)
+        parallel = self.collect(workers=2)
+
+        self.assertEqual(serial.keys(), parallel.keys())
+        for name, result in serial.items():
+            self.assertEqual(
+                [c.to_dict() for c in result.chunks],
+                [c.to_dict() for c in parallel[name].chunks],
+                f"Chunks differ for {name}"
+            )
+
+    def test_failures_are_isolated(self):
+        results = self.collect(workers=2)
+
+        self.assertIsNotNone(results["broken.py"].error)
+        self.assertIn("SyntaxError", results["broken.py"].error)
+        healthy = [r for name, r in results.items() if name != "broken.py"]
+        self.assertTrue(all(r.error is None and r.chunks for r in healthy))
+
+    def test_results_are_batched(self):
+        batches = list(chunk_files(self.files, self.root, workers=1, batch_size=2))
+
+        self.assertGreater(len(batches), 1)
+        self.assertEqual(sum(len(batch) for batch in batches), len(self.files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import unittest
+import tempfile
+from pathlib import Path
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.embedding.embedding_store import EmbeddingStore
+
+
+class TestChunkStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a chunk store in a temporary directory with a handful of chunks.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.store = ChunkStore(self.root / "chunks.sqlite")
+        self.addCleanup(self.store.close)
+
+        self.chunks = [
+            CodeChunk("function", 1, f"f{i}", i * 10, i * 10 + 5, f"def f{i}():\n    return {i}", "mod.py")
+            for i in range(25)
+        ]
+        self.store.put_chunks(self.chunks)
+        self.store.commit()
+
+    def test_iterates_in_insertion_order(self):
+        records = list(self.store.iter_chunks(page_size=7))
+
+        self.assertEqual([r["chunk_id"] for r in records], [c.chunk_id for c in self.chunks])
+        self.assertEqual(records[3]["source"], self.chunks[3].source)
+        self.assertEqual(records[3]["errors"], [])
+
+    def test_updates_while_streaming(self):
+        for record in self.store.iter_chunks(with_errors=False, page_size=4):
+            self.store.add_error(record["chunk_id"], "embedding", "failed")
+
+        self.assertEqual(len(list(self.store.iter_chunks(with_errors=False))), 0)
+        self.assertEqual(len(list(self.store.iter_chunks(with_errors=True))), 25)
+
+    def test_errors_and_cleanup(self):
+        self.store.add_error(self.chunks[0].chunk_id, "validation", "too large")
+
+        with_errors = list(self.store.iter_chunks(with_errors=True))
+        self.assertEqual(len(with_errors), 1)
+        self.assertEqual(with_errors[0]["errors"], [{"source": "validation", "error": "too large"}])
+
+        removed, remaining = self.store.delete_valid_chunks()
+        self.assertEqual((removed, remaining), (24, 1))
+
+    def test_put_replaces_existing_chunk(self):
+        self.store.put_chunks(self.chunks[:1])
+
+        self.assertEqual(self.store.count(), 25)
+        self.assertEqual(self.store.delete_chunks([c.chunk_id for c in self.chunks[:3]]), 3)
+        self.assertEqual(self.store.count(), 22)
+
+    def test_import_legacy_chunk_dir(self):
+        chunk_dir = self.root / ".chunks"
+        chunk_dir.mkdir()
+        data = self.chunks[0].to_dict()
+        data["chunk_id"] = "legacy-id"
+        data["embedding"] = [1.0, 2.0]
+        (chunk_dir / "chunk_legacy-id.json").write_text(json.dumps(data))
+
+        embedding_store = EmbeddingStore(self.root / "embeddings", dim=2)
+        imported = self.store.import_chunk_dir(chunk_dir, embedding_store)
+
+        self.assertEqual(len(imported), 1)
+        record = next(r for r in self.store.iter_chunks() if r["chunk_id"] == "legacy-id")
+        self.assertEqual(record["source_hash"], self.chunks[0].source_hash)
+        self.assertTrue(embedding_store.has("legacy-id", record["source_hash"]))
+        self.assertEqual(embedding_store.get("legacy-id").tolist(), [1.0, 2.0])
+
+    def test_qdrant_checkpoint(self):
+        loaded = [(c.chunk_id, c.source_hash) for c in self.chunks[:10]]
+        self.store.mark_loaded(loaded)
+        # A changed source and a removed chunk since the last load
+        self.store.mark_loaded([(self.chunks[10].chunk_id, "outdated-hash")])
+        self.store.delete_chunks([self.chunks[0].chunk_id])
+
+        unloaded = [r["chunk_id"] for r in self.store.iter_unloaded_chunks(page_size=4)]
+        self.assertEqual(unloaded, [c.chunk_id for c in self.chunks[10:]])
+        self.assertEqual(self.store.stale_points(), [self.chunks[0].chunk_id])
+
+        self.store.forget_points(self.store.stale_points())
+        self.assertEqual(self.store.stale_points(), [])
+        self.store.clear_points()
+        self.assertEqual(len(list(self.store.iter_unloaded_chunks())), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
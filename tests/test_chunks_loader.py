@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from qdrant_client import QdrantClient
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.config import QDRANT_COLLECTION
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.qdrant import chunks_loader
+
+
+class TestChunksLoader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a chunk store with 400 embedded chunks and a local Qdrant store in a temporary directory.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        root = Path(self.tmp_dir.name)
+        self.chunks = [
+            CodeChunk("function", 1, f"f{i}", i * 10, i * 10 + 5, f"def f{i}():\n    return {i}", "mod.py")
+            for i in range(400)
+        ]
+        with ChunkStore(root / "chunks.sqlite") as store, EmbeddingStore(root / "embeddings", dim=2) as embeddings:
+            store.put_chunks(self.chunks)
+            store.commit()
+            for i, chunk in enumerate(self.chunks):
+                embeddings.put(chunk.chunk_id, chunk.source_hash, [1.0, float(i)])
+
+        self.client = QdrantClient(path=str(root / "qdrant"))
+        self.addCleanup(self.client.close)
+        for patch in (
+            mock.patch.object(chunks_loader, "get_qdrant_client", lambda: self.client),
+            mock.patch.object(chunks_loader, "QDRANT_DIM", 2),
+            mock.patch.object(chunks_loader, "ChunkStore", lambda: ChunkStore(root / "chunks.sqlite")),
+            mock.patch.object(chunks_loader, "EmbeddingStore", lambda: EmbeddingStore(root / "embeddings")),
+            mock.patch.object(chunks_loader, "bump_collection_version", lambda: None),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_loads_batches_into_a_local_store(self):
+        loaded = chunks_loader.load_chunks_to_qdrant(batch_size=4, workers=4)
+
+        self.assertEqual(loaded, 400)
+        self.assertEqual(self.client.count(QDRANT_COLLECTION).count, 400)
+        self.assertEqual(chunks_loader.load_chunks_to_qdrant(batch_size=4, workers=4), 0)
+
+    def test_local_clients_are_detected(self):
+        self.assertTrue(chunks_loader.is_local_client(self.client))
+        self.assertFalse(chunks_loader.is_local_client(QdrantClient(url="http://localhost:6333", check_compatibility=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
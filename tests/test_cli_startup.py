@@ -0,0 +1,45 @@
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+# Libraries taking seconds to import, commands import them when they run
+HEAVY_MODULES = {"tiktoken", "tree_sitter", "openai", "instructor", "atomic_agents", "qdrant_client", "voyageai"}
+# Seconds the fastest of a few imports of the CLI may take, typer included
+IMPORT_BUDGET = 1.0
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import atlas.cli
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+class TestCliStartup(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Imports the CLI in fresh interpreters, the way a shell runs a command.
+        """
+        self.repo_root = Path(__file__).resolve().parent.parent
+
+    def probe(self):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=self.repo_root, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def test_import_skips_heavy_modules(self):
+        self.assertEqual(HEAVY_MODULES & set(self.probe()["modules"]), set())
+
+    def test_import_time_budget(self):
+        elapsed = min(self.probe()["elapsed"] for _ in range(3))
+
+        self.assertLess(elapsed, IMPORT_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import threading
+import unittest
+from unittest import mock
+from atlas import clients
+from atlas.clients import close_clients, get_client, get_joern_session, get_openai_client
+from atlas.embedding.embedding_dispatcher import get_embedder
+
+
+class TestClients(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Starts every test with an empty registry and a dummy OpenAI key.
+        """
+        patch = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "test"})
+        patch.start()
+        self.addCleanup(patch.stop)
+        close_clients()
+        self.addCleanup(close_clients)
+
+    def test_created_once_across_threads(self):
+        created = []
+
+        def factory():
+            created.append(1)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_client("test", factory))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(len({id(r) for r in results}), 1)
+
+    def test_openai_clients_share_connection_pool(self):
+        batch, query = get_openai_client(), get_openai_client(2)
+
+        self.assertEqual((batch.max_retries, query.max_retries), (0, 2))
+        self.assertIs(batch._client, query._client)
+        self.assertIs(get_openai_client(2), query)
+
+    def test_embedders_and_sessions_are_reused(self):
+        embedder = get_embedder("OpenAI", "text-embedding-3-small")
+
+        self.assertIs(get_embedder("openai", "text-embedding-3-small"), embedder)
+        self.assertIs(embedder.client, get_openai_client())
+        self.assertIs(get_joern_session(), get_joern_session())
+
+    def test_close_clears_registry(self):
+        session = get_joern_session()
+        close_clients()
+
+        self.assertEqual(clients._clients, {})
+        self.assertIsNot(get_joern_session(), session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from atlas.agents.context_budget import ContextBudgeter
+
+
+class CharEncoder:
+    """One token per character, tiktoken needs to download its encodings."""
+
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+    def decode(self, tokens):
+        return "".join(map(chr, tokens))
+
+
+def chunk(name, start):
+    return {"type": "function", "name": name, "chunk_no": 1, "start_line": start, "end_line": start + 9,
+            "file_path": "src/Foo.java", "source": f"void {name}() {{}}"}
+
+
+class TestContextBudgeter(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a budgeter of 200 character-sized tokens showing at most 3 SQL rows.
+        """
+        self.budgeter = ContextBudgeter(budget=200, max_rows=3, encoder=CharEncoder())
+
+    def test_chunks_shown_once(self):
+        first = self.budgeter.fit([self.budgeter.format_chunks([chunk("a", 1), chunk("b", 20)])])
+        second = self.budgeter.fit([
+            self.budgeter.format_chunks([chunk("b", 20), chunk("c", 40)]),
+            self.budgeter.format_chunks([chunk("c", 40)]),
+        ])
+
+        self.assertIn("void a() {}", first)
+        self.assertIn("void b() {}", first)
+        self.assertNotIn("void b() {}", second)
+        self.assertIn("function b in src/Foo.java lines 20-29 (already shown in an earlier step)", second)
+        self.assertIn("void c() {}", second)
+        self.assertIn("function c in src/Foo.java lines 40-49 (shown above)", second)
+
+    def test_truncated_chunks_are_shown_again(self):
+        big = dict(chunk("big", 60), source="x" * 300)
+        first = self.budgeter.fit([self.budgeter.format_chunks([chunk("a", 1), big])])
+        second = self.budgeter.fit([self.budgeter.format_chunks([chunk("a", 1), big])])
+
+        self.assertIn("more tokens truncated", first)
+        self.assertIn("function a in src/Foo.java lines 1-10 (already shown in an earlier step)", second)
+        self.assertNotIn("function big in src/Foo.java lines 60-69 (already shown", second)
+        self.assertIn("function big in src/Foo.java lines 60-69:\nxxx", second)
+
+    def test_large_results_summarized(self):
+        rows = [{"file_path": f"src/F{no % 2}.java", "line": no} for no in range(10)]
+
+        text = self.budgeter.format_rows(rows)
+
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertIn("7 more rows not shown (10 in total)", text)
+        self.assertIn("file_path: 2, line: 7", text)
+        self.assertEqual(self.budgeter.format_rows(rows[:2]), "\n".join(str(row) for row in rows[:2]))
+
+    def test_sections_share_budget(self):
+        short, long_a, long_b = "s" * 20, "a" * 500, "b" * 300
+
+        text = self.budgeter.fit([short, long_a, long_b])
+
+        self.assertLessEqual(len(text), 200 + len("\n\n") * 2)
+        sections = text.split("\n\n")
+        self.assertEqual(sections[0], short)
+        # The remaining 180 tokens are split evenly between the long sections
+        self.assertEqual(len(sections[1]), len(sections[2]))
+        self.assertIn("more tokens truncated", sections[1])
+        self.assertEqual(self.budgeter.fit([short]), short)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from atomic_agents.lib.components.agent_memory import AgentMemory
+from atlas.agents.decision_cache import CachedAgent, DecisionCache, ReplayAgent, index_version, load_session, save_session
+from atlas.agents.graph_db_tool import GraphDBToolInputSchema
+from atlas.agents.orchestrator_agent import AgentDecisionSchema, ReasoningInputSchema, load_decision
+from atlas.sqlite.utils import ReadConnectionPool, bump_database_version
+
+
+class FakePromptGenerator:
+    def generate_prompt(self):
+        return "system prompt"
+
+
+class FakeLLMAgent:
+    """Answers with scripted decisions, keeping its memory like BaseAgent."""
+
+    model = "fake-model"
+
+    def __init__(self, decisions):
+        self.decisions = list(decisions)
+        self.memory = AgentMemory()
+        self.system_prompt_generator = FakePromptGenerator()
+        self.calls = 0
+
+    def run(self, agent_input):
+        self.calls += 1
+        self.memory.initialize_turn()
+        self.memory.add_message("user", agent_input)
+        decision = self.decisions.pop(0)
+        self.memory.add_message("assistant", decision)
+        return decision
+
+
+def script():
+    return [
+        AgentDecisionSchema(thought="look it up", action="call_graph_db",
+                            tool_parameters=GraphDBToolInputSchema(query="cpg.method.name")),
+        AgentDecisionSchema(thought="done", action="final_answer", final_answer="42"),
+    ]
+
+
+def inputs():
+    return [ReasoningInputSchema(original_query="q", context="initial", iteration=1),
+            ReasoningInputSchema(original_query="q", context="methods", iteration=2)]
+
+
+class TestDecisionCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a decision cache in a temporary directory.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = DecisionCache(Path(self.tmp_dir.name) / "agent.sqlite")
+        self.addCleanup(self.cache.close)
+
+    def session(self, version):
+        llm = FakeLLMAgent(script())
+        agent = CachedAgent(llm, self.cache, load_decision, version=version)
+        decisions = [agent.run(agent_input) for agent_input in inputs()]
+        return llm, agent, decisions
+
+    def test_repeated_session_is_cached(self):
+        first_llm, _, first = self.session("v1")
+        second_llm, _, second = self.session("v1")
+
+        self.assertEqual(first_llm.calls, 2)
+        self.assertEqual(second_llm.calls, 0)
+        self.assertEqual(second, first)
+        self.assertIsInstance(second[0].tool_parameters, GraphDBToolInputSchema)
+        # Cached decisions are remembered as if the LLM had made them
+        self.assertEqual(second_llm.memory.get_history(), first_llm.memory.get_history())
+
+    def test_index_change_invalidates(self):
+        self.session("v1")
+
+        llm, _, _ = self.session("v2")
+
+        self.assertEqual(llm.calls, 2)
+        self.assertEqual(self.cache.conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0], 2)
+
+    def test_index_version_changes_only_with_loads(self):
+        root = Path(self.tmp_dir.name)
+        db_path, db_version, qdrant_version = root / "db.sqlite", root / "db.version", root / "qdrant.version"
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.close()
+        before = index_version(db_version, qdrant_version)
+
+        # Opening connections touches the database files without changing the indexes
+        pool = ReadConnectionPool(db_path)
+        pool.get().execute("SELECT COUNT(*) FROM files").fetchone()
+        pool.close()
+
+        self.assertEqual(index_version(db_version, qdrant_version), before)
+        bump_database_version(db_version)
+        self.assertNotEqual(index_version(db_version, qdrant_version), before)
+
+    def test_recorded_session_replays(self):
+        _, agent, decisions = self.session("v1")
+        path = Path(self.tmp_dir.name) / "session.json"
+        save_session(path, "q", agent.decisions)
+
+        session = load_session(path)
+        replay = ReplayAgent(session["decisions"], load_decision)
+
+        self.assertEqual(session["query"], "q")
+        self.assertEqual([replay.run(agent_input) for agent_input in inputs()], decisions)
+        self.assertIsInstance(decisions[0].tool_parameters, GraphDBToolInputSchema)
+        with self.assertRaises(RuntimeError):
+            replay.run(inputs()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from atlas.embedding import embedder
+from atlas.embedding.embedder import iter_pending_chunks, save_embeddings
+from atlas.embedding.embedding_cache import EmbeddingCache
+from atlas.embedding.embedding_store import EmbeddingStore
+
+
+class CharEncoder:
+    """One token per character, tiktoken needs to download its encodings."""
+
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+
+class FakeChunkStore:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.errors = {}
+
+    def iter_chunks(self):
+        return iter(self.chunks)
+
+    def add_error(self, chunk_id, kind, error):
+        self.errors[chunk_id] = error
+
+    def commit(self):
+        pass
+
+
+class TestPendingChunks(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates an embedding store and cache in a temporary directory, over three chunks with the
+        same source.
+        """
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.embedding_store = EmbeddingStore(Path(tmp_dir.name) / "embeddings", dim=2)
+        self.addCleanup(self.embedding_store.close)
+        self.cache = EmbeddingCache("openai", "model", path=Path(tmp_dir.name) / "cache.sqlite")
+        self.addCleanup(self.cache.close)
+        self.store = FakeChunkStore([
+            {"chunk_id": chunk_id, "source_hash": "h", "source": "void f() {}"} for chunk_id in ("a", "b", "c")
+        ])
+        self.stats = {"skipped": 0, "duplicates": 0, "too_large": 0}
+        patch = mock.patch.object(embedder, "get_encoder", CharEncoder)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_duplicates_share_the_embedding_of_their_original(self):
+        duplicates = {}
+        pending = iter_pending_chunks(self.store, self.embedding_store, self.cache, duplicates, 100, self.stats)
+        original = next(pending)
+        self.assertEqual(next(pending, None), None)
+        original.embedding = [1.0, 2.0]
+        save_embeddings(self.store, self.embedding_store, self.cache, duplicates, [original])
+
+        self.assertEqual(self.stats["duplicates"], 2)
+        self.assertEqual(duplicates, {})
+        self.assertEqual(sorted(self.embedding_store.rows), ["a", "b", "c"])
+
+    def test_duplicates_read_after_the_original_was_saved(self):
+        duplicates = {}
+        pending = iter_pending_chunks(self.store, self.embedding_store, self.cache, duplicates, 100, self.stats)
+        original = next(pending)
+        original.embedding = [1.0, 2.0]
+        save_embeddings(self.store, self.embedding_store, self.cache, duplicates, [original])
+        self.assertEqual(next(pending, None), None)
+
+        self.assertEqual(duplicates, {})
+        self.assertEqual(sorted(self.embedding_store.rows), ["a", "b", "c"])
+        self.assertEqual(self.embedding_store.get("c").tolist(), [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
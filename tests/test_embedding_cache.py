@@ -0,0 +1,55 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from atlas.embedding.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        """Creates a cache in a temporary directory, large enough for three 4-dimensional vectors."""
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.path = self.tmp_dir / "embeddings.sqlite"
+        self.cache = EmbeddingCache("openai", "model-a", path=self.path, max_bytes=3 * 16)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_and_get(self):
+        self.cache.put("hash-1", [1.0, 2.0, 3.0, 4.0])
+        self.cache.flush()
+
+        self.assertEqual(self.cache.get("hash-1"), [1.0, 2.0, 3.0, 4.0])
+        self.assertIsNone(self.cache.get("hash-2"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_keyed_by_provider_and_model(self):
+        self.cache.put("hash-1", [1.0] * 4)
+        self.cache.flush()
+
+        with EmbeddingCache("openai", "model-b", path=self.path) as other:
+            self.assertIsNone(other.get("hash-1"))
+        with EmbeddingCache("openai", "model-a", path=self.path) as same:
+            self.assertEqual(same.get("hash-1"), [1.0] * 4)
+
+    def test_evicts_least_recently_used(self):
+        for i in range(3):
+            self.cache.put(f"hash-{i}", [float(i)] * 4)
+            self.cache.flush()
+        # Reading hash-0 makes hash-1 the least recently used entry
+        self.cache.get("hash-0")
+        self.cache.flush()
+
+        self.cache.put("hash-3", [3.0] * 4)
+        self.cache.flush()
+
+        self.assertIsNone(self.cache.get("hash-1"))
+        self.assertIsNotNone(self.cache.get("hash-0"))
+        self.assertIsNotNone(self.cache.get("hash-3"))
+        self.assertLessEqual(self.cache.size_bytes(), 3 * 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from atlas.embedding.base_embedder import BaseEmbedder, Embedding, RetryableEmbeddingError, parse_retry_after
+from atlas.embedding.scheduler import EmbeddingScheduler, TokenBucket
+
+
+class FakeEmbedder(BaseEmbedder):
+    """Returns the text length as a one-dimensional vector, failing the first `failures` calls."""
+
+    def __init__(self, failures=0, retry_after=None, delay=0.0):
+        super().__init__("fake-model")
+        self.failures = failures
+        self.retry_after = retry_after
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def request_embeddings(self, texts):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.calls <= self.failures
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise RetryableEmbeddingError("rate limited", self.retry_after)
+            return [[float(len(text))] for text in texts]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def make_batches(count, size=2):
+    return [[Embedding(f"{b}-{i}", "x" * (i + 1), token_count=10) for i in range(size)] for b in range(count)]
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(capacity=60, period=60, clock=lambda: now[0], sleep=sleep)
+        bucket.acquire(60)
+        bucket.acquire(30)
+
+        self.assertEqual(sleeps, [30.0])
+
+    def test_oversized_request_takes_full_bucket(self):
+        now = [0.0]
+        bucket = TokenBucket(capacity=10, period=60, clock=lambda: now[0], sleep=lambda s: None)
+        bucket.acquire(100)
+
+        self.assertEqual(bucket.tokens, 0)
+
+
+class TestEmbeddingScheduler(unittest.TestCase):
+
+    def test_keeps_requests_in_flight(self):
+        embedder = FakeEmbedder(delay=0.05)
+        scheduler = EmbeddingScheduler(embedder, max_in_flight=4, requests_per_minute=10_000,
+                                       tokens_per_minute=1_000_000)
+
+        results = list(scheduler.map(make_batches(12)))
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(embedder.max_in_flight, 4)
+        for batch in results:
+            self.assertEqual([chunk.embedding for chunk in batch], [[1.0], [2.0]])
+
+    def test_retries_after_provider_hint(self):
+        embedder = FakeEmbedder(failures=2, retry_after=0.01)
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            time.sleep(seconds)
+
+        scheduler = EmbeddingScheduler(embedder, max_in_flight=1, requests_per_minute=10_000,
+                                       tokens_per_minute=1_000_000, sleep=sleep)
+        [batch] = list(scheduler.map(make_batches(1)))
+
+        self.assertEqual(embedder.calls, 3)
+        self.assertEqual(batch[0].errors, [])
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(all(s <= 0.01 for s in sleeps))
+
+    def test_gives_up_after_max_retries(self):
+        embedder = FakeEmbedder(failures=10, retry_after=0)
+        scheduler = EmbeddingScheduler(embedder, max_in_flight=1, requests_per_minute=10_000,
+                                       tokens_per_minute=1_000_000, max_retries=2)
+        [batch] = list(scheduler.map(make_batches(1)))
+
+        self.assertEqual(embedder.calls, 3)
+        self.assertEqual(batch[0].errors, [{'source': 'embedding', 'error': 'rate limited'}])
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after({"retry-after-ms": "1500"}), 1.5)
+        self.assertEqual(parse_retry_after({"retry-after": "7"}), 7.0)
+        self.assertIsNone(parse_retry_after({}))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import unittest
+import tempfile
+import numpy as np
+from pathlib import Path
+from atlas.embedding.embedding_store import EmbeddingStore, INITIAL_CAPACITY, INDEX_FILE, LEGACY_INDEX_FILE
+
+
+class TestEmbeddingStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / "embeddings"
+
+    def test_roundtrip_after_reopen(self):
+        with EmbeddingStore(self.path, dim=4) as store:
+            for i in range(INITIAL_CAPACITY + 10):
+                store.put(f"chunk-{i}", f"hash-{i}", [i, i + 1, i + 2, i + 3])
+
+        store = EmbeddingStore(self.path, dim=4)
+        self.addCleanup(store.close)
+        self.assertEqual(len(store), INITIAL_CAPACITY + 10)
+        self.assertEqual(store.capacity, INITIAL_CAPACITY * 2)
+        self.assertEqual(store.get("chunk-1030").tolist(), [1030, 1031, 1032, 1033])
+        self.assertIsInstance(store.get("chunk-0"), np.memmap)
+
+    def test_source_hash_detects_stale_vectors(self):
+        with EmbeddingStore(self.path, dim=2) as store:
+            store.put("chunk", "old-hash", [1.0, 2.0])
+
+            self.assertTrue(store.has("chunk", "old-hash"))
+            self.assertFalse(store.has("chunk", "new-hash"))
+            self.assertFalse(store.has("missing", "old-hash"))
+
+    def test_deleted_rows_are_reused(self):
+        with EmbeddingStore(self.path, dim=2) as store:
+            store.put("a", "h", [1.0, 1.0])
+            store.put("b", "h", [2.0, 2.0])
+            row_a = store.rows["a"][0]
+            self.assertEqual(store.delete(["a", "missing"]), 1)
+            store.put("c", "h", [3.0, 3.0])
+
+            self.assertEqual(store.rows["c"][0], row_a)
+            self.assertNotIn("a", store)
+
+    def test_float16_matrix(self):
+        with EmbeddingStore(self.path, dim=2, dtype="float16") as store:
+            store.put("a", "h", [0.5, 0.25])
+
+        store = EmbeddingStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(store.dtype, np.float16)
+        self.assertEqual(store.dim, 2)
+        self.assertEqual(store.get("a").astype(np.float32).tolist(), [0.5, 0.25])
+
+    def test_flush_writes_only_changed_entries(self):
+        with EmbeddingStore(self.path, dim=2) as store:
+            store.put("a", "h", [1.0, 1.0])
+            store.put("b", "h", [2.0, 2.0])
+            store.flush()
+            statements = []
+            store.conn.set_trace_callback(statements.append)
+            store.put("c", "h", [3.0, 3.0])
+            store.delete(["a"])
+            store.flush()
+            store.conn.set_trace_callback(None)
+
+        self.assertEqual(sum("INTO rows" in statement for statement in statements), 1)
+        self.assertEqual(sum("DELETE FROM rows" in statement for statement in statements), 1)
+        store = EmbeddingStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(sorted(store.rows), ["b", "c"])
+        self.assertEqual(store.get("c").tolist(), [3.0, 3.0])
+
+    def test_json_index_is_migrated(self):
+        with EmbeddingStore(self.path, dim=2) as store:
+            store.put("a", "h", [1.0, 2.0])
+            row = store.rows["a"][0]
+        (self.path / INDEX_FILE).unlink()
+        (self.path / LEGACY_INDEX_FILE).write_text(json.dumps(
+            {"dim": 2, "dtype": "float32", "capacity": INITIAL_CAPACITY, "rows": {"a": [row, "h"]}}
+        ))
+
+        store = EmbeddingStore(self.path)
+        self.addCleanup(store.close)
+        self.assertFalse((self.path / LEGACY_INDEX_FILE).exists())
+        self.assertTrue(store.has("a", "h"))
+        self.assertEqual(store.get("a").tolist(), [1.0, 2.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
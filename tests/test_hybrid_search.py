@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from atlas.chunking.base_chunker import CodeChunk
+from atlas.chunking.chunk_store import ChunkStore, prepare_chunk_store, search_lexical
+from atlas.qdrant import hybrid_search as hybrid
+from atlas.sqlite.utils import ReadConnectionPool
+
+
+class TestHybridSearch(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Loads three Java methods into a chunk store and points the hybrid search at it, with
+        fake embedding and vector searches.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        path = Path(self.tmp_dir.name) / "chunks.sqlite"
+        self.chunks = [
+            CodeChunk("function", 1, "applyDiscount", 10, 20,
+                      "void applyDiscount(Order order) { order.total *= 0.9; }", "OrderService.java"),
+            CodeChunk("function", 1, "computeTotal", 30, 40,
+                      "double computeTotal(Order order) { return order.sum(); }", "OrderService.java"),
+            CodeChunk("function", 1, "sendMail", 1, 5, "void sendMail(String to) { smtp.send(to); }", "Mailer.java"),
+        ]
+        self.ids = [chunk.chunk_id for chunk in self.chunks]
+        self.store = ChunkStore(path)
+        self.addCleanup(self.store.close)
+        self.store.put_chunks(self.chunks)
+        self.store.mark_loaded([(chunk.chunk_id, chunk.source_hash) for chunk in self.chunks])
+        self.store.commit()
+
+        pool = ReadConnectionPool(path, prepare=prepare_chunk_store)
+        self.addCleanup(pool.close)
+        self.embed = mock.Mock(return_value=[0.1, 0.2])
+        self.vector_ids = []
+        patches = [
+            mock.patch.object(hybrid, "_lexical_pool", pool),
+            mock.patch.object(hybrid, "embed_query", self.embed),
+            mock.patch.object(hybrid, "search_points", self.search_points),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def search_points(self, client, embedding, limit, collection):
+        return [SimpleNamespace(id=self.ids[index], payload={"name": self.chunks[index].name})
+                for index in self.vector_ids][:limit]
+
+    def test_reciprocal_rank_fusion(self):
+        fused = hybrid.reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=1)
+
+        self.assertEqual([hit_id for hit_id, _ in fused], ["b", "a", "c"])
+        self.assertAlmostEqual(fused[0][1], 1 / 3 + 1 / 2)
+
+    def test_lexical_index_follows_loads(self):
+        conn = self.store.conn
+        self.assertEqual(search_lexical(conn, "apply discount", 5)[0][0], self.ids[0])
+        self.assertEqual({hit for hit, _ in search_lexical(conn, "Order", 5)}, set(self.ids[:2]))
+        self.assertEqual(search_lexical(conn, "!!", 5), [])
+
+        self.store.forget_points([self.ids[0]])
+        self.assertEqual(search_lexical(conn, "applyDiscount", 5), [])
+
+        conn.execute("DELETE FROM lexical_chunks")
+        self.assertEqual(self.store.index_loaded_chunks(), 2)
+        self.assertEqual(search_lexical(conn, "smtp", 5)[0][0], self.ids[2])
+
+    def test_identifier_answered_lexically(self):
+        hits = hybrid.hybrid_search("OrderService.applyDiscount", limit=2)
+
+        self.embed.assert_not_called()
+        self.assertEqual(hits[0].id, self.ids[0])
+        self.assertEqual(hits[0].payload["source"], self.chunks[0].source)
+        self.assertEqual((hits[0].lexical_rank, hits[0].vector_rank), (1, None))
+
+    def test_rankings_are_fused(self):
+        self.vector_ids = [2, 1]
+
+        hits = hybrid.hybrid_search("how is the order total computed", limit=3)
+
+        self.embed.assert_called_once()
+        # computeTotal is in both rankings, applyDiscount only matches lexically
+        self.assertEqual(hits[0].id, self.ids[1])
+        self.assertEqual((hits[0].vector_rank, hits[0].lexical_rank), (2, 1))
+        self.assertEqual({hit.id for hit in hits}, set(self.ids))
+        lexical_only = next(hit for hit in hits if hit.id == self.ids[0])
+        self.assertEqual(lexical_only.payload["file_path"], "OrderService.java")
+
+    def test_vector_failure_falls_back_to_lexical(self):
+        self.embed.side_effect = RuntimeError("offline")
+
+        hits = hybrid.hybrid_search("mail send", limit=3)
+
+        self.assertEqual([hit.id for hit in hits], [self.ids[2]])
+        with self.assertRaises(RuntimeError):
+            hybrid.hybrid_search("nothing matches this", limit=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import sqlite3
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+from atlas import index_pipeline
+from atlas.chunking.chunk_store import ChunkStore
+from atlas.chunking.java_chunker import JavaChunker
+from atlas.chunking.manifest import ChunkManifest
+from atlas.chunking.python_chunker import PythonChunker
+from atlas.embedding.embedding_store import EmbeddingStore
+from atlas.index_pipeline import index_file, index_files, index_project
+from atlas.lining.java_line_extactor import JavaLineExtractor
+from atlas.sqlite.utils import apply_schema
+
+
+class TestIndexPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a temporary project with a Java file, a Python file and a file of unknown type.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+        self.java_file = self.root / "Service.java"
+        self.java_file.write_text("""package com.example;
+
+/** Computes things. */
+public class Service {
+    /** Doubles x. */
+    public int compute(int x) {
+        int y = x * 2;
+        y = y + 1;
+        return y;
+    }
+
+    static class Inner {
+        void run() {
+            System.out.println("run");
+        }
+    }
+}
+""")
+        self.python_file = self.root / "module.py"
+        self.python_file.write_text("""
+def handler(x):
+    y = x + 1
+    return y
+""")
+        (self.root / "notes.txt").write_text("not code")
+
+    def test_matches_separate_extraction(self):
+        result = index_file(self.java_file, self.root)
+
+        self.assertIsNone(result.error)
+        expected_chunks = JavaChunker(self.root).extract_chunks_from_file(self.java_file)
+        self.assertEqual([c.to_dict() for c in result.chunks], [c.to_dict() for c in expected_chunks])
+
+        expected_lines = JavaLineExtractor(self.root).extract_file_lines(self.java_file)
+        self.assertEqual(result.file_lines, expected_lines)
+        self.assertEqual(result.file_lines.file_name, "Service.java")
+
+    def test_chunks_only_without_line_extractor(self):
+        result = index_file(self.python_file, self.root)
+
+        self.assertIsNone(result.error)
+        self.assertIsNone(result.file_lines)
+        self.assertEqual([c.to_dict() for c in result.chunks],
+                         [c.to_dict() for c in PythonChunker(self.root).extract_chunks_from_file(self.python_file)])
+
+    def test_failures_are_captured(self):
+        results = [r for batch in index_files(sorted(self.root.iterdir()), self.root) for r in batch]
+
+        errors = {r.file_path.name: r.error for r in results}
+        self.assertIsNone(errors["Service.java"])
+        self.assertIn("No chunker", errors["notes.txt"])
+
+    def test_full_index_drops_deleted_files(self):
+        # Chunk store, embeddings and manifest live outside the project
+        state_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        state = Path(state_dir.name)
+        load_manifest = ChunkManifest.load
+        for patch in (
+            mock.patch.object(index_pipeline, "ChunkStore", lambda: ChunkStore(state / "chunks.sqlite")),
+            mock.patch.object(index_pipeline, "EmbeddingStore", lambda: EmbeddingStore(state / "embeddings", dim=2)),
+            mock.patch.object(ChunkManifest, "load", lambda: load_manifest(state / "manifest.json")),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        other_file = self.root / "Other.java"
+        other_file.write_text("public class Other {\n    void run() {}\n}\n")
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        apply_schema(conn)
+
+        index_project([self.java_file, other_file], self.root, conn)
+        other_ids = ChunkManifest.load().files["Other.java"].chunk_ids
+        with EmbeddingStore(state / "embeddings", dim=2) as embeddings:
+            for chunk_id in other_ids:
+                embeddings.put(chunk_id, "h", [1.0, 1.0])
+        other_file.unlink()
+        stats = index_project([self.java_file], self.root, conn, full=True)
+
+        self.assertEqual((stats.modified, stats.deleted), (1, 1))
+        files = [row[0] for row in conn.execute("SELECT DISTINCT file_path FROM lines")]
+        self.assertEqual(files, ["Service.java"])
+        with EmbeddingStore(state / "embeddings") as embeddings:
+            self.assertFalse(any(chunk_id in embeddings for chunk_id in other_ids))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+from pathlib import Path
+from atlas.lining.base_line_extractor import ContextSpan
+from atlas.lining.java_line_extactor import JavaLineExtractor
+
+SOURCE = """package com.example;
+
+import java.util.List;
+
+/** Service docs. */
+public class Service {
+    /** Doubles x. */
+    public int compute(int x) {
+        Runnable r = new Runnable() {
+            public void run() { }
+        };
+        return x * 2;
+    }
+
+    static class Inner {
+        void a() {}
+    }
+}
+"""
+
+
+class TestJavaLineExtractor(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Writes a Java file with Javadoc, an anonymous class and a nested class.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.java_file = self.root / "Service.java"
+        self.java_file.write_text(SOURCE)
+
+    def test_context_spans(self):
+        file_lines = JavaLineExtractor(self.root).extract_file_lines(self.java_file)
+
+        self.assertEqual(file_lines.spans, [
+            ContextSpan(1, 4, None, None),
+            ContextSpan(5, 6, "com.example.Service", None),
+            ContextSpan(7, 9, "com.example.Service", "compute"),
+            ContextSpan(10, 10, "com.example.Service", "run"),
+            ContextSpan(11, 13, "com.example.Service", "compute"),
+            ContextSpan(14, 14, "com.example.Service", None),
+            ContextSpan(15, 15, "com.example.Service.Inner", None),
+            ContextSpan(16, 16, "com.example.Service.Inner", "a"),
+            ContextSpan(17, 17, "com.example.Service.Inner", None),
+            ContextSpan(18, 18, "com.example.Service", None),
+        ])
+
+    def test_lines_expand_spans(self):
+        lines = JavaLineExtractor(self.root).extract_lines_from_file(self.java_file)
+
+        self.assertEqual(len(lines), len(SOURCE.splitlines()))
+        self.assertEqual([(l.file_line_no, l.clazz, l.method) for l in lines[9:11]],
+                         [(10, "com.example.Service", "run"), (11, "com.example.Service", "compute")])
+        self.assertEqual(lines[15].source, "        void a() {}")
+        self.assertEqual(lines[15].line_id, "Service.java:16")
+
+    def test_line_continuing_after_nested_class(self):
+        self.java_file.write_text("class Outer {\n    class Inner { void a() {} } int after;\n}\n")
+
+        file_lines = JavaLineExtractor(self.root).extract_file_lines(self.java_file)
+
+        # The field declared after the nested class claims the line back for Outer
+        self.assertEqual(file_lines.spans[1], ContextSpan(2, 2, "Outer", "a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
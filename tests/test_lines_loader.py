@@ -0,0 +1,137 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest import mock
+from atlas.lining.base_line_extractor import ContextSpan, FileLines
+from atlas.lining.line_extractor import save_lines_to_file
+from atlas.sqlite.lines_loader import load_lines_to_sqlite
+from atlas.sqlite.utils import LINE_INDEXES, apply_schema
+
+
+def write_lines_file(lines_dir: Path, file_path: str, sources, mtime: int):
+    data = [
+        {
+            "line_id": str(uuid.uuid4()),
+            "parent_type": "Foo",
+            "parent_method": "bar",
+            "file_line_no": no,
+            "file_path": file_path,
+            "source": source,
+        }
+        for no, source in enumerate(sources, 1)
+    ]
+    path = lines_dir / f"lines_{uuid.uuid4()}.json"
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(mtime, mtime))
+    return path
+
+
+class TestLinesLoader(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates an in-memory lines database and a temporary directory for lines files.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.lines_dir = Path(self.tmp_dir.name)
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        apply_schema(self.conn)
+
+    def rows(self):
+        return self.conn.execute("SELECT file_path, file_line_no, source FROM lines ORDER BY file_path, file_line_no").fetchall()
+
+    def test_loads_all_files(self):
+        write_lines_file(self.lines_dir, "A.java", ["a1", "a2"], 1)
+        write_lines_file(self.lines_dir, "B.java", ["b1"], 2)
+
+        count, errors = load_lines_to_sqlite(self.conn, self.lines_dir, batch_size=2)
+
+        self.assertEqual((count, errors), (2, 0))
+        self.assertEqual(self.rows(), [("A.java", 1, "a1"), ("A.java", 2, "a2"), ("B.java", 1, "b1")])
+        created_at = {row[0] for row in self.conn.execute("SELECT created_at FROM files")}
+        self.assertEqual(len(created_at), 1)
+
+    def test_reload_replaces_lines_per_file(self):
+        write_lines_file(self.lines_dir, "A.java", ["a1", "a2", "a3"], 1)
+        write_lines_file(self.lines_dir, "B.java", ["b1"], 2)
+        load_lines_to_sqlite(self.conn, self.lines_dir)
+        # Loading the same files again must not fail nor duplicate lines
+        load_lines_to_sqlite(self.conn, self.lines_dir)
+        self.assertEqual(len(self.rows()), 4)
+
+        for path in self.lines_dir.glob("*.json"):
+            path.unlink()
+        write_lines_file(self.lines_dir, "A.java", ["old"], 3)
+        write_lines_file(self.lines_dir, "A.java", ["new1", "new2"], 4)
+        load_lines_to_sqlite(self.conn, self.lines_dir)
+
+        self.assertEqual(self.rows(), [("A.java", 1, "new1"), ("A.java", 2, "new2"), ("B.java", 1, "b1")])
+
+    def test_loads_span_form(self):
+        file_lines = FileLines("A.java", ["class A {", "  void f() {}", "}"], [
+            ContextSpan(1, 1, "A", None), ContextSpan(2, 2, "A", "f"), ContextSpan(3, 3, "A", None),
+        ])
+        (self.lines_dir / "lines_a.json").write_text(json.dumps(file_lines.as_json()))
+
+        self.assertEqual(load_lines_to_sqlite(self.conn, self.lines_dir), (1, 0))
+        rows = self.conn.execute("SELECT file_line_no, parent_type, parent_method, source FROM lines ORDER BY file_line_no")
+        self.assertEqual(rows.fetchall(), [(1, "A", None, "class A {"), (2, "A", "f", "  void f() {}"), (3, "A", None, "}")])
+
+    def test_extracting_again_overwrites_lines_file(self):
+        with mock.patch("atlas.lining.line_extractor.LINES_DIR", self.lines_dir):
+            save_lines_to_file(FileLines("A.java", ["old"], [ContextSpan(1, 1)]))
+            save_lines_to_file(FileLines("A.java", ["new"], [ContextSpan(1, 1)]))
+            save_lines_to_file(FileLines("B.java", ["b1"], [ContextSpan(1, 1)]))
+
+        self.assertEqual(len(list(self.lines_dir.glob("*.json"))), 2)
+        load_lines_to_sqlite(self.conn, self.lines_dir)
+        self.assertEqual(self.rows(), [("A.java", 1, "new"), ("B.java", 1, "b1")])
+
+    def test_method_spans_include_nested_methods(self):
+        file_lines = FileLines("A.java", [f"line {no}" for no in range(1, 10)], [
+            ContextSpan(1, 1, "A", None),
+            ContextSpan(2, 3, "A", "f"), ContextSpan(4, 4, "A", "run"), ContextSpan(5, 5, "A", "f"),
+            ContextSpan(6, 6, "A", None),
+            ContextSpan(7, 8, "A", "f"),
+            ContextSpan(9, 9, "A", None),
+        ])
+        (self.lines_dir / "lines_a.json").write_text(json.dumps(file_lines.as_json()))
+        load_lines_to_sqlite(self.conn, self.lines_dir)
+
+        methods = self.conn.execute("SELECT name, start_line, end_line FROM methods ORDER BY start_line").fetchall()
+        # An overload after a line outside of any method is a method of its own
+        self.assertEqual(methods, [("f", 2, 5), ("run", 4, 4), ("f", 7, 8)])
+        self.assertEqual(self.conn.execute("SELECT start_line, end_line FROM types").fetchall(), [(1, 9)])
+        rows = self.conn.execute("SELECT parent_method FROM lines ORDER BY file_line_no").fetchall()
+        self.assertEqual([row[0] for row in rows], [None, "f", "f", "run", "f", None, "f", "f", None])
+
+    def test_bad_file_is_counted_and_indexes_are_rebuilt(self):
+        write_lines_file(self.lines_dir, "A.java", ["a1"], 1)
+        (self.lines_dir / "broken.json").write_text("[{")
+
+        count, errors = load_lines_to_sqlite(self.conn, self.lines_dir)
+
+        self.assertEqual((count, errors), (1, 1))
+        indexes = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue(set(LINE_INDEXES) <= indexes)
+
+    def test_lines_view_reads_the_lines_of_selected_spans(self):
+        def plan(where):
+            rows = self.conn.execute(f"EXPLAIN QUERY PLAN SELECT * FROM lines WHERE {where}", ("x",))
+            return " ".join(row[3] for row in rows)
+
+        self.assertIn("INDEX idx_line_spans_type (type_id=?)", plan("parent_type = ?"))
+        self.assertIn("SEARCH s USING PRIMARY KEY (file_id=?)", plan("file_path = ?"))
+        for where in ("parent_type = ?", "parent_method = ?", "file_path = ?"):
+            self.assertIn("SEARCH lt USING PRIMARY KEY (file_id=? AND line_no>? AND line_no<?)", plan(where))
+            self.assertNotIn("SUBQUERY", plan(where))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import sqlite3
+import unittest
+from atlas.lining.base_line_extractor import ContextSpan, FileLines
+from atlas.sqlite.lines_loader import LineLoader
+from atlas.sqlite.utils import LINE_SCHEMA, MIGRATIONS, apply_schema
+from atlas.stacktrace.dbaccess import LINE_TEXT_QUERY, METHOD_SPAN_QUERY, get_method_context
+
+
+class TestMethodContext(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates an in-memory lines database with two classes of 100 lines, three methods each.
+        """
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        apply_schema(self.conn)
+        loader = LineLoader(self.conn)
+        for cls in ("Foo", "Bar"):
+            loader.add_file(FileLines(f"src/{cls}.java", [f"line {no}" for no in range(1, 101)], [
+                ContextSpan(1, 33, cls, "m0"), ContextSpan(34, 67, cls, "m1"), ContextSpan(68, 100, cls, "m2"),
+            ]))
+        loader.finish()
+        self.conn.commit()
+
+    def test_returns_lines_around_frame(self):
+        context = get_method_context(self.conn, "Foo", "m1", 40, context_lines=2)
+
+        self.assertEqual(context["file_path"], "src/Foo.java")
+        self.assertEqual([line["line_no"] for line in context["lines"]], [38, 39, 40, 41, 42])
+        # Only lines of the method's span are fetched
+        context = get_method_context(self.conn, "Foo", "m1", 35, context_lines=3)
+        self.assertEqual([line["line_no"] for line in context["lines"]], [34, 35, 36, 37, 38])
+        self.assertIsNone(get_method_context(self.conn, "Foo", "missing", 40))
+
+    def test_query_plan_uses_index(self):
+        plan = " ".join(
+            row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {METHOD_SPAN_QUERY}", ("m1", "Foo", 40, 40))
+        )
+        self.assertIn("INDEX idx_types_name (name=?)", plan)
+        self.assertIn("USING INDEX idx_methods_type (type_id=? AND name=?)", plan)
+
+        plan = " ".join(
+            row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {LINE_TEXT_QUERY}", (1, 35, 45))
+        )
+        self.assertIn("USING PRIMARY KEY (file_id=? AND line_no>? AND line_no<?)", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_migrates_existing_database(self):
+        conn = sqlite3.connect(":memory:")
+        self.addCleanup(conn.close)
+        conn.executescript(LINE_SCHEMA)
+        conn.execute("CREATE INDEX idx_lines_file_path ON lines(file_path)")
+        conn.executemany(
+            "INSERT INTO lines (line_id, parent_type, parent_method, file_line_no, file_path, source) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(f"id-{no}", "Foo", "m" if no > 1 else None, no, "src/Foo.java", f"line {no}") for no in range(1, 4)]
+        )
+        conn.commit()
+
+        self.assertEqual(apply_schema(conn), len(MIGRATIONS))
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], len(MIGRATIONS))
+        self.assertEqual(conn.execute("SELECT type FROM sqlite_master WHERE name = 'lines'").fetchone()[0], "view")
+        self.assertEqual(
+            conn.execute("SELECT file_path, file_line_no, source, parent_type, parent_method FROM lines").fetchall(),
+            [("src/Foo.java", 1, "line 1", "Foo", None),
+             ("src/Foo.java", 2, "line 2", "Foo", "m"),
+             ("src/Foo.java", 3, "line 3", "Foo", "m")]
+        )
+        self.assertEqual(get_method_context(conn, "Foo", "m", 3)["lines"][0], {"line_no": 2, "source": "line 2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
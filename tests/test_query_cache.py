@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from pathlib import Path
+from atlas.embedding.query_cache import QueryEmbeddingCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a two-entry cache with a 60 second TTL on a fake clock, and an embedder counting its calls.
+        """
+        self.clock = FakeClock()
+        self.cache = QueryEmbeddingCache(max_entries=2, ttl=60, clock=self.clock)
+        self.calls = []
+
+    def embed(self, text):
+        self.calls.append(text)
+        return [float(len(text))]
+
+    def test_normalized_queries_share_entry(self):
+        first = self.cache.get_or_compute("OpenAI", "m", "find  user\n", self.embed)
+        second = self.cache.get_or_compute("openai", "m", " find user", self.embed)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, ["find user"])
+        # Other models and differently cased queries are separate entries
+        self.cache.get_or_compute("openai", "other", "find user", self.embed)
+        self.cache.get_or_compute("openai", "m", "Find user", self.embed)
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_ttl_and_lru_eviction(self):
+        for query in ("a", "b"):
+            self.cache.get_or_compute("openai", "m", query, self.embed)
+        self.cache.get_or_compute("openai", "m", "a", self.embed)
+        self.cache.get_or_compute("openai", "m", "c", self.embed)  # evicts b, the least recently used
+        self.cache.get_or_compute("openai", "m", "b", self.embed)
+        self.assertEqual(self.calls, ["a", "b", "c", "b"])
+
+        self.clock.now = 61
+        self.cache.get_or_compute("openai", "m", "b", self.embed)
+        stats = self.cache.stats()
+        self.assertEqual((stats["expired"], stats["evictions"], stats["entries"]), (1, 2, 2))
+
+    def test_failures_are_not_cached(self):
+        self.assertIsNone(self.cache.get_or_compute("voyage", "m", "q", lambda text: None))
+        self.assertEqual(self.cache.get_or_compute("voyage", "m", "q", self.embed), [1.0])
+
+    def test_persisted_entries_survive_restart(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / "embeddings.sqlite"
+        cache = QueryEmbeddingCache(persist_path=path)
+        cache.get_or_compute("openai", "m", "query", self.embed)
+        cache.close()
+
+        restarted = QueryEmbeddingCache(persist_path=path)
+        self.addCleanup(restarted.close)
+        self.assertEqual(restarted.get_or_compute("openai", "m", "query", self.embed), [5.0])
+        self.assertEqual(self.calls, ["query"])
+        self.assertEqual(restarted.stats()["disk_hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from atlas.sqlite.utils import ReadConnectionPool, apply_schema
+
+
+class TestReadConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a lines database on disk and a read-only pool over it.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = Path(self.tmp_dir.name) / "lines.sqlite"
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        apply_schema(conn)
+        conn.execute("INSERT INTO files (file_path, line_count) VALUES ('A.java', 1)")
+        conn.commit()
+        conn.close()
+        self.pool = ReadConnectionPool(self.path)
+        self.addCleanup(self.pool.close)
+
+    def test_connection_per_thread(self):
+        results = {}
+
+        def query(name):
+            conn = self.pool.get()
+            results[name] = (id(conn), conn.execute("SELECT file_path FROM files").fetchone()[0])
+
+        threads = [threading.Thread(target=query, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({path for _, path in results.values()}, {"A.java"})
+        self.assertEqual(len({conn_id for conn_id, _ in results.values()}), 4)
+        self.assertIs(self.pool.get(), self.pool.get())
+
+    def test_writes_are_rejected(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.pool.get().execute("DELETE FROM files")
+
+    def test_creates_missing_database(self):
+        pool = ReadConnectionPool(Path(self.tmp_dir.name) / "new.sqlite")
+        self.addCleanup(pool.close)
+
+        self.assertEqual(pool.get().execute("SELECT COUNT(*) FROM lines").fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
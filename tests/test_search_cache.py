@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+from atlas.qdrant import search_cache as module
+from atlas.qdrant.search_cache import SearchResultCache, bump_collection_version, collection_version, search_points
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def query_points(self, collection_name, query, query_filter, limit):
+        self.calls += 1
+        return SimpleNamespace(points=[f"{collection_name}:{self.calls}"] * limit)
+
+
+class TestSearchResultCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Replaces the process-wide cache by one whose version file lives in a temporary directory.
+        """
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.version_path = Path(tmp_dir.name) / "version"
+        patch = mock.patch.object(module, "search_cache", SearchResultCache(version_path=self.version_path))
+        self.cache = patch.start()
+        self.addCleanup(patch.stop)
+        self.client = FakeClient()
+
+    def test_repeated_search_is_cached(self):
+        first = search_points(self.client, [0.1, 0.2], 3)
+        second = search_points(self.client, [0.1, 0.2], 3)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.calls, 1)
+        # Other limits, embeddings, filters and collections are searched again
+        search_points(self.client, [0.1, 0.2], 5)
+        search_points(self.client, [0.1, 0.3], 3)
+        search_points(self.client, [0.1, 0.2], 3, Filter(must=[FieldCondition(key="type", match=MatchValue(value="class"))]))
+        search_points(self.client, [0.1, 0.2], 3, collection="other")
+        self.assertEqual(self.client.calls, 5)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_version_bump_invalidates(self):
+        self.assertEqual(collection_version(self.version_path), "")
+        search_points(self.client, [0.1], 1)
+        version = bump_collection_version(self.version_path)
+
+        self.assertEqual(collection_version(self.version_path), version)
+        self.assertEqual(search_points(self.client, [0.1], 1), ["codeatlas_chunks:2"])
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_results_of_outdated_version_are_not_stored(self):
+        key = self.cache.make_key("c", [0.1], 1)
+        self.cache.get(key, "1")
+        self.cache.put(key, ["old"], "0")
+
+        self.assertIsNone(self.cache.get(key, "1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import tempfile
+import threading
+import unittest
+from contextvars import copy_context
+from pathlib import Path
+from atlas.tracing import Tracer, activate, current_span, is_tracing, trace_span
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Creates a tracer.
+        """
+        self.tracer = Tracer()
+
+    def test_nested_spans(self):
+        with activate(self.tracer):
+            with trace_span("outer", query_chars=3) as outer:
+                with trace_span("inner"):
+                    current_span().set(rows=2)
+                outer.set(action="done")
+            with self.assertRaises(ValueError), trace_span("failing"):
+                raise ValueError("bad")
+
+        outer, failing = self.tracer.spans
+        self.assertEqual(outer.attributes, {"query_chars": 3, "action": "done"})
+        self.assertEqual([(c.name, c.attributes) for c in outer.children], [("inner", {"rows": 2})])
+        self.assertGreaterEqual(outer.duration_ms, outer.children[0].duration_ms)
+        self.assertEqual(failing.error, "ValueError: bad")
+        self.assertEqual(self.tracer.totals()["inner"]["count"], 1)
+
+    def test_untraced_spans_are_dropped(self):
+        with trace_span("ignored") as span:
+            span.set(rows=1)
+            current_span().set(rows=1)
+            self.assertFalse(is_tracing())
+
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_spans_of_threads_nest_in_copied_context(self):
+        def work(number):
+            with trace_span("work", number=number):
+                pass
+
+        with activate(self.tracer), trace_span("parent"):
+            threads = [threading.Thread(target=copy_context().run, args=(work, n)) for n in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(self.tracer.spans), 1)
+        self.assertEqual(sorted(c.attributes["number"] for c in self.tracer.spans[0].children), [0, 1, 2])
+
+    def test_export(self):
+        with activate(self.tracer), trace_span("outer"), trace_span("inner"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "trace.json"
+            self.tracer.export(path)
+            trace = json.loads(path.read_text())
+
+        self.assertEqual(trace["spans"][0]["children"][0]["name"], "inner")
+        self.assertEqual(set(trace["totals"]), {"outer", "inner"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+from atlas.web.services import dispatch
+from atlas.web.services.dispatch import ServiceTimeout, run_service
+
+
+class TestRunService(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Limits a test service to two concurrent handlers and half a second per request.
+        """
+        patches = [
+            mock.patch.dict(dispatch.WEB_SERVICE_CONCURRENCY, {"test": 2}),
+            mock.patch.dict(dispatch.WEB_SERVICE_TIMEOUTS, {"test": 0.5}),
+            mock.patch.dict(dispatch._semaphores, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_limits_concurrency_off_the_event_loop(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def handler(value):
+            with lock:
+                running.append(value)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(value)
+            return value * 2
+
+        async def main():
+            loop_thread = threading.get_ident()
+            threads = await asyncio.gather(*(run_service("test", threading.get_ident) for _ in range(2)))
+            self.assertNotIn(loop_thread, threads)
+            return await asyncio.gather(*(run_service("test", handler, n) for n in range(6)))
+
+        self.assertEqual(asyncio.run(main()), [0, 2, 4, 6, 8, 10])
+        self.assertEqual(max(peak), 2)
+
+    def test_timeout_keeps_slot_until_handler_returns(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        async def main():
+            with self.assertRaises(ServiceTimeout):
+                await asyncio.gather(run_service("test", release.wait), run_service("test", release.wait))
+            # Both slots are still taken by the handlers that timed out
+            with self.assertRaises(ServiceTimeout):
+                await run_service("test", lambda: "late")
+            release.set()
+            return await run_service("test", lambda: "done")
+
+        self.assertEqual(asyncio.run(main()), "done")
+
+
+if __name__ == '__main__':
+    unittest.main()